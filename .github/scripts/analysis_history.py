@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Code Analysis History
+SQLite time series of per-file analysis results, one row per file per run
+
+The database lives in the pipeline cache dir (gitignored, persisted between CI
+runs with actions/cache) rather than in the committed code-analysis/ tree.
+Each analysis records only its own run; `import` back-fills missing runs from
+the committed code-analysis/<run>/ manifests (CI runs it when the cache had
+no database).
+
+Usage:
+    python analysis_history.py trends [--file PATH] [--limit N]
+    python analysis_history.py regressions BASE_COMMIT HEAD_COMMIT
+    python analysis_history.py top [--by score|security|performance] [--limit N]
+    python analysis_history.py import [DIR]
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import argparse
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+from result_store import ResultStore, STORE_DIR
+from stage_cache import CACHE_DIR
+
+HISTORY_DB = Path(os.environ.get('ANALYSIS_HISTORY_DB', str(CACHE_DIR / 'analysis-history.db')))
+LATEST = datetime.max.isoformat()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    commit_sha TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS file_results (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    file TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    language TEXT,
+    score INTEGER,
+    grade TEXT,
+    documentation INTEGER,
+    complexity INTEGER,
+    maintainability INTEGER,
+    security_issues INTEGER,
+    high_security_issues INTEGER,
+    performance_issues INTEGER,
+    PRIMARY KEY (run_id, file)
+);
+CREATE TABLE IF NOT EXISTS findings (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    file TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    category TEXT,
+    severity TEXT,
+    line INTEGER,
+    description TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_by_time ON runs(timestamp, id);
+CREATE INDEX IF NOT EXISTS runs_by_commit ON runs(commit_sha);
+CREATE INDEX IF NOT EXISTS results_by_file ON file_results(file, timestamp, run_id);
+CREATE INDEX IF NOT EXISTS findings_by_run ON findings(run_id, file);
+"""
+
+# Latest result per file as of a point in time (runs only cover changed files);
+# one (file, timestamp) index seek per file keeps it fast over long histories
+STATE_AT = """
+SELECT fr.*, r.commit_sha
+FROM (SELECT DISTINCT file FROM file_results) f
+JOIN file_results fr ON fr.rowid = (
+    SELECT rowid FROM file_results
+    WHERE file = f.file AND timestamp <= ?
+    ORDER BY timestamp DESC, run_id DESC LIMIT 1)
+JOIN runs r ON r.id = fr.run_id
+"""
+
+
+def run_timestamp(run_name: str) -> str:
+    """ISO timestamp from a '<YYYYmmdd-HHMMSS>_<sha>' run directory name"""
+    try:
+        return datetime.strptime(run_name.split('_')[0], '%Y%m%d-%H%M%S').isoformat()
+    except ValueError:
+        return datetime.fromtimestamp(0).isoformat()
+
+
+class AnalysisHistory:
+    def __init__(self, db_path: Path = HISTORY_DB):
+        self.db_path = Path(db_path)
+        self.is_new = not self.db_path.exists()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA foreign_keys = ON')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def has_run(self, name: str) -> bool:
+        return self.conn.execute('SELECT 1 FROM runs WHERE name = ?', (name,)).fetchone() is not None
+
+    def start_run(self, name: str, commit_sha: str, timestamp: str) -> int:
+        """
+        Insert a run (replacing any run of the same name) for add_result to
+        fill; nothing is committed until the caller commits the connection.
+
+        Returns:
+            Run id
+        """
+        self.conn.execute('DELETE FROM runs WHERE name = ?', (name,))
+        return self.conn.execute(
+            'INSERT INTO runs (name, commit_sha, timestamp) VALUES (?, ?, ?)',
+            (name, commit_sha, timestamp)
+        ).lastrowid
+
+    def add_result(self, run_id: int, timestamp: str, result: Dict):
+        """Insert one file's result and findings into a started run"""
+        score = result['quality_score']
+        vulns = result.get('security_vulnerabilities', [])
+        perf = result.get('performance_issues', [])
+        self.conn.execute('INSERT OR REPLACE INTO file_results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', (
+            run_id, result['file'], timestamp, result.get('language'),
+            score['total'], score.get('grade'),
+            score.get('documentation'), score.get('complexity'), score.get('maintainability'),
+            len(vulns), sum(1 for v in vulns if v.get('severity') == 'HIGH'), len(perf)
+        ))
+
+        findings = [
+            (run_id, result['file'], 'security', v.get('category'), v.get('severity'), v.get('line'), v.get('description'))
+            for v in vulns
+        ]
+        findings.extend(
+            (run_id, result['file'], 'performance', p.get('type'), p.get('severity'), p.get('line'), p.get('description'))
+            for p in perf
+        )
+        self.conn.executemany('INSERT INTO findings VALUES (?, ?, ?, ?, ?, ?, ?)', findings)
+
+    def record_run(self, name: str, commit_sha: str, timestamp: str, results: List[Dict]):
+        """Insert (or replace) one run's per-file results and findings"""
+        with self.conn:
+            run_id = self.start_run(name, commit_sha, timestamp)
+            for result in results:
+                self.add_result(run_id, timestamp, result)
+
+    def import_runs(self, root: Path = STORE_DIR) -> int:
+        """
+        Back-fill runs from code-analysis/<run>/ directories not yet in the database.
+
+        Reads legacy results.json dumps and store manifests (whose per-file
+        results are resolved from the object store).
+
+        Returns:
+            Number of runs imported
+        """
+        store = ResultStore(root)
+        imported = 0
+        for run_dir in sorted(Path(root).iterdir()) if Path(root).exists() else []:
+            if not run_dir.is_dir() or run_dir.name == 'objects' or self.has_run(run_dir.name):
+                continue
+
+            commit_sha = run_dir.name.split('_')[-1]
+            timestamp = run_timestamp(run_dir.name)
+            results = None
+            try:
+                if (run_dir / 'results.json').exists():
+                    with open(run_dir / 'results.json', 'r') as f:
+                        results = json.load(f)
+                elif (run_dir / 'manifest.json').exists():
+                    with open(run_dir / 'manifest.json', 'r') as f:
+                        manifest = json.load(f)
+                    commit_sha = manifest.get('summary', {}).get('commit', commit_sha)
+                    timestamp = manifest.get('summary', {}).get('timestamp', timestamp)
+                    results = [
+                        store.get(manifest['analyzer_version'], blob, path)
+                        for path, blob in manifest['files'].items() if blob
+                    ]
+                    results = [r for r in results if r]
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️  Skipping {run_dir.name}: {e}")
+                continue
+
+            if results is not None:
+                self.record_run(run_dir.name, commit_sha, timestamp, results)
+                imported += 1
+
+        return imported
+
+    def _run_time(self, commit: str) -> Optional[str]:
+        """Timestamp of the latest run for a commit (full or abbreviated sha)"""
+        row = self.conn.execute(
+            'SELECT MAX(timestamp) FROM runs WHERE commit_sha LIKE ? OR ? LIKE commit_sha || \'%\'',
+            (commit + '%', commit)
+        ).fetchone()
+        return row[0]
+
+    def trends(self, file: str = None, limit: int = 20) -> List[Dict]:
+        """Score history per run, for one file or averaged over the files each run analyzed"""
+        if file:
+            query = """
+                SELECT r.name, r.commit_sha, r.timestamp, fr.score, fr.security_issues, fr.performance_issues
+                FROM file_results fr JOIN runs r ON r.id = fr.run_id
+                WHERE fr.file = ? ORDER BY r.timestamp DESC, r.id DESC LIMIT ?
+            """
+            params = (file, limit)
+        else:
+            query = """
+                SELECT r.name, r.commit_sha, r.timestamp, ROUND(AVG(fr.score), 1) AS score,
+                       SUM(fr.security_issues) AS security_issues, SUM(fr.performance_issues) AS performance_issues
+                FROM (SELECT * FROM runs ORDER BY timestamp DESC, id DESC LIMIT ?) r
+                JOIN file_results fr ON fr.run_id = r.id
+                GROUP BY r.id ORDER BY r.timestamp DESC, r.id DESC
+            """
+            params = (limit,)
+        return [dict(row) for row in reversed(self.conn.execute(query, params).fetchall())]
+
+    def regressions(self, base: str, head: str) -> List[Dict]:
+        """Files whose score dropped or whose finding counts grew between two commits"""
+        base_time, head_time = self._run_time(base), self._run_time(head)
+        if base_time is None or head_time is None:
+            missing = base if base_time is None else head
+            raise ValueError(f"No analysis run recorded for commit {missing}")
+
+        base_state = self.state_at(base_time)
+        regressions = []
+        for file, now in self.state_at(head_time).items():
+            before = base_state.get(file)
+            if before is None:
+                continue
+            regression = {
+                'file': file,
+                'base_score': before['score'],
+                'head_score': now['score'],
+                'score_delta': now['score'] - before['score'],
+                'security_delta': now['security_issues'] - before['security_issues'],
+                'performance_delta': now['performance_issues'] - before['performance_issues'],
+            }
+            if regression['score_delta'] < 0 or regression['security_delta'] > 0 or regression['performance_delta'] > 0:
+                regressions.append(regression)
+
+        return sorted(regressions, key=lambda r: (r['score_delta'], -r['security_delta'], r['file']))
+
+    def state_at(self, timestamp: str) -> Dict[str, Dict]:
+        """Latest result of every file recorded at or before a timestamp"""
+        return {row['file']: dict(row) for row in self.conn.execute(STATE_AT, (timestamp,)).fetchall()}
+
+    def top_offenders(self, by: str = 'score', limit: int = 10) -> List[Dict]:
+        """Worst files in the latest known state of every file"""
+        order = {
+            'score': 'score ASC',
+            'security': 'high_security_issues DESC, security_issues DESC',
+            'performance': 'performance_issues DESC',
+        }[by]
+        query = f"""
+            SELECT file, score, grade, security_issues, high_security_issues, performance_issues, commit_sha
+            FROM ({STATE_AT}) ORDER BY {order}, file LIMIT ?
+        """
+        return [dict(row) for row in self.conn.execute(query, (LATEST, limit)).fetchall()]
+
+
+def print_table(rows: List[Dict], columns: List[str]):
+    """Print rows as a markdown table"""
+    if not rows:
+        print("No data")
+        return
+    print("| " + " | ".join(columns) + " |")
+    print("|" + "|".join("-" * (len(c) + 2) for c in columns) + "|")
+    for row in rows:
+        print("| " + " | ".join(str(row[c]) for c in columns) + " |")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query the code analysis history')
+    parser.add_argument('--db', default=str(HISTORY_DB), help='History database path')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    trends = commands.add_parser('trends', help='Score trend per run')
+    trends.add_argument('--file', help='Only this file')
+    trends.add_argument('--limit', type=int, default=20)
+
+    regressions = commands.add_parser('regressions', help='Files that got worse between two commits')
+    regressions.add_argument('base')
+    regressions.add_argument('head')
+
+    top = commands.add_parser('top', help='Worst files in the latest state')
+    top.add_argument('--by', choices=['score', 'security', 'performance'], default='score')
+    top.add_argument('--limit', type=int, default=10)
+
+    backfill = commands.add_parser('import', help='Back-fill runs from code-analysis/ directories')
+    backfill.add_argument('root', nargs='?', default=str(STORE_DIR))
+
+    args = parser.parse_args()
+    history = AnalysisHistory(args.db)
+
+    try:
+        if args.command == 'trends':
+            print_table(history.trends(args.file, args.limit),
+                        ['name', 'commit_sha', 'score', 'security_issues', 'performance_issues'])
+        elif args.command == 'regressions':
+            print_table(history.regressions(args.base, args.head),
+                        ['file', 'base_score', 'head_score', 'score_delta', 'security_delta', 'performance_delta'])
+        elif args.command == 'top':
+            print_table(history.top_offenders(args.by, args.limit),
+                        ['file', 'score', 'grade', 'security_issues', 'high_security_issues', 'performance_issues'])
+        elif args.command == 'import':
+            imported = history.import_runs(Path(args.root))
+            print(f"✓ Imported {imported} run(s) into {history.db_path}")
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        history.close()
+
+
+if __name__ == '__main__':
+    main()
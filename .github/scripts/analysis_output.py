@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Streaming writers for code analysis results
+Results are written one file at a time as they are produced, so a run never
+holds every result in memory: JSON lines for tooling and notifications, and
+SARIF 2.1.0 for code scanning viewers.
+"""
+
+import os
+import json
+import hashlib
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Set
+
+SARIF_SCHEMA = 'https://json.schemastore.org/sarif-2.1.0.json'
+SARIF_LEVELS = {'HIGH': 'error', 'MEDIUM': 'warning', 'LOW': 'note'}
+# partialFingerprints key of our own; primaryLocationLineHash is reserved for the upload action's hash
+FINGERPRINT_KEY = 'codeAnalyzer/v1'
+
+
+class _AtomicWriter:
+    """Text file written under a temporary name and moved into place on close"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp = self.path.with_name(f'{self.path.name}.{os.getpid()}.tmp')
+        self._file = open(self._tmp, 'w', encoding='utf-8')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+            self._tmp.unlink(missing_ok=True)
+
+    def close(self):
+        self._finish()
+        self._file.close()
+        os.replace(self._tmp, self.path)
+
+    def _finish(self):
+        pass
+
+
+class JsonLinesWriter(_AtomicWriter):
+    """One compact JSON object per line"""
+
+    def write(self, record: Dict):
+        self._file.write(json.dumps(record, separators=(',', ':')) + '\n')
+
+
+def iter_json_lines(path) -> Iterator[Dict]:
+    """Records of a JSON lines file, read one line at a time"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _fingerprint(*parts: str) -> str:
+    return hashlib.sha256('\0'.join(parts).encode('utf-8', errors='replace')).hexdigest()[:32]
+
+
+class SarifWriter(_AtomicWriter):
+    """
+    SARIF 2.1.0 log with a single run. Results are streamed into the run's
+    results array; rule metadata (one entry per rule id, so bounded by the
+    number of checks) and run properties are written when the log is closed.
+    """
+
+    def __init__(self, path, tool_name: str, version: str, information_uri: Optional[str] = None):
+        super().__init__(path)
+        self.driver = {'name': tool_name, 'version': version, 'rules': []}
+        if information_uri:
+            self.driver['informationUri'] = information_uri
+        self.properties = {}
+        self._rules = {}
+        self._first = True
+        self._file.write(f'{{"$schema":"{SARIF_SCHEMA}","version":"2.1.0","runs":[{{"results":[')
+
+    def _rule_index(self, rule_id: str, description: str, tags) -> int:
+        if rule_id not in self._rules:
+            self._rules[rule_id] = len(self.driver['rules'])
+            self.driver['rules'].append({
+                'id': rule_id,
+                'shortDescription': {'text': description},
+                'properties': {'tags': list(tags)}
+            })
+        return self._rules[rule_id]
+
+    def _emit(self, result: Dict):
+        self._file.write(('' if self._first else ',') + json.dumps(result, separators=(',', ':')))
+        self._first = False
+
+    def add_file(self, result: Dict, introduced: Optional[Set[int]] = None):
+        """
+        Append every finding of one analyzed file
+
+        Args:
+            introduced: indexes of the performance issues that are new against
+                the base commit; when given, performance results get a baselineState
+        """
+        uri = Path(result['file']).as_posix()
+        for vuln in result.get('security_vulnerabilities', []):
+            rule_id = f"security/{vuln['category']}"
+            self._emit({
+                'ruleId': rule_id,
+                'ruleIndex': self._rule_index(rule_id, vuln['category'].replace('_', ' ').capitalize(), ['security']),
+                'level': SARIF_LEVELS.get(vuln['severity'], 'warning'),
+                'message': {'text': vuln['description']},
+                'locations': [_location(uri, vuln['line'])],
+                'partialFingerprints': {FINGERPRINT_KEY:
+                                        vuln.get('fingerprint') or _fingerprint(rule_id, vuln.get('code', ''))}
+            })
+
+        for index, issue in enumerate(result.get('performance_issues', [])):
+            rule_id = f"performance/{issue['type']}"
+            entry = {
+                'ruleId': rule_id,
+                'ruleIndex': self._rule_index(rule_id, issue['type'].replace('_', ' ').capitalize(), ['performance']),
+                'level': SARIF_LEVELS.get(issue['severity'], 'warning'),
+                'message': {'text': f"{issue['description']}. {issue['suggestion']}"},
+                'locations': [_location(uri, issue['line'], issue.get('end_line'))],
+                'partialFingerprints': {FINGERPRINT_KEY: _fingerprint(
+                    rule_id, issue.get('function') or '', issue.get('code') or '')}
+            }
+            if introduced is not None:
+                entry['baselineState'] = 'new' if index in introduced else 'unchanged'
+            self._emit(entry)
+
+    def _finish(self):
+        run_tail = {'tool': {'driver': self.driver}}
+        if self.properties:
+            run_tail['properties'] = self.properties
+        self._file.write('],' + json.dumps(run_tail, separators=(',', ':'))[1:-1] + '}]}')
+
+
+def _location(uri: str, line: int, end_line: Optional[int] = None) -> Dict:
+    region = {'startLine': max(1, line)}
+    if end_line and end_line > line:
+        region['endLine'] = end_line
+    return {'physicalLocation': {'artifactLocation': {'uri': uri}, 'region': region}}
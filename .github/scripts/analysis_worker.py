@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+"""
+Process-pool entry point for code-analyzer.py
+code-analyzer.py is a hyphenated script, loaded under a module name that
+spawned and forkserver workers cannot import; they call its functions
+through this module instead, which loads the script by path on first use.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from pipeline import load_script
+
+
+def call(name: str, *args):
+    """Call a code-analyzer.py function by name"""
+    return getattr(load_script('code-analyzer'), name)(*args)
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Analyzer Benchmarks
+
+Times our own tooling on synthetic repositories so that a slowdown is caught
+before it reaches CI:
+1. Generates seeded repos per scenario (ordinary mix, huge single files,
+   thousands of tiny files, deeply nested code)
+2. Times each phase: reading, parsing/stats, quality score, security scan,
+   performance checks, extract_symbols_detailed and analyze_cross_file_impact
+3. Measures each phase's peak memory in a separate traced pass
+4. Saves the numbers as a baseline, or checks them against the saved one
+
+Timings are compared after dividing by a calibration workload run on the same
+machine, so a baseline recorded locally still applies on a CI runner.
+"""
+
+import os
+import re
+import ast
+import sys
+import gc
+import json
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+SCRIPTS_DIR = Path(__file__).parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+from pipeline import load_script
+from synthetic_repo import SyntheticRepo, parse_mix
+
+BASELINE_FILE = Path(os.environ.get('BENCHMARK_BASELINE', '.github/analyzer-benchmark.json'))
+DEFAULT_MIX = 'python=3,typescript=3,javascript=2,go=1,java=1'
+PHASES = ('read', 'parse', 'quality', 'security', 'performance', 'symbols', 'cross_file_impact')
+
+# Scenario -> SyntheticRepo.generate arguments
+PROFILES = {
+    'quick': {
+        'mixed': {'shape': 'mixed', 'files': 150},
+        'huge': {'shape': 'huge', 'files': 1, 'huge_lines': 10000},
+        'tiny': {'shape': 'tiny', 'files': 500},
+        'nested': {'shape': 'nested', 'files': 40, 'nesting': 12},
+    },
+    'full': {
+        'mixed': {'shape': 'mixed', 'files': 1500},
+        'huge': {'shape': 'huge', 'files': 1, 'huge_lines': 100000},
+        'tiny': {'shape': 'tiny', 'files': 3000},
+        'nested': {'shape': 'nested', 'files': 200, 'nesting': 25},
+    },
+}
+
+# Differences below these are noise, whatever the ratio
+MIN_SECONDS_DELTA = 0.5
+MIN_PHASE_SECONDS_DELTA = 0.05
+MIN_MEMORY_DELTA_MB = 1.0
+# Only scenario totals expected to take this long gate a run: single phases and small
+# scenarios take tens of milliseconds, within the jitter of a shared runner
+MIN_GATED_SECONDS = 1.0
+
+
+def calibrate() -> float:
+    """Seconds for a fixed workload of the kind the analyzers do (regex, dicts, ast)"""
+    text = 'for (const item of items) {\n    total += item * 2;\n}\n' * 300
+    source = 'def f(items):\n    for item in items:\n        if item:\n            yield item\n' * 100
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(10):
+            counts = {}
+            for word in re.findall(r'\w+', text):
+                counts[word] = counts.get(word, 0) + 1
+            sum(1 for _ in ast.walk(ast.parse(source)))
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+class _Meter:
+    """Per-phase wall time, or per-phase peak memory when tracing"""
+
+    def __init__(self, trace: bool):
+        self.trace = trace
+        self.values = {phase: 0.0 for phase in PHASES}
+
+    def run(self, phase: str, work, *args):
+        if self.trace:
+            start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            result = work(*args)
+            peak = tracemalloc.get_traced_memory()[1] - start
+            self.values[phase] = max(self.values[phase], peak / (1024 * 1024))
+        else:
+            start = time.perf_counter()
+            result = work(*args)
+            self.values[phase] += time.perf_counter() - start
+        return result
+
+
+def _read(path: str) -> str:
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        return f.read()
+
+
+def run_phases(files: List[str], trace: bool = False) -> Dict[str, float]:
+    """
+    One pass over the files, phase by phase per file as analyze_file does
+
+    Returns:
+        Phase -> seconds, or phase -> peak MB above the phase's starting memory when tracing
+    """
+    analyzer = load_script('code-analyzer')
+    docs = load_script('generate-docs')
+    analyzer.reset_taint_cache()
+    meter = _Meter(trace)
+    files_data = {}
+
+    for path in files:
+        content = meter.run('read', _read, path)
+        files_data[path] = content
+        code = meter.run('parse', lambda: analyzer.CodeAnalyzer(path, content))
+        meter.run('parse', lambda: code.stats)
+        meter.run('quality', code.calculate_quality_score)
+        meter.run('security', code.scan_security_vulnerabilities)
+        meter.run('performance', code.detect_performance_issues)
+        meter.run('symbols', docs.extract_symbols_detailed, content)
+
+    meter.run('cross_file_impact', docs.analyze_cross_file_impact, files_data)
+    return meter.values
+
+
+def run_scenario(root: Path, name: str, spec: Dict, mix: Dict[str, int], seed: int,
+                 repeat: int, memory: bool) -> Dict:
+    """Generate one scenario's repo and measure it (best of `repeat` timed passes)"""
+    args = dict(spec)
+    shape = args.pop('shape')
+    files = args.pop('files')
+    paths = SyntheticRepo(root / name, mix, seed).generate(shape, files, **args)
+    lines = sum(_read(path).count('\n') + 1 for path in paths)
+    print(f"\n📦 {name}: {len(paths)} files, {lines:,} lines ({shape})")
+
+    timings = None
+    for _ in range(repeat):
+        gc.collect()
+        values = run_phases(paths)
+        timings = values if timings is None else {p: min(timings[p], values[p]) for p in PHASES}
+
+    peaks = {}
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            peaks = run_phases(paths, trace=True)
+        finally:
+            tracemalloc.stop()
+
+    result = {'files': len(paths), 'lines': lines, 'phases': {}}
+    for phase in PHASES:
+        entry = {'seconds': round(timings[phase], 4)}
+        if memory:
+            entry['peak_mb'] = round(peaks[phase], 2)
+        result['phases'][phase] = entry
+        print(f"   {phase:<18} {timings[phase]:8.3f}s" + (f"  {peaks[phase]:8.2f} MB" if memory else ''))
+    result['total_seconds'] = round(sum(timings.values()), 4)
+    print(f"   {'total':<18} {result['total_seconds']:8.3f}s")
+    return result
+
+
+def run_benchmarks(profile: str, scenarios: Optional[List[str]] = None, mix: str = DEFAULT_MIX,
+                   seed: int = 0, repeat: int = 1, memory: bool = True, keep: Optional[str] = None) -> Dict:
+    """
+    Run a profile's scenarios
+
+    Returns:
+        Benchmark record: environment, calibration and per-scenario phase numbers
+    """
+    selected = PROFILES[profile]
+    for name in scenarios or []:
+        if name not in selected:
+            raise ValueError(f"Unknown scenario '{name}' (choose from {', '.join(selected)})")
+
+    calibration = calibrate()
+    print(f"⏱️  Calibration: {calibration:.4f}s (python {platform.python_version()})")
+    record = {
+        'recorded': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'calibration': round(calibration, 5),
+        'mix': mix,
+        'seed': seed,
+        'scenarios': {}
+    }
+
+    with tempfile.TemporaryDirectory(prefix='analyzer-bench-') as tmp:
+        root = Path(keep) if keep else Path(tmp)
+        for name, spec in selected.items():
+            if scenarios and name not in scenarios:
+                continue
+            record['scenarios'][name] = run_scenario(root, name, spec, parse_mix(mix), seed, repeat, memory)
+    return record
+
+
+def load_baseline() -> Dict:
+    if BASELINE_FILE.exists():
+        with open(BASELINE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {'profiles': {}}
+
+
+def save_baseline(profile: str, record: Dict):
+    """Store a profile's numbers, keeping other profiles' baselines"""
+    baseline = load_baseline()
+    baseline['profiles'][profile] = record
+    BASELINE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2)
+        f.write('\n')
+
+
+def _slower(seconds: float, expected: float, tolerance: float, min_delta: float) -> bool:
+    return seconds > expected * (1 + tolerance) and seconds - expected > min_delta
+
+
+def compare(record: Dict, base: Dict, tolerance: float) -> Tuple[List[str], List[str]]:
+    """
+    Regressions of a run against a baseline of the same profile
+
+    Seconds are scaled by the ratio of the two calibrations before comparing.
+    Timing only gates on the total of scenarios expected to run for at least
+    MIN_GATED_SECONDS; slower phases are reported as warnings. Peak memory
+    (deterministic under tracemalloc) gates per phase.
+
+    Returns:
+        (regressions, warnings): one message per scenario or phase beyond the tolerance
+    """
+    if record['mix'] != base['mix'] or record['seed'] != base['seed']:
+        print(f"⚠️  Baseline was recorded with mix '{base['mix']}', seed {base['seed']}: numbers may not compare")
+    scale = record['calibration'] / base['calibration']
+    regressions = []
+    warnings = []
+
+    for name, scenario in record['scenarios'].items():
+        base_scenario = base['scenarios'].get(name)
+        if not base_scenario:
+            continue
+        expected_total = base_scenario['total_seconds'] * scale
+        if expected_total >= MIN_GATED_SECONDS and _slower(scenario['total_seconds'], expected_total,
+                                                           tolerance, MIN_SECONDS_DELTA):
+            regressions.append(f"{name}: {scenario['total_seconds']:.3f}s vs {expected_total:.3f}s expected "
+                               f"(+{(scenario['total_seconds'] / expected_total - 1) * 100:.0f}%)")
+        for phase, entry in scenario['phases'].items():
+            base_entry = base_scenario['phases'].get(phase)
+            if not base_entry:
+                continue
+            expected = base_entry['seconds'] * scale
+            if _slower(entry['seconds'], expected, tolerance, MIN_PHASE_SECONDS_DELTA):
+                warnings.append(f"{name}/{phase}: {entry['seconds']:.3f}s vs {expected:.3f}s expected "
+                                f"(+{(entry['seconds'] / expected - 1) * 100:.0f}%)")
+            if 'peak_mb' in entry and 'peak_mb' in base_entry:
+                if (entry['peak_mb'] > base_entry['peak_mb'] * (1 + tolerance)
+                        and entry['peak_mb'] - base_entry['peak_mb'] > MIN_MEMORY_DELTA_MB):
+                    regressions.append(f"{name}/{phase}: peak {entry['peak_mb']:.1f} MB "
+                                       f"vs {base_entry['peak_mb']:.1f} MB")
+    return regressions, warnings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the analyzers on synthetic repositories')
+    parser.add_argument('--profile', choices=list(PROFILES), default='quick', help='Scenario sizes (default: quick)')
+    parser.add_argument('--scenario', action='append', help='Run only this scenario (repeatable)')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Language weights (default: {DEFAULT_MIX})')
+    parser.add_argument('--seed', type=int, default=0, help='Generator seed (default: 0)')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed passes per scenario, best is kept (default: 5)')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the traced memory pass')
+    parser.add_argument('--keep', metavar='DIR', help='Write the generated repos here instead of a temp dir')
+    parser.add_argument('--output', metavar='FILE', help='Also write this run as JSON')
+    parser.add_argument('--save-baseline', action='store_true', help=f'Store this run as the baseline ({BASELINE_FILE})')
+    parser.add_argument('--check', action='store_true', help='Exit non-zero on a regression against the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.3, help='Allowed slowdown/growth ratio (default: 0.3)')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"ANALYZER BENCHMARKS ({args.profile})")
+    print("=" * 80)
+
+    record = run_benchmarks(args.profile, args.scenario, args.mix, args.seed,
+                            max(1, args.repeat), not args.no_memory, args.keep)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(record, f, indent=2)
+        print(f"\n📄 Results: {args.output}")
+
+    if args.save_baseline:
+        save_baseline(args.profile, record)
+        print(f"\n✓ Baseline saved to {BASELINE_FILE} ({args.profile})")
+        return
+
+    base = load_baseline()['profiles'].get(args.profile)
+    if not base:
+        print(f"\nℹ️  No {args.profile} baseline in {BASELINE_FILE} (record one with --save-baseline)")
+        return
+
+    regressions, warnings = compare(record, base, args.tolerance)
+    print()
+    if warnings:
+        print(f"⚠️  {len(warnings)} phase(s) slower than the baseline (not gating, phase timings are noisy):")
+        for message in warnings:
+            print(f"   - {message}")
+    if regressions:
+        print(f"🐌 {len(regressions)} regression(s) against the baseline of {base['recorded']}:")
+        for message in regressions:
+            print(f"   - {message}")
+        if args.check:
+            sys.exit(1)
+    else:
+        print(f"✓ No regressions against the baseline of {base['recorded']} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == '__main__':
+    main()
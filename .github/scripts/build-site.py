@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Static Site Builder for docs-site
+
+Builds the GitHub Pages site without Jekyll:
+1. Reads _config.yml (title, baseurl, excludes, front matter defaults)
+2. Renders each markdown page to HTML through its layout in _layouts/
+   (the Liquid subset the layouts use: variables, filters, if/else)
+3. Rewrites links to .md files as jekyll-relative-links does
+4. Writes a sitemap (the search index in search/ is kept up to date by
+   pages-manager.py and published as a static dir)
+
+Builds are incremental: a page is only rendered when its content, its
+layout or the site config changed (rendered HTML is kept in the stage cache
+by content hash, and a manifest in the output dir records what each output
+was built from), and an output file is only written when it differs from
+what is on disk. Outputs of deleted pages are removed.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+from pathlib import Path
+from datetime import date, datetime
+from html import escape
+from typing import Dict, List, Optional, Tuple
+
+import yaml
+import markdown
+
+sys.path.insert(0, str(Path(__file__).parent))
+from page_index import page_url, parse_page
+from stage_cache import get_cache, hash_file, hash_text
+
+SITE_DIR = Path(os.environ.get('SITE_SOURCE', 'docs-site'))
+MANIFEST = '.build-manifest.json'
+MARKDOWN_EXTENSIONS = ['extra', 'toc', 'sane_lists']
+
+_FRONTMATTER = re.compile(r'\A---\n(.*?)\n---\n?', re.DOTALL)
+_LIQUID_IF = re.compile(r'{%-?\s*if\s+(.+?)\s*-?%}(.*?)(?:{%-?\s*else\s*-?%}(.*?))?{%-?\s*endif\s*-?%}', re.DOTALL)
+_LIQUID_OUTPUT = re.compile(r'{{-?\s*(.+?)\s*-?}}')
+_MD_LINK = re.compile(r'(href=")(?![a-z][a-z0-9+.-]*:|#)([^"#?]*?)\.md((?:#[^"]*)?")')
+_TAG = re.compile(r'<[^>]+>')
+
+
+def load_config(source: Path) -> Dict:
+    try:
+        with open(source / '_config.yml', 'r', encoding='utf-8') as f:
+            return yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        return {}
+
+
+def split_front_matter(text: str) -> Tuple[Dict, str]:
+    """(front matter, body) of a page; pages without front matter get {}"""
+    match = _FRONTMATTER.match(text)
+    if not match:
+        return {}, text
+    try:
+        data = yaml.safe_load(match.group(1)) or {}
+    except yaml.YAMLError:
+        data = {}
+    return (data if isinstance(data, dict) else {}), text[match.end():]
+
+
+def output_path(relative: str) -> str:
+    return relative[:-3] + '.html'
+
+
+def _lookup(name: str, context: Dict):
+    if len(name) >= 2 and name[0] == name[-1] and name[0] in '"\'':
+        return name[1:-1]
+    value = context
+    for part in name.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _apply_filter(value, name: str, arg, site: Dict):
+    if name == 'default':
+        return value if value not in (None, '', False) else arg
+    if name in ('relative_url', 'absolute_url'):
+        path = (site.get('baseurl') or '') + '/' + str(value or '').lstrip('/')
+        return (site.get('url') or '') + path if name == 'absolute_url' else path
+    if name == 'date':
+        if isinstance(value, str):
+            try:
+                value = datetime.fromisoformat(value)
+            except ValueError:
+                return value
+        return value.strftime(arg) if isinstance(value, (date, datetime)) else value
+    if name == 'escape':
+        return escape(str(value or ''))
+    if name == 'strip_html':
+        return _TAG.sub('', str(value or ''))
+    return value  # unknown filter: leave the value alone, as Liquid does
+
+
+def render_liquid(template: str, context: Dict) -> str:
+    """The Liquid subset our layouts use: {{ var | filter: arg }} and {% if %}...{% else %}...{% endif %}"""
+    site = context.get('site', {})
+
+    def condition(match):
+        return match.group(2) if _lookup(match.group(1), context) else (match.group(3) or '')
+
+    def output(match):
+        parts = [part.strip() for part in match.group(1).split('|')]
+        value = _lookup(parts[0], context)
+        for spec in parts[1:]:
+            name, _, arg = spec.partition(':')
+            value = _apply_filter(value, name.strip(), _lookup(arg.strip(), context) if arg else None, site)
+        return '' if value is None else str(value)
+
+    return _LIQUID_OUTPUT.sub(output, _LIQUID_IF.sub(condition, template))
+
+
+def rewrite_md_links(html: str) -> str:
+    """Point links at .md files to their rendered pages (foo.md -> foo.html, dir/index.md -> dir/)"""
+    def link(match):
+        target = match.group(2)
+        if target == 'index' or target.endswith('/index'):
+            target = target[:-5] or './'
+        else:
+            target += '.html'
+        return match.group(1) + target + match.group(3)
+    return _MD_LINK.sub(link, html)
+
+
+class SiteBuilder:
+    """Incremental renderer of a Jekyll-style source dir"""
+
+    def __init__(self, source: Path, output: Path, force: bool = False):
+        self.source = Path(source)
+        self.output = Path(output)
+        self.force = force
+        self.config = load_config(self.source)
+        self.site = {key: value for key, value in self.config.items() if isinstance(value, (str, int, float, bool))}
+        self.cache = get_cache()
+        self.stats = {'rendered': 0, 'cached': 0, 'unchanged': 0, 'written': 0, 'removed': 0, 'copied': 0}
+        self._converter = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+        self._layout_hashes: Dict[str, str] = {}
+        self._config_hash = hash_file(self.source / '_config.yml')
+
+    def _excluded(self, relative: Path) -> bool:
+        excludes = set(self.config.get('exclude') or [])
+        return any(part.startswith(('_', '.')) or part in excludes for part in relative.parts) \
+            or relative.as_posix() in excludes
+
+    def _source_files(self) -> List[Path]:
+        output = self.output.resolve()
+        files = []
+        for path in sorted(self.source.rglob('*')):
+            if not path.is_file() or output in path.resolve().parents:
+                continue
+            if not self._excluded(path.relative_to(self.source)):
+                files.append(path)
+        return files
+
+    def _defaults(self, relative: str) -> Dict:
+        """Front matter defaults from _config.yml whose scope covers the page"""
+        values = {}
+        for default in self.config.get('defaults') or []:
+            scope = (default.get('scope') or {}).get('path', '')
+            if not scope or relative == scope or relative.startswith(scope.rstrip('/') + '/'):
+                values.update(default.get('values') or {})
+        return values
+
+    def _layout(self, name: Optional[str]) -> Tuple[Optional[Path], str]:
+        """Layout file of a page (layouts missing from _layouts/ fall back to default) and its hash"""
+        layouts = self.source / '_layouts'
+        path = layouts / f'{name}.html'
+        if not name or not path.exists():
+            path = layouts / 'default.html'
+        if not path.exists():
+            return None, 'none'
+        key = str(path)
+        if key not in self._layout_hashes:
+            self._layout_hashes[key] = hash_file(path)
+        return path, self._layout_hashes[key]
+
+    def _render(self, relative: str, text: str, layout: Optional[Path]) -> Dict:
+        front, body = split_front_matter(text)
+        page = dict(self._defaults(relative))
+        page.update(front)
+        entry = parse_page(relative, text)
+        page.setdefault('title', entry.title)
+        page['url'] = page_url(relative)
+
+        self._converter.reset()
+        content = rewrite_md_links(self._converter.convert(body))
+        html = content
+        if layout is not None:
+            with open(layout, 'r', encoding='utf-8') as f:
+                html = render_liquid(f.read(), {'page': page, 'site': self.site, 'content': content})
+
+        return {'html': html, 'url': page['url']}
+
+    def _write(self, relative: str, data: bytes) -> bool:
+        """Write an output file unless it already has exactly this content"""
+        path = self.output / relative
+        try:
+            if path.stat().st_size == len(data) and path.read_bytes() == data:
+                return False
+        except OSError:
+            pass
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        self.stats['written'] += 1
+        return True
+
+    def _load_manifest(self) -> Dict:
+        if self.force:
+            return {}
+        try:
+            with open(self.output / MANIFEST, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def build(self) -> Dict:
+        """
+        Build the site into the output dir
+
+        Returns:
+            Counts of pages rendered, taken from cache, written, unchanged, removed and files copied
+        """
+        manifest = self._load_manifest()
+        outputs = manifest.get('outputs', {})
+        urls = manifest.get('urls', {})
+        built_outputs: Dict[str, str] = {}
+        built_urls: Dict[str, str] = {}
+
+        for path in self._source_files():
+            relative = path.relative_to(self.source).as_posix()
+
+            if path.suffix != '.md':
+                # Static file: copied as is
+                digest = hash_file(path)
+                built_outputs[relative] = digest
+                target = self.output / relative
+                if outputs.get(relative) != digest or not target.exists():
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copyfile(path, target)
+                    self.stats['copied'] += 1
+                continue
+
+            text = path.read_text(encoding='utf-8')
+            front, _ = split_front_matter(text)
+            layout_name = front.get('layout') or self._defaults(relative).get('layout')
+            layout, layout_hash = self._layout(layout_name)
+            key = self.cache.key('site-page', {
+                'page': hash_text(text),
+                'path': relative,
+                'layout': layout_hash,
+                'config': self._config_hash
+            }, config={'markdown': markdown.__version__, 'extensions': MARKDOWN_EXTENSIONS}, script=__file__)
+
+            out = output_path(relative)
+            built_outputs[out] = key
+            if outputs.get(out) == key and relative in urls and (self.output / out).exists():
+                built_urls[relative] = urls[relative]
+                self.stats['unchanged'] += 1
+                continue
+
+            result = self.cache.get('site-page', key)
+            if result is None:
+                result = self._render(relative, text, layout)
+                self.cache.put('site-page', key, result)
+                self.stats['rendered'] += 1
+            else:
+                self.stats['cached'] += 1
+            built_urls[relative] = result['url']
+            self._write(out, result['html'].encode('utf-8'))
+
+        # Outputs whose source is gone
+        for out in outputs:
+            if out not in built_outputs:
+                try:
+                    (self.output / out).unlink()
+                    self.stats['removed'] += 1
+                except OSError:
+                    pass
+
+        self._write('sitemap.xml', self._sitemap([built_urls[relative] for relative in sorted(built_urls)]).encode('utf-8'))
+
+        self.output.mkdir(parents=True, exist_ok=True)
+        with open(self.output / MANIFEST, 'w', encoding='utf-8') as f:
+            json.dump({'outputs': built_outputs, 'urls': built_urls}, f, indent=1, sort_keys=True)
+        return self.stats
+
+    def _sitemap(self, page_urls: List[str]) -> str:
+        base = (self.site.get('url') or '') + (self.site.get('baseurl') or '')
+        urls = ''.join(f"  <url><loc>{escape(base + url)}</loc></url>\n" for url in page_urls)
+        return ('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n' + urls + '</urlset>\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the documentation site without Jekyll')
+    parser.add_argument('--source', default=str(SITE_DIR), help=f'Site source dir (default: {SITE_DIR})')
+    parser.add_argument('--output', help='Output dir (default: <source>/_site)')
+    parser.add_argument('--force', action='store_true', help='Ignore the output manifest and check every page')
+    args = parser.parse_args()
+
+    source = Path(args.source)
+    output = Path(args.output) if args.output else source / '_site'
+
+    print("=" * 80)
+    print("STATIC SITE BUILD")
+    print("=" * 80)
+
+    start = time.perf_counter()
+    stats = SiteBuilder(source, output, args.force).build()
+    elapsed = time.perf_counter() - start
+    pruned = get_cache().prune()
+
+    print(f"✓ {stats['rendered']} pages rendered, {stats['cached']} from cache, {stats['unchanged']} unchanged")
+    print(f"✓ {stats['written']} files written, {stats['copied']} copied, {stats['removed']} removed")
+    print(f"✓ Site built in {output} ({elapsed:.2f}s)")
+    if pruned:
+        print(f"🧹 Removed {pruned} stale stage cache entries")
+
+
+if __name__ == '__main__':
+    main()
@@ -6,58 +6,36 @@ Includes: Quality scoring, Security scanning, Performance regression detection
 
 import os
 import re
+import math
 import sys
+import ast
 import json
+import shutil
+import sqlite3
+import tempfile
+import subprocess
+import argparse
+import threading
+import multiprocessing
+from bisect import bisect_right
+from functools import partial
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
-
-# Language-specific patterns
-LANGUAGE_PATTERNS = {
-    'python': {
-        'function': r'def\s+(\w+)\s*\(',
-        'class': r'class\s+(\w+)',
-        'complexity_keywords': ['if', 'elif', 'else', 'for', 'while', 'try', 'except', 'with'],
-    },
-    'javascript': {
-        'function': r'(?:function\s+(\w+)|(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s*)?\()',
-        'class': r'class\s+(\w+)',
-        'complexity_keywords': ['if', 'else', 'for', 'while', 'switch', 'catch', 'case'],
-    },
-    'typescript': {
-        'function': r'(?:function\s+(\w+)|(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s*)?\()',
-        'class': r'class\s+(\w+)',
-        'complexity_keywords': ['if', 'else', 'for', 'while', 'switch', 'catch', 'case'],
-    },
-    'go': {
-        'function': r'func\s+(\w+)\s*\(',
-        'struct': r'type\s+(\w+)\s+struct',
-        'complexity_keywords': ['if', 'else', 'for', 'switch', 'case', 'select'],
-    },
-    'rust': {
-        'function': r'fn\s+(\w+)\s*\(',
-        'struct': r'struct\s+(\w+)',
-        'complexity_keywords': ['if', 'else', 'for', 'while', 'match', 'loop'],
-    },
-    'java': {
-        'function': r'(?:public|private|protected)?\s*(?:static\s+)?(?:\w+\s+)?(\w+)\s*\(',
-        'class': r'(?:public\s+)?class\s+(\w+)',
-        'complexity_keywords': ['if', 'else', 'for', 'while', 'switch', 'catch', 'case'],
-    },
-    'cpp': {
-        'function': r'(?:\w+\s+)?(\w+)\s*\([^)]*\)\s*{',
-        'class': r'class\s+(\w+)',
-        'complexity_keywords': ['if', 'else', 'for', 'while', 'switch', 'catch', 'case'],
-    }
-}
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Set, Tuple, Optional
 
-# Security vulnerability patterns
+sys.path.insert(0, str(Path(__file__).parent))
+from stage_cache import hash_text, script_version
+from result_store import blob_hash, get_store
+from analysis_history import AnalysisHistory
+from analysis_output import JsonLinesWriter, SarifWriter
+import analysis_worker
+from language_registry import PLUGINS_DIR, code_extensions, get_language, language_for_path
+
+# Security vulnerability patterns (hardcoded secrets have their own scanner, see scan_secrets)
 SECURITY_PATTERNS = {
-    'hardcoded_secret': [
-        (r'password\s*=\s*["\'](?!{{)[^"\']{8,}["\']', 'Hardcoded password detected'),
-        (r'api[_-]?key\s*=\s*["\'][^"\']{20,}["\']', 'Hardcoded API key detected'),
-        (r'secret\s*=\s*["\'][^"\']{16,}["\']', 'Hardcoded secret detected'),
-        (r'token\s*=\s*["\'][^"\']{20,}["\']', 'Hardcoded token detected'),
-    ],
     'sql_injection': [
         (r'execute\s*\(\s*["\'].*\+.*["\']', 'Possible SQL injection (string concatenation)'),
         (r'query\s*\(\s*f["\'].*{.*}.*["\']', 'Possible SQL injection (f-string formatting)'),
@@ -83,37 +61,1810 @@ SECURITY_PATTERNS = {
 PERFORMANCE_PATTERNS = {
     'nested_loops': r'for\s+.*:\s*\n\s*for\s+',
     'n_squared': r'for\s+\w+\s+in\s+(\w+):.*for\s+\w+\s+in\s+\1',
-    'repeated_computation': r'for\s+.*:\s*\n.*\.(\w+)\(',
 }
+_PERFORMANCE_REGEXES = {name: re.compile(pattern, re.MULTILINE) for name, pattern in PERFORMANCE_PATTERNS.items()}
+
+# Weights used for the severity delta of diff-aware regression detection
+SEVERITY_WEIGHTS = {'LOW': 1, 'MEDIUM': 2, 'HIGH': 3}
+
+# A function that grew by at least this many lines (and 25%) is a regression
+FUNCTION_GROWTH_MIN_LINES = 20
+
+
+def _compile_security_scanner():
+    """
+    Compile every SECURITY_PATTERNS rule into one case-insensitive pass.
+    
+    Rules are named groups of a zero-width lookahead alternation, so a match
+    never consumes text and overlapping findings of different rules are all
+    still reported. A leading character-class guard lets the engine skip
+    positions where no rule can start.
+    
+    Returns:
+        (scanner, rules, group index -> rule index, first char -> rule indexes)
+    """
+    flags = re.IGNORECASE | re.MULTILINE
+    rules = []
+    for category, patterns in SECURITY_PATTERNS.items():
+        for pattern, description in patterns:
+            rules.append((category, re.compile(pattern, flags), description))
+    
+    alternation = '|'.join(f'(?P<rule{i}>{rule[1].pattern})' for i, rule in enumerate(rules))
+    first_chars = {rule[1].pattern[0].lower() for rule in rules}
+    guard = f"(?=[{''.join(sorted(first_chars))}])" if all(c.isalnum() for c in first_chars) else ''
+    scanner = re.compile(f'{guard}(?=(?:{alternation}))', flags)
+    
+    group_to_rule = {scanner.groupindex[f'rule{i}']: i for i in range(len(rules))}
+    rules_by_char = {}
+    for i, rule in enumerate(rules):
+        first = rule[1].pattern[0].lower()
+        rules_by_char.setdefault(first if first.isalnum() else None, []).append(i)
+    
+    return scanner, rules, group_to_rule, rules_by_char
+
+
+_SECURITY_SCANNER, _SECURITY_RULES, _SECURITY_GROUP_TO_RULE, _SECURITY_RULES_BY_CHAR = _compile_security_scanner()
+
+
+# Provider key formats: (rule, description, literal prefix, pattern). The
+# prefixes are found in one pass; a full pattern is only tried where its
+# prefix occurs.
+SECRET_FORMATS = [
+    ('aws_access_key', 'AWS access key ID', 'AKIA', r'AKIA[0-9A-Z]{16}\b'),
+    ('aws_access_key', 'AWS access key ID', 'ASIA', r'ASIA[0-9A-Z]{16}\b'),
+    ('github_token', 'GitHub token', 'ghp_', r'ghp_[A-Za-z0-9]{36}\b'),
+    ('github_token', 'GitHub token', 'gho_', r'gho_[A-Za-z0-9]{36}\b'),
+    ('github_token', 'GitHub token', 'ghs_', r'ghs_[A-Za-z0-9]{36}\b'),
+    ('github_token', 'GitHub token', 'github_pat_', r'github_pat_[A-Za-z0-9_]{60,}'),
+    ('slack_token', 'Slack token', 'xox', r'xox[abposr]-[A-Za-z0-9-]{10,}'),
+    ('slack_webhook', 'Slack webhook URL', 'hooks.slack.com/', r'hooks\.slack\.com/services/T\w+/B\w+/\w+'),
+    ('discord_webhook', 'Discord webhook URL', 'discord.com/api/webhooks/', r'discord\.com/api/webhooks/\d+/[\w-]{30,}'),
+    ('stripe_key', 'Stripe live key', 'sk_live_', r'sk_live_[0-9A-Za-z]{20,}'),
+    ('stripe_key', 'Stripe live key', 'rk_live_', r'rk_live_[0-9A-Za-z]{20,}'),
+    ('google_api_key', 'Google API key', 'AIza', r'AIza[0-9A-Za-z_-]{35}'),
+    ('groq_api_key', 'Groq API key', 'gsk_', r'gsk_[A-Za-z0-9]{48,}'),
+    ('openai_api_key', 'OpenAI API key', 'sk-', r'sk-(?:proj-)?[A-Za-z0-9_-]{32,}'),
+    ('npm_token', 'npm token', 'npm_', r'npm_[A-Za-z0-9]{36}\b'),
+    ('sendgrid_key', 'SendGrid API key', 'SG.', r'SG\.[\w-]{22}\.[\w-]{43}'),
+    ('private_key', 'Private key', '-----BEGIN', r'-----BEGIN (?:RSA |EC |DSA |OPENSSH |PGP |ENCRYPTED )?PRIVATE KEY(?: BLOCK)?-----'),
+    ('jwt', 'JSON web token', 'eyJ', r'eyJ[\w-]{10,}\.eyJ[\w-]{10,}\.[\w-]{10,}'),
+    ('url_credentials', 'Password in URL', '://', r'://[^\s/:@"\'`]+:([^\s/@"\'`]{4,})@'),
+]
+
+# Names whose assigned string literal is a credential (lowercase; matched case-insensitively)
+SECRET_NAMES = ['password', 'passwd', 'secret', 'apikey', 'api_key', 'api-key', 'accesskey', 'access_key',
+                'privatekey', 'private_key', 'token']
+
+# Shannon entropy thresholds in bits per character
+SECRET_ENTROPY = {
+    'password': 2.5,   # literal assigned to a password name (human-chosen, so low entropy)
+    'named': 3.5,      # literal assigned to any other secret name
+    'literal': 4.5,    # any other string literal (base64-like, mixed case and digits)
+}
+SECRET_MIN_LENGTH = {'named': 8, 'literal': 20}
+
+SECRETS_ALLOWLIST = Path(os.environ.get('SECRETS_ALLOWLIST', '.github/secrets-allowlist.json'))
+
+# Values that are documentation or templating, not credentials
+_SECRET_PLACEHOLDER = re.compile(
+    r'your|example|sample|dummy|placeholder|changeme|change_me|redacted|secret_here|x{4,}|\*{3,}|\.\.\.'
+    r'|abcdefgh|0123456789|<[^>]*>|\$\{|\{\{|%\(|%s|^\$\w+$|^test|^fake|^none$|^null$|^pass(?:word)?$',
+    re.IGNORECASE
+)
+_SECRET_ASSIGNMENT = re.compile(
+    r'(?:[_-]?(?:id|key|value|str))?\b["\'\]]?\s*(?::=|=>|[:=])\s*[rbu]?(?:"([^"\s\\]{%d,200})"|\'([^\'\s\\]{%d,200})\')'
+    % (SECRET_MIN_LENGTH['named'], SECRET_MIN_LENGTH['named']),
+    re.IGNORECASE
+)
+_SECRET_LITERAL = re.compile(r'["\'`]([A-Za-z0-9+/_=-]{%d,200})["\'`]' % SECRET_MIN_LENGTH['literal'])
+_HAS_UPPER, _HAS_LOWER, _HAS_DIGIT = re.compile('[A-Z]'), re.compile('[a-z]'), re.compile('[0-9]')
+# Long lowercase runs mean words (identifiers, prose), which random keys almost never contain
+_WORD_RUN = re.compile('[a-z]{8,}')
+
+
+def _compile_secret_formats() -> Dict[str, List[Tuple[str, str, 're.Pattern']]]:
+    """Provider formats grouped by their literal prefix"""
+    formats = {}
+    for rule, description, prefix, pattern in SECRET_FORMATS:
+        formats.setdefault(prefix, []).append((rule, description, re.compile(pattern)))
+    return formats
+
+
+_SECRET_FORMATS_BY_PREFIX = _compile_secret_formats()
+_SECRET_QUOTE = re.compile(r'["\'`](?=[A-Za-z0-9+/_=-]{%d})' % SECRET_MIN_LENGTH['literal'])
+_ASCII_LOWER = str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')
+
+
+def _find_all(text: str, literal: str) -> Iterator[int]:
+    pos = text.find(literal)
+    while pos != -1:
+        yield pos
+        pos = text.find(literal, pos + 1)
+
+
+def shannon_entropy(value: str) -> float:
+    """Shannon entropy of a string in bits per character"""
+    if not value:
+        return 0.0
+    length = len(value)
+    return -sum(count / length * math.log2(count / length) for count in Counter(value).values())
+
+
+def _secret_name_label(name: str) -> str:
+    compact = re.sub(r'[_-]', '', name)
+    if compact.startswith('pass'):
+        return 'password'
+    return {'apikey': 'API key', 'accesskey': 'access key', 'privatekey': 'private key'}.get(compact, compact)
+
+
+def _secret_value_ok(value: str, threshold: float) -> bool:
+    """A candidate counts when it is not a placeholder and carries enough entropy"""
+    return not _SECRET_PLACEHOLDER.search(value) and len(set(value)) > 2 and shannon_entropy(value) >= threshold
+
+
+def scan_secrets(content: str) -> List[Tuple[int, int, str, str, str]]:
+    """
+    Secrets in a file: provider key formats, literals assigned to secret
+    names, and high-entropy string literals. Linear in the file size: the
+    prefilter is plain substring search for the literal prefixes and names
+    (much faster than a regex alternation), then a bounded anchored match
+    runs only at each hit.
+    
+    Where candidates overlap, a provider format beats a named assignment,
+    which beats a bare high-entropy literal.
+    
+    Returns:
+        [(start, end, rule, description, secret)] sorted by position
+    """
+    candidates = []
+    for prefix, formats in _SECRET_FORMATS_BY_PREFIX.items():
+        for pos in _find_all(content, prefix):
+            for rule, description, pattern in formats:
+                match = pattern.match(content, pos)
+                if not match:
+                    continue
+                group = 1 if match.groups() else 0
+                if not _SECRET_PLACEHOLDER.search(match.group(group)):
+                    candidates.append((0, match.start(group), match.end(group), rule, description, match.group(group)))
+                break
+    
+    # ASCII-only lowering keeps offsets aligned with the original content
+    lowered = content.translate(_ASCII_LOWER)
+    for name in SECRET_NAMES:
+        for pos in _find_all(lowered, name):
+            match = _SECRET_ASSIGNMENT.match(content, pos + len(name))
+            if not match:
+                continue
+            group = 1 if match.group(1) is not None else 2
+            threshold = SECRET_ENTROPY['password' if name.startswith('pass') else 'named']
+            if _secret_value_ok(match.group(group), threshold):
+                candidates.append((1, match.start(group), match.end(group), 'assignment',
+                                   f'Hardcoded {_secret_name_label(name)}', match.group(group)))
+    
+    for quote in _SECRET_QUOTE.finditer(content):
+        match = _SECRET_LITERAL.match(content, quote.start())
+        if not match:
+            continue
+        value = match.group(1)
+        if _HAS_UPPER.search(value) and _HAS_LOWER.search(value) and _HAS_DIGIT.search(value) \
+                and not _WORD_RUN.search(value) and _secret_value_ok(value, SECRET_ENTROPY['literal']):
+            entropy = shannon_entropy(value)
+            candidates.append((2, match.start(1), match.end(1), 'entropy',
+                               f'High-entropy string literal ({entropy:.1f} bits/char)', value))
+    
+    # Strongest candidates claim their spans first. Claimed spans never overlap,
+    # so kept in start order only the neighbours of a new span can collide
+    taken_starts, taken_ends = [], []
+    secrets = []
+    for _, start, end, rule, description, value in sorted(candidates):
+        index = bisect_right(taken_starts, start)
+        if index and taken_ends[index - 1] > start:
+            continue
+        if index < len(taken_starts) and taken_starts[index] < end:
+            continue
+        taken_starts.insert(index, start)
+        taken_ends.insert(index, end)
+        secrets.append((start, end, rule, description, value))
+    
+    return sorted(secrets)
+
+
+def _redact(value: str) -> str:
+    return value[:4] + '…' if len(value) > 8 else '…'
+
+
+def secret_fingerprint(file_path: str, vuln: Dict) -> str:
+    """Identity of an accepted secret: file, rule and secret hash (not the line, so edits around it keep it)"""
+    return hash_text(f"{Path(file_path).as_posix()}:{vuln['rule']}:{vuln['secret_hash']}")[:16]
+
+
+def load_secret_allowlist(path: Path = SECRETS_ALLOWLIST) -> Dict[str, Dict]:
+    """Accepted secret fingerprints -> {'reason', 'added'}"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def allow_secrets(fingerprints: List[str], reason: str, path: Path = SECRETS_ALLOWLIST) -> int:
+    """
+    Add fingerprints to the allowlist
+    
+    Returns:
+        Number of fingerprints that were not allowlisted yet
+    """
+    allowlist = load_secret_allowlist(path)
+    added = 0
+    for fingerprint in fingerprints:
+        if fingerprint not in allowlist:
+            added += 1
+        allowlist[fingerprint] = {'reason': reason, 'added': datetime.now().strftime('%Y-%m-%d')}
+    
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(allowlist, f, indent=2, sort_keys=True)
+        f.write('\n')
+    return added
+
+
+def apply_secret_allowlist(result: Dict, allowlist: Dict[str, Dict]) -> Dict:
+    """
+    Fingerprint the result's secret findings and drop the allowlisted ones.
+    Applied after the result store, since fingerprints depend on the path and
+    the allowlist changes independently of the content.
+    """
+    kept = []
+    suppressed = 0
+    for vuln in result['security_vulnerabilities']:
+        if 'secret_hash' in vuln:
+            vuln['fingerprint'] = secret_fingerprint(result['file'], vuln)
+            if vuln['fingerprint'] in allowlist:
+                suppressed += 1
+                continue
+        kept.append(vuln)
+    
+    result['security_vulnerabilities'] = kept
+    if suppressed:
+        result['allowlisted_secrets'] = suppressed
+    return result
+
+
+# Names the brace-language function patterns can capture that are really control flow
+CONTROL_FLOW_NAMES = {'if', 'for', 'while', 'switch', 'catch', 'return', 'else', 'sizeof', 'synchronized', 'new'}
+
+
+_NON_SPACE = re.compile(r'\S')
+_NOT_NEWLINE = re.compile(r'[^\n]')
+
+
+class FunctionInfo(NamedTuple):
+    name: str
+    line: int
+    length: int
+    complexity: Optional[int] = None    # cyclomatic complexity (AST backend only)
+    documented: Optional[bool] = None   # has a docstring (AST backend only)
+
+
+@dataclass
+class SourceStats:
+    """Everything the quality metrics need, produced by one lexical pass"""
+    total_lines: int = 0
+    blank_lines: int = 0
+    comment_lines: int = 0
+    code_lines: int = 0
+    keyword_counts: Dict[str, int] = field(default_factory=dict)
+    max_nesting: int = 0
+    line_lengths: List[int] = field(default_factory=list)
+    functions: List[FunctionInfo] = field(default_factory=list)
+    documented_definitions: Optional[Tuple[int, int]] = None  # (with docstring, total) - AST backend only
+    docstring_lines: Set[int] = field(default_factory=set)
+    
+    @property
+    def decision_points(self) -> int:
+        return sum(self.keyword_counts.values())
+    
+    def long_lines(self, limit: int = 120) -> int:
+        return sum(1 for length in self.line_lengths if length > limit)
+
+
+def scan_source(content: str, language: str) -> SourceStats:
+    """
+    Single comment- and string-aware pass over a file.
+    
+    Produces line classification, keyword counts, nesting depth, line lengths
+    and function spans; keywords inside strings/comments are not counted.
+    """
+    plugin = get_language(language)
+    lexer = plugin.lexer
+    is_python = plugin.indent_blocks
+    
+    stats = SourceStats()
+    keyword_counts = Counter()
+    masked = []            # content with comments/strings blanked, for function matching
+    line_starts = [0]
+    line_indent = []       # indent of lines that start outside brackets (None otherwise)
+    line_depth_end = []    # brace depth at end of line
+    line_depth_max = []    # deepest brace depth reached on the line
+    line_has_code = []
+    
+    bracket_depth = 0      # (), [], {}
+    brace_depth = 0        # {} only
+    indent_stack = []      # python block indents
+    
+    line_start = 0
+    line_bracket_start = 0
+    has_code = has_comment = False
+    indent = None
+    last_char = ''
+    depth_max = 0
+    
+    def end_line(end: int):
+        nonlocal line_start, line_bracket_start, has_code, has_comment, indent, last_char, depth_max
+        stats.line_lengths.append(end - line_start)
+        if has_code:
+            stats.code_lines += 1
+        elif has_comment:
+            stats.comment_lines += 1
+        else:
+            stats.blank_lines += 1
+        
+        if is_python and indent is not None:
+            while indent_stack and indent_stack[-1] >= indent:
+                indent_stack.pop()
+            if last_char == ':' and bracket_depth == 0:
+                indent_stack.append(indent)
+                stats.max_nesting = max(stats.max_nesting, len(indent_stack))
+        
+        line_indent.append(indent)
+        line_depth_end.append(brace_depth)
+        line_depth_max.append(depth_max)
+        line_has_code.append(has_code)
+        
+        line_start = end + 1
+        line_starts.append(line_start)
+        line_bracket_start = bracket_depth
+        has_code = has_comment = False
+        indent = None
+        last_char = ''
+        depth_max = brace_depth
+    
+    def mark_code(pos: int, char: str):
+        nonlocal has_code, indent, last_char
+        if not has_code:
+            has_code = True
+            if line_bracket_start == 0:
+                indent = pos - line_start
+        last_char = char
+    
+    def span_lines(start: int, text: str, kind: str):
+        """Close every line a multi-line comment/string spans"""
+        nonlocal has_comment, has_code
+        offset = text.find('\n')
+        while offset != -1:
+            end_line(start + offset)
+            if kind == 'comment':
+                has_comment = True
+            else:
+                has_code = True  # string continuation: code, but no indentation
+            offset = text.find('\n', offset + 1)
+    
+    pos = 0
+    for match in lexer.finditer(content):
+        start = match.start()
+        if start > pos:
+            gap = _NON_SPACE.search(content, pos, start)
+            if gap:
+                mark_code(gap.start(), content[pos:start].rstrip()[-1])
+            masked.append(content[pos:start])
+        
+        kind = match.lastgroup
+        text = match.group()
+        if kind == 'nl':
+            end_line(start)
+            masked.append(text)
+        elif kind == 'comment':
+            has_comment = True
+            span_lines(start, text, kind)
+            masked.append(_NOT_NEWLINE.sub(' ', text))
+        elif kind == 'string':
+            mark_code(start, text[-1])
+            span_lines(start, text, kind)
+            masked.append(_NOT_NEWLINE.sub(' ', text))
+        else:
+            mark_code(start, text[-1])
+            if kind == 'open':
+                bracket_depth += 1
+                if text == '{':
+                    brace_depth += 1
+                    depth_max = max(depth_max, brace_depth)
+            elif kind == 'close':
+                bracket_depth = max(0, bracket_depth - 1)
+                if text == '}':
+                    brace_depth = max(0, brace_depth - 1)
+            else:
+                keyword_counts[text] += 1
+            masked.append(text)
+        pos = match.end()
+    
+    if pos < len(content):
+        gap = _NON_SPACE.search(content, pos)
+        if gap:
+            mark_code(gap.start(), content[pos:].rstrip()[-1])
+        masked.append(content[pos:])
+    end_line(len(content))
+    line_starts.pop()
+    
+    stats.total_lines = len(stats.line_lengths)
+    stats.keyword_counts = dict(keyword_counts)
+    if not is_python:
+        stats.max_nesting = max(line_depth_max, default=0)
+    
+    # Function spans: match declarations on code only, then walk the per-line
+    # indentation (python) or brace depth (others) to find where each ends
+    pattern = plugin.function_pattern
+    if pattern:
+        masked_content = ''.join(masked)
+        n_lines = stats.total_lines
+        for match in pattern.finditer(masked_content):
+            group = next((i for i, g in enumerate(match.groups(), 1) if g), None)
+            if group is None or match.group(group) in CONTROL_FLOW_NAMES:
+                continue
+            name = match.group(group)
+            first = bisect_right(line_starts, match.start(group)) - 1
+            last = first
+            
+            if is_python:
+                def_indent = line_indent[first]
+                for i in range(first + 1, n_lines):
+                    if line_indent[i] is not None and def_indent is not None and line_indent[i] <= def_indent:
+                        break
+                    if line_has_code[i]:
+                        last = i
+            else:
+                depth_before = line_depth_end[first - 1] if first > 0 else 0
+                opened = False
+                for i in range(first, n_lines):
+                    last = i
+                    if line_depth_max[i] > depth_before:
+                        opened = True
+                    if opened and line_depth_end[i] <= depth_before:
+                        break
+                    if not opened and ';' in masked_content[line_starts[i]:line_starts[i] + stats.line_lengths[i]]:
+                        break
+            
+            stats.functions.append(FunctionInfo(name, first + 1, last - first + 1))
+    
+    return stats
+
+
+# Python AST backend: exact spans, real nesting, cyclomatic complexity and
+# docstrings from one walk over a tree that is parsed once per file
+
+_DEFINITION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+_BLOCK_NODES = _DEFINITION_NODES + (ast.If, ast.For, ast.AsyncFor, ast.While, ast.With, ast.AsyncWith,
+                                    ast.Try, ast.ExceptHandler) + tuple(
+    getattr(ast, name) for name in ('TryStar', 'Match', 'match_case') if hasattr(ast, name))
+_BLOCK_KEYWORDS = {
+    ast.If: 'if', ast.For: 'for', ast.AsyncFor: 'for', ast.While: 'while',
+    ast.With: 'with', ast.AsyncWith: 'with', ast.Try: 'try', ast.ExceptHandler: 'except',
+}
+if hasattr(ast, 'TryStar'):
+    _BLOCK_KEYWORDS[ast.TryStar] = 'try'
+_BRANCH_NODES = (ast.If, ast.IfExp, ast.For, ast.AsyncFor, ast.While, ast.ExceptHandler, ast.Assert) + tuple(
+    getattr(ast, name) for name in ('match_case',) if hasattr(ast, name))
+# Nodes the walk has to inspect; everything else is only descended into
+_MEASURED_NODES = frozenset(_BLOCK_NODES + _BRANCH_NODES + (ast.BoolOp, ast.comprehension, ast.Constant))
+# Nodes with nothing measurable below them (names, contexts, operators)
+_LEAF_NODES = frozenset([ast.Name, ast.alias] + [
+    node_type for base in (ast.expr_context, ast.operator, ast.unaryop, ast.cmpop, ast.boolop)
+    for node_type in base.__subclasses__()
+])
+
+
+def parse_python(content: str) -> Optional[ast.Module]:
+    """Parse Python source, or None when it does not compile (callers fall back to lexical stats)"""
+    try:
+        return ast.parse(content)
+    except (SyntaxError, ValueError):
+        return None
+
+
+def _docstring_node(node) -> Optional[ast.Expr]:
+    body = getattr(node, 'body', None)
+    if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant) \
+            and isinstance(body[0].value.value, str):
+        return body[0]
+    return None
+
+
+def _branches(node) -> int:
+    """Decision points a single node adds to its function's cyclomatic complexity"""
+    if isinstance(node, _BRANCH_NODES):
+        return 1
+    if isinstance(node, ast.BoolOp):
+        return len(node.values) - 1
+    if isinstance(node, ast.comprehension):
+        return 1 + len(node.ifs)
+    return 0
+
+
+def python_source_stats(content: str, tree: ast.Module) -> SourceStats:
+    """
+    Source stats of a Python file from its syntax tree (replaces the lexical pass).
+    
+    Nesting counts block statements (elif/except stay at their header's
+    level), function spans come from node positions, keywords are counted
+    from the nodes that carry them, and docstring lines count as
+    documentation instead of code.
+    """
+    stats = SourceStats()
+    keyword_counts = Counter()
+    functions = []
+    docstring_lines = set()
+    string_lines = set()   # continuation lines of multi-line strings
+    documented = definitions = 0
+    max_nesting = 0
+    
+    def record_docstring(node) -> bool:
+        doc = _docstring_node(node)
+        if doc is None:
+            return False
+        # A one-line definition with its docstring keeps its line as code
+        owner_line = getattr(node, 'lineno', None)
+        docstring_lines.update(line for line in range(doc.lineno, doc.end_lineno + 1) if line != owner_line)
+        return True
+    
+    record_docstring(tree)
+    
+    # Iterative walk: (node, nesting depth, complexity counter of the enclosing function)
+    stack = [(tree, 0, None)]
+    while stack:
+        node, depth, counter = stack.pop()
+        for child in ast.iter_child_nodes(node):
+            child_type = type(child)
+            if child_type in _LEAF_NODES:
+                continue
+            if child_type not in _MEASURED_NODES:
+                stack.append((child, depth, counter))
+                continue
+            if child_type is ast.Constant:
+                if isinstance(child.value, (str, bytes)) and child.end_lineno > child.lineno:
+                    string_lines.update(range(child.lineno + 1, child.end_lineno + 1))
+                continue
+            
+            child_depth = depth
+            child_counter = counter
+            if isinstance(child, _BLOCK_NODES):
+                is_elif = isinstance(node, ast.If) and isinstance(child, ast.If) and node.orelse == [child]
+                if not (is_elif or isinstance(child, ast.ExceptHandler)):
+                    child_depth = depth + 1
+                max_nesting = max(max_nesting, child_depth)
+                
+                keyword = _BLOCK_KEYWORDS.get(type(child))
+                if keyword:
+                    keyword_counts['elif' if is_elif else keyword] += 1
+                if getattr(child, 'orelse', None) and not (
+                        isinstance(child, ast.If) and len(child.orelse) == 1 and isinstance(child.orelse[0], ast.If)):
+                    keyword_counts['else'] += 1
+            elif isinstance(child, ast.IfExp):
+                keyword_counts['if'] += 1
+                keyword_counts['else'] += 1
+            elif isinstance(child, ast.comprehension):
+                keyword_counts['for'] += 1
+                keyword_counts['if'] += len(child.ifs)
+            
+            if isinstance(child, _DEFINITION_NODES):
+                definitions += 1
+                has_doc = record_docstring(child)
+                documented += has_doc
+                if isinstance(child, ast.ClassDef):
+                    child_counter = None
+                else:
+                    child_counter = [1]
+                    functions.append((child, child_counter, has_doc))
+            elif counter is not None:
+                counter[0] += _branches(child)
+            
+            stack.append((child, child_depth, child_counter))
+    
+    # Line classification: only comment-looking lines outside strings need a look
+    for number, line in enumerate(content.split('\n'), 1):
+        stats.line_lengths.append(len(line))
+        if number in docstring_lines:
+            stats.comment_lines += 1
+        elif number in string_lines:
+            stats.code_lines += 1
+        else:
+            stripped = line.lstrip()
+            if not stripped:
+                stats.blank_lines += 1
+            elif stripped[0] == '#':
+                stats.comment_lines += 1
+            else:
+                stats.code_lines += 1
+    
+    functions.sort(key=lambda item: item[0].lineno)
+    stats.functions = [
+        FunctionInfo(node.name, node.lineno, node.end_lineno - node.lineno + 1, counter[0], has_doc)
+        for node, counter, has_doc in functions
+    ]
+    stats.total_lines = len(stats.line_lengths)
+    stats.keyword_counts = dict(keyword_counts)
+    stats.max_nesting = max_nesting
+    stats.documented_definitions = (documented, definitions)
+    stats.docstring_lines = docstring_lines
+    return stats
+
+
+# Structural loop analysis: a loop nesting tree per function (ast for Python,
+# bracket matching over comment/string-masked source for brace languages),
+# then anti-pattern checks scoped to loop bodies
+
+LOOP_ISSUES = {
+    # type: (severity, description, suggestion)
+    'n_squared_iteration': ('HIGH', 'Nested iteration over "{name}" (outer loop at line {outer}) - O(n²)',
+                            'Index one side in a hash set/map for O(n) lookup'),
+    'nested_loops': ('MEDIUM', 'Loop nested in the loop at line {outer} - O(n·m) iteration',
+                     'Consider using hash maps or optimizing the algorithm'),
+    'linear_membership': ('MEDIUM', 'Membership test on list "{name}" inside a loop - linear scan per iteration',
+                          'Convert the list to a set once, before the loop'),
+    'string_concat_in_loop': ('LOW', 'String "{name}" built by concatenation inside a loop',
+                              'Collect the parts and join them once (list/array join, StringBuilder, strings.Builder)'),
+    'regex_compile_in_loop': ('MEDIUM', 'Regular expression compiled inside a loop',
+                              'Compile the pattern once, outside the loop'),
+    'network_in_loop': ('HIGH', 'Network call inside a loop',
+                        'Batch the requests or issue them concurrently'),
+    'query_in_loop': ('HIGH', 'Database query inside a loop (N+1 queries)',
+                      'Fetch the rows with a single query'),
+    'io_in_loop': ('MEDIUM', 'File or process I/O inside a loop',
+                   'Do the I/O once outside the loop or batch it'),
+    'repeated_computation': ('LOW', 'Call to {name}() gives the same result on every iteration of the loop at line {outer}',
+                             'Hoist loop-invariant calls out of the loop'),
+}
+
+# Python calls by dotted name (e.g. "requests.get", "self.cursor.execute")
+_PYTHON_CALL_RULES = [
+    ('regex_compile_in_loop', re.compile(r'^(?:re|regex)\.compile$')),
+    ('network_in_loop', re.compile(r'^(?:requests|httpx|aiohttp)\.\w+$|(?:^|\.)(?:urlopen|call_chat)$|(?:^|\.)session\.(?:get|post|put|patch|delete|request)$')),
+    ('query_in_loop', re.compile(r'(?:^|\.)(?:execute|executemany)$')),
+    ('io_in_loop', re.compile(r'^(?:open|io\.open)$|^subprocess\.\w+$|^os\.(?:system|popen)$|^shutil\.\w+$|\.(?:read_text|write_text|read_bytes|write_bytes)$')),
+]
+
+# Calls that are not pure functions of their receiver and arguments (or build a fresh object on purpose)
+_IMPURE_CALLS = {
+    'read', 'readline', 'readlines', 'recv', 'recv_into', 'accept', 'pop', 'popitem', 'popleft', 'next',
+    'input', 'print', 'sleep', 'time', 'perf_counter', 'monotonic', 'now', 'utcnow', 'today', 'random',
+    'randint', 'randrange', 'choice', 'choices', 'sample', 'shuffle', 'uniform', 'uuid4', 'urandom', 'wait',
+    'poll', 'send', 'sendall', 'write', 'writelines', 'flush', 'acquire', 'release', 'put', 'get_nowait',
+    'put_nowait', 'result', 'submit', 'copy', 'deepcopy', 'list', 'dict', 'set', 'bytearray', 'iter', 'id',
+    'enumerate', 'zip', 'reversed', 'map', 'filter'
+}
+# Constant-time calls: nothing to gain from hoisting them
+_CONSTANT_TIME_CALLS = {
+    'len', 'isinstance', 'issubclass', 'type', 'hasattr', 'getattr', 'callable', 'abs', 'bool', 'int',
+    'float', 'str', 'repr', 'ord', 'chr', 'range'
+}
+
+# Brace-language calls, matched on masked source
+_BRACE_CALL_RULES = [
+    # Only literal patterns: one built per iteration has to be compiled per iteration
+    ('regex_compile_in_loop', re.compile(
+        r'(?:\bnew\s+(?:RegExp|Regex)|\bPattern\s*\.\s*compile|\bregexp\s*\.\s*(?:MustCompile|Compile)'
+        r'|\bRegex\s*::\s*new|\bstd\s*::\s*regex\s+\w+)\s*\(\s*(?:r#*)?["\'`]')),
+    ('network_in_loop', re.compile(
+        r'\bfetch\s*\(|\baxios\s*(?:\.\s*\w+\s*)?\(|\bhttps?\s*\.\s*(?:get|request|Get|Post|Head)\s*\('
+        r'|\breqwest\s*::|\.\s*openConnection\s*\(|\bcurl_easy_perform\s*\(')),
+    ('query_in_loop', re.compile(
+        r'\.\s*(?:query|execute|executeQuery|executeUpdate|Query|QueryRow|Exec)\s*\(')),
+    ('io_in_loop', re.compile(
+        r'\bfs\s*\.\s*\w+\s*\(|\bos\s*\.\s*(?:Open|ReadFile|WriteFile|Create)\s*\(|\bioutil\s*\.\s*\w+\s*\('
+        r'|\bFiles\s*\.\s*\w+\s*\(|\bnew\s+File(?:InputStream|OutputStream|Reader|Writer)\s*\('
+        r'|\bFile\s*::\s*(?:open|create)\s*\(|\bfs\s*::\s*\w+\s*\(|\b[io]?fstream\b|\bfopen\s*\(')),
+]
+
+# Declarations that make a name a list / a string, per brace language family
+_BRACE_LIST_DECLS = re.compile(
+    r'\b(?:const|let|var)\s+([\w$]+)\s*(?::\s*[\w<>\[\]]+\s*)?=\s*(?:\[|new\s+Array\b|Array\.from\b)'
+    r'|\b[\w$]+\s*:\s*([\w$]+)\[\]'
+    r'|\b(?:List|ArrayList|LinkedList|Vec|vector)\s*<[^;=(){}]*>\s+(\w+)'
+    r'|\b(\w+)\s*:?=\s*\[\]\w+'
+    r'|\blet\s+(?:mut\s+)?(\w+)\s*(?::\s*Vec<[^=]*>\s*)?=\s*vec!'
+)
+_BRACE_STRING_DECLS = re.compile(
+    r'\b(?:String|string|std\s*::\s*string)\s+(\w+)\s*[=;]'
+    r'|\b(?:const|let|var)\s+([\w$]+)\s*(?::\s*string\s*)?=\s*["\'`]'
+    r'|\b(\w+)\s*:=\s*"'
+    r'|\bvar\s+(\w+)\s+string\b'
+    r'|\blet\s+mut\s+(\w+)\s*(?::\s*String\s*)?=\s*(?:String::(?:new|from)|")'
+)
+_BRACE_MEMBERSHIP = re.compile(r'\b([\w$]+)\s*\.\s*(?:includes|indexOf|contains|Contains)\s*\(|\b(?:std\s*::\s*find|slices\s*\.\s*Contains)\s*\(')
+_BRACE_CONCAT = re.compile(r'\b([\w$]+)\s*\+=\s*(["\'`])?|\b([\w$]+)\s*=\s*([\w$]+)\s*\+')
+
+_BRACE_PAREN_LOOP = re.compile(r'\b(?:for|foreach|while)\s*\(|\bdo\s*\{')
+_BRACE_BARE_LOOP = re.compile(r'\b(?:for|while|loop)\b')
+_CHAIN = r'[A-Za-z_$][\w$]*(?:\s*(?:\.|::|->)\s*[A-Za-z_$][\w$]*(?:\(\))?)*'
+_CALLBACK_LOOP = re.compile(
+    r'\.\s*(?:forEach|map|filter|reduce|some|every|find|findIndex|flatMap|for_each|Select|Where|Any|All)\s*[({]')
+_CALLBACK_PARAMS = re.compile(r'\s*\(?([\w$,\s]*)\)?\s*(?:=>|->)|\s*\|([^|]*)\|')
+_CHAIN_RE = re.compile(_CHAIN)
+_RECEIVER = re.compile('(' + _CHAIN + r')\s*$')
+_IDENT = re.compile(r'[A-Za-z_$][\w$]*')
+_BRACKET = re.compile(r'[()\[\]{}]')
+_SPACE_OR_CALL = re.compile(r'\s+|\(\)')
+_SPACE = re.compile(r'\s+')
+_UPPER_BOUND = re.compile(r'<=?\s*(.*)')
+_ASSIGNED = re.compile(r'=\s*(.*)')
+_ITERATES = re.compile(r'\b(?:of|in|range)\b|(?<!:):(?![:=])')
+_RANGE_HEADER = re.compile(r'\.\.|\buntil\b|\bdownTo\b')
+_IMPL = re.compile(r'\bimpl\b')
+_LOOP_WRAPPERS = {'len', 'Object.keys', 'Object.values', 'Object.entries', 'Array.from', 'enumerate', 'until', 'downTo'}
+_ITERATOR_SUFFIXES = ('.iter', '.iter_mut', '.into_iter', '.keys', '.values', '.entries',
+                      '.length', '.size', '.len', '.Count', '.Length', '.chars')
+_HEADER_WORDS = {'const', 'let', 'var', 'int', 'auto', 'final', 'long', 'size_t', 'unsigned', 'mut', 'ref',
+                 'of', 'in', 'range', 'for', 'while', 'foreach', 'true', 'false', 'i32', 'usize', 'u32'}
+
+
+def _loop_issue(issue_type: str, line: int, end_line: int, code: str, function: str, **names) -> Dict:
+    severity, description, suggestion = LOOP_ISSUES[issue_type]
+    return {
+        'type': issue_type,
+        'severity': severity,
+        'description': description.format(**names),
+        'line': line,
+        'end_line': end_line,
+        'code': code,
+        'function': function,
+        'suggestion': suggestion
+    }
+
+
+def _dotted_name(node) -> Optional[str]:
+    """'a.b.c' for a Name/Attribute chain, None for anything else"""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if isinstance(node, ast.Name):
+        parts.append(node.id)
+        return '.'.join(reversed(parts))
+    return None
+
+
+def _iteration_root(node) -> Optional[str]:
+    """
+    The collection a loop iterates: items for items, items[1:], sorted(items),
+    range(len(items)) and d.values(); None for an element such as items[i]
+    """
+    while True:
+        if isinstance(node, ast.Call):
+            func = _dotted_name(node.func)
+            if func in ('range', 'len', 'enumerate', 'sorted', 'reversed', 'list', 'set', 'tuple', 'zip', 'iter') and node.args:
+                node = node.args[-1] if func == 'range' else node.args[0]
+            elif isinstance(node.func, ast.Attribute):
+                node = node.func.value
+            else:
+                return None
+        elif isinstance(node, ast.Subscript) and isinstance(node.slice, ast.Slice):
+            node = node.value
+        elif isinstance(node, ast.Subscript):
+            return None
+        else:
+            return _dotted_name(node)
+
+
+def _stored_names(nodes) -> Set[str]:
+    return {
+        child.id for node in nodes for child in ast.walk(node)
+        if isinstance(child, ast.Name) and isinstance(child.ctx, ast.Store)
+    }
+
+
+def _is_list_type(annotation) -> bool:
+    if isinstance(annotation, ast.Subscript):
+        annotation = annotation.value
+    return _dotted_name(annotation) in ('list', 'List', 'typing.List')
+
+
+def _is_list_value(node) -> bool:
+    return isinstance(node, (ast.List, ast.ListComp)) or (
+        isinstance(node, ast.Call) and _dotted_name(node.func) in ('list', 'sorted'))
+
+
+def _is_str_value(node) -> bool:
+    return isinstance(node, ast.JoinedStr) or (isinstance(node, ast.Constant) and isinstance(node.value, str))
+
+
+class _PythonLoopVisitor(ast.NodeVisitor):
+    """Walks a module keeping the loop stack of the current function scope"""
+    
+    def __init__(self, lines: List[str], invariant_calls: bool = False):
+        self.lines = lines
+        self.issues = []
+        self.function = '<module>'
+        # (node, root, loop variables, has iterable, names the body binds or mutates) from outermost to innermost
+        self.loops = []
+        self.list_names = set()
+        self.str_names = set()
+        self.invariant_calls = invariant_calls
+        self._statement_calls = set()  # ids of calls whose result is discarded
+        self._hoisted = False          # inside a call already reported as loop-invariant
+    
+    def _issue(self, issue_type: str, node, **names):
+        code = self.lines[node.lineno - 1].strip() if node.lineno <= len(self.lines) else ''
+        self.issues.append(_loop_issue(issue_type, node.lineno, node.end_lineno, code, self.function, **names))
+    
+    def _scope(self, node, name: str):
+        saved = (self.function, self.loops, self.list_names, self.str_names)
+        self.function, self.loops = name, []
+        self.list_names, self.str_names = set(), set()
+        args = getattr(node, 'args', None)
+        for arg in (args.posonlyargs + args.args + args.kwonlyargs) if args else []:
+            if arg.annotation is not None and _is_list_type(arg.annotation):
+                self.list_names.add(arg.arg)
+            elif _dotted_name(arg.annotation) == 'str':
+                self.str_names.add(arg.arg)
+        self.generic_visit(node)
+        self.function, self.loops, self.list_names, self.str_names = saved
+    
+    def visit_FunctionDef(self, node):
+        self._scope(node, node.name)
+    
+    visit_AsyncFunctionDef = visit_FunctionDef
+    
+    def visit_Lambda(self, node):
+        self._scope(node, self.function)
+    
+    def _enter_loop(self, node, target, iterable):
+        root = _iteration_root(iterable) if iterable is not None else None
+        loop_vars = _stored_names([target]) if target is not None else set()
+        
+        if iterable is not None:
+            outer = next((loop for loop in reversed(self.loops) if loop[3]), None)
+            related = next((loop for loop in self.loops if root and loop[1] == root), None)
+            depends = self._loop_dependent(iterable)
+            # range(i) under a loop over i: a triangular, still quadratic, iteration
+            counter = isinstance(iterable, ast.Call) and _dotted_name(iterable.func) == 'range' \
+                and isinstance(iterable.args[-1], ast.Name) and any(root in loop[2] for loop in self.loops)
+            if related is not None or counter:
+                anchor = related or self.loops[-1]
+                self._issue('n_squared_iteration', node, name=root, outer=anchor[0].lineno)
+            elif outer is not None and not depends:
+                self._issue('nested_loops', node, outer=outer[0].lineno)
+        
+        # Loop-invariant calls are looked for in for statements that use their variable
+        # (for _ in range(n) and retry loops repeat their body on purpose)
+        bound = None
+        if self.invariant_calls and isinstance(node, (ast.For, ast.AsyncFor)) and any(
+                isinstance(child, ast.Name) and isinstance(child.ctx, ast.Load) and child.id in loop_vars
+                for statement in node.body for child in ast.walk(statement)):
+            bound = loop_vars | _loop_bindings(node.body)
+        self.loops.append((node, root, loop_vars, iterable is not None, bound))
+    
+    def _loop_dependent(self, node) -> bool:
+        """Whether an expression reads a variable bound by an enclosing loop"""
+        loop_vars = set().union(*(loop[2] for loop in self.loops))
+        return any(isinstance(child, ast.Name) and child.id in loop_vars for child in ast.walk(node))
+    
+    def _bind(self, targets, value):
+        # Names computed from a loop variable (row = rows[i]) are per-iteration values too
+        if self.loops and self._loop_dependent(value):
+            self.loops[-1][2].update(_stored_names(targets))
+    
+    def visit_For(self, node):
+        self.visit(node.iter)  # evaluated once, before the loop
+        self._enter_loop(node, node.target, node.iter)
+        self.visit(node.target)
+        for statement in node.body:
+            self.visit(statement)
+        self.loops.pop()
+        for statement in node.orelse:
+            self.visit(statement)
+    
+    visit_AsyncFor = visit_For
+    
+    def visit_While(self, node):
+        self._enter_loop(node, None, None)
+        self.visit(node.test)
+        for statement in node.body:
+            self.visit(statement)
+        self.loops.pop()
+        for statement in node.orelse:
+            self.visit(statement)
+    
+    def _visit_comprehension(self, node):
+        for generator in node.generators:
+            self.visit(generator.iter)
+            self._enter_loop(node, generator.target, generator.iter)
+            for condition in generator.ifs:
+                self.visit(condition)
+        for field_name in ('elt', 'key', 'value'):
+            if hasattr(node, field_name):
+                self.visit(getattr(node, field_name))
+        del self.loops[len(self.loops) - len(node.generators):]
+    
+    visit_ListComp = visit_SetComp = visit_DictComp = visit_GeneratorExp = _visit_comprehension
+    
+    def visit_Assign(self, node):
+        self._bind(node.targets, node.value)
+        for target in node.targets:
+            if isinstance(target, ast.Name):
+                self._track(target.id, node.value)
+                if self.loops and isinstance(node.value, ast.BinOp) and isinstance(node.value.op, ast.Add) \
+                        and isinstance(node.value.left, ast.Name) and node.value.left.id == target.id \
+                        and (target.id in self.str_names or _is_str_value(node.value.right)):
+                    self._issue('string_concat_in_loop', node, name=target.id)
+        self.generic_visit(node)
+    
+    def visit_AnnAssign(self, node):
+        if node.value is not None:
+            self._bind([node.target], node.value)
+        if isinstance(node.target, ast.Name):
+            if _is_list_type(node.annotation):
+                self.list_names.add(node.target.id)
+            elif node.value is not None:
+                self._track(node.target.id, node.value)
+        self.generic_visit(node)
+    
+    def visit_With(self, node):
+        for item in node.items:
+            if item.optional_vars is not None:
+                self._bind([item.optional_vars], item.context_expr)
+        self.generic_visit(node)
+    
+    visit_AsyncWith = visit_With
+    
+    def _track(self, name: str, value):
+        if _is_list_value(value):
+            self.list_names.add(name)
+        elif _is_str_value(value):
+            self.str_names.add(name)
+    
+    def visit_AugAssign(self, node):
+        if self.loops and isinstance(node.op, ast.Add) and isinstance(node.target, ast.Name) \
+                and (node.target.id in self.str_names or _is_str_value(node.value)):
+            self._issue('string_concat_in_loop', node, name=node.target.id)
+        self.generic_visit(node)
+    
+    def visit_Compare(self, node):
+        if self.loops:
+            for op, comparator in zip(node.ops, node.comparators):
+                if isinstance(op, (ast.In, ast.NotIn)):
+                    if isinstance(comparator, ast.Name) and comparator.id in self.list_names:
+                        self._issue('linear_membership', node, name=comparator.id)
+                    elif isinstance(comparator, ast.ListComp) or (
+                            isinstance(comparator, ast.Call) and _dotted_name(comparator.func) == 'list'):
+                        self._issue('linear_membership', node, name=ast.unparse(comparator)[:40])
+        self.generic_visit(node)
+    
+    def visit_Expr(self, node):
+        if isinstance(node.value, ast.Call):
+            self._statement_calls.add(id(node.value))
+        self.generic_visit(node)
+    
+    def visit_Call(self, node):
+        hoisted = self._hoisted
+        if self.loops:
+            name = _dotted_name(node.func)
+            if name:
+                for issue_type, pattern in _PYTHON_CALL_RULES:
+                    if pattern.search(name):
+                        # A pattern built per iteration has to be compiled per iteration
+                        if issue_type != 'regex_compile_in_loop' or not any(
+                                self._loop_dependent(arg) for arg in node.args):
+                            self._issue(issue_type, node)
+                        break
+                else:
+                    if self.invariant_calls and not hoisted and self._invariant(node, name):
+                        self._issue('repeated_computation', node, name=name, outer=self.loops[-1][0].lineno)
+                        self._hoisted = True
+        self.generic_visit(node)
+        self._hoisted = hoisted
+    
+    def _invariant(self, node, name: str) -> bool:
+        """Whether a call in a loop reads nothing the loop binds or mutates (so it can be hoisted)"""
+        bound = self.loops[-1][4]
+        method = name.rsplit('.', 1)[-1]
+        if bound is None or id(node) in self._statement_calls or method[:1].isupper() \
+                or method in _IMPURE_CALLS or name in _CONSTANT_TIME_CALLS:
+            return False
+        operands = list(node.args) + [keyword.value for keyword in node.keywords]
+        if not operands:
+            return False  # argument-less calls (next_id(), it.read()) are usually stateful
+        if isinstance(node.func, ast.Attribute):
+            operands.append(node.func.value)
+        names = {child.id for operand in operands for child in ast.walk(operand) if isinstance(child, ast.Name)}
+        return bool(names) and not names & bound
+
+
+def _loop_bindings(body: List[ast.stmt]) -> Set[str]:
+    """
+    Names a loop body assigns or may mutate: stored names, the roots of
+    stored attributes and items, and the receivers and arguments of calls
+    whose result is discarded (items.append(x), process(items))
+    """
+    names = set()
+    for statement in body:
+        for node in ast.walk(statement):
+            if isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+                names.add(node.id)
+            elif isinstance(node, (ast.Attribute, ast.Subscript)) and isinstance(node.ctx, (ast.Store, ast.Del)):
+                names.update(child.id for child in ast.walk(node.value) if isinstance(child, ast.Name))
+            elif isinstance(node, (ast.Global, ast.Nonlocal)):
+                names.update(node.names)
+            elif isinstance(node, ast.Expr) and isinstance(node.value, ast.Call):
+                names.update(child.id for child in ast.walk(node.value) if isinstance(child, ast.Name))
+            elif isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) \
+                    and node.func.attr in _IMPURE_CALLS:
+                names.update(child.id for child in ast.walk(node.func.value) if isinstance(child, ast.Name))
+    return names
+
+
+def python_loop_issues(tree: ast.Module, lines: List[str], invariant_calls: bool = False) -> List[Dict]:
+    """Loop anti-patterns of a parsed Python module (plus loop-invariant calls if asked for)"""
+    visitor = _PythonLoopVisitor(lines, invariant_calls)
+    visitor.visit(tree)
+    return visitor.issues
+
+
+def _mask_source(content: str, language: str) -> str:
+    """Content with comments and string bodies blanked (quotes and offsets kept)"""
+    parts = []
+    pos = 0
+    for match in get_language(language).lexer.finditer(content):
+        kind = match.lastgroup
+        if kind != 'comment' and kind != 'string':
+            continue
+        text = match.group()
+        parts.append(content[pos:match.start()])
+        if kind == 'comment' or len(text) < 2:
+            parts.append(_NOT_NEWLINE.sub(' ', text))
+        else:
+            parts.append(text[0] + _NOT_NEWLINE.sub(' ', text[1:-1]) + text[-1])
+        pos = match.end()
+    parts.append(content[pos:])
+    return ''.join(parts)
+
+
+def _normalize_chain(chain: Optional[str]) -> Optional[str]:
+    if not chain:
+        return None
+    chain = _SPACE_OR_CALL.sub('', chain).replace('->', '.').replace('::', '.')
+    stripped = True
+    while stripped:
+        stripped = False
+        for suffix in _ITERATOR_SUFFIXES:
+            if chain.endswith(suffix) and len(chain) > len(suffix):
+                chain = chain[:-len(suffix)]
+                stripped = True
+    return chain
+
+
+def _first_chain(text: str) -> Optional[str]:
+    """First identifier chain in text, looking through len(...)/Object.keys(...) style wrappers"""
+    match = _CHAIN_RE.search(text)
+    while match and _SPACE.sub('', match.group()) in _LOOP_WRAPPERS:
+        match = _CHAIN_RE.search(text, match.end())
+    if not match or text[match.end():].lstrip().startswith('['):
+        return None  # an element such as items[i], not a collection
+    return _normalize_chain(match.group())
+
+
+def _brace_header_root(header: str) -> Optional[str]:
+    """Iterated collection of a brace-language loop header"""
+    if header.count(';') >= 2:
+        init, condition = header.split(';')[:2]
+        bound = _UPPER_BOUND.search(condition)
+        if bound:
+            return _first_chain(bound.group(1))
+        start = _ASSIGNED.search(init)
+        return _first_chain(start.group(1)) if start else None
+    
+    match = _ITERATES.search(header)
+    if not match:
+        return None
+    expression = header[match.end():]
+    if '..' in expression:
+        expression = expression.split('..')[-1].lstrip('=')
+    return _first_chain(expression)
+
+
+def _brace_header_vars(header: str) -> Set[str]:
+    """Names a brace-language loop header binds (counter or element variables)"""
+    if header.count(';') >= 2:
+        bound = header.split(';')[0].split('=')[0]
+    else:
+        match = _ITERATES.search(header)
+        bound = header[:match.start()] if match else ''
+    return {name for name in _IDENT.findall(bound) if name not in _HEADER_WORDS}
+
+
+def brace_structure(content: str, language: str) -> Tuple[str, List[int], Dict[int, int]]:
+    """
+    Masked source, line start offsets and matching bracket positions of a
+    brace-language file (shared by the loop and dataflow checks)
+    """
+    masked = _mask_source(content, language)
+    line_starts = [0] + [m.end() for m in re.finditer('\n', content)]
+    pairs = {}
+    stack = []
+    for match in _BRACKET.finditer(masked):
+        if match.group() in '([{':
+            stack.append(match.start())
+        elif stack:
+            pairs[stack.pop()] = match.start()
+    return masked, line_starts, pairs
+
+
+def brace_loop_issues(content: str, language: str, functions: List[FunctionInfo],
+                      structure: Optional[Tuple[str, List[int], Dict[int, int]]] = None) -> List[Dict]:
+    """Loop anti-patterns of a brace-language file"""
+    masked, line_starts, pairs = structure or brace_structure(content, language)
+    lines = content.split('\n')
+    
+    def line_of(pos: int) -> int:
+        return bisect_right(line_starts, pos)
+    
+    def function_at(line: int) -> str:
+        enclosing = [f for f in functions if f.line <= line < f.line + f.length]
+        return max(enclosing, key=lambda f: f.line).name if enclosing else '<module>'
+    
+    def skip_space(pos: int) -> int:
+        while pos < len(masked) and masked[pos].isspace():
+            pos += 1
+        return pos
+    
+    loops = []  # dicts: start, body (start, end), root, vars
+    plugin = get_language(language)
+    bare = plugin.loop_style == 'bare'
+    for match in (_BRACE_BARE_LOOP if bare else _BRACE_PAREN_LOOP).finditer(masked):
+        keyword_end = match.end()
+        if match.group().startswith('do'):
+            open_brace = match.end() - 1
+            loops.append({'start': match.start(), 'body': (open_brace, pairs.get(open_brace, len(masked))),
+                          'root': None, 'vars': set()})
+            continue
+        
+        if bare:
+            # Rust `impl Trait for Type {` and `for<'a>` bounds are not loops
+            statement_start = max(masked.rfind(c, 0, match.start()) for c in ';{}')
+            if match.group() == 'for' and (_IMPL.search(masked, statement_start + 1, match.start())
+                                           or masked[skip_space(keyword_end):].startswith('<')):
+                continue
+            pos = keyword_end
+            while pos < len(masked) and masked[pos] not in '{;}':
+                pos = pairs.get(pos, pos) + 1 if masked[pos] in '([' else pos + 1
+            if pos >= len(masked) or masked[pos] != '{':
+                continue
+            header = masked[keyword_end:pos]
+            body = (pos, pairs.get(pos, len(masked)))
+        else:
+            open_paren = keyword_end - 1
+            close_paren = pairs.get(open_paren)
+            if close_paren is None:
+                continue
+            header = masked[open_paren + 1:close_paren]
+            body_start = skip_space(close_paren + 1)
+            if body_start >= len(masked) or masked[body_start] == ';':
+                continue  # do-while tail or empty body
+            if masked[body_start] == '{':
+                body = (body_start, pairs.get(body_start, len(masked)))
+            else:
+                end = masked.find(';', body_start)
+                body = (body_start, end if end != -1 else len(masked))
+        
+        if not match.group().startswith(('for', 'foreach')):
+            loops.append({'start': match.start(), 'body': body, 'root': None, 'vars': set()})
+            continue
+        root = _brace_header_root(header)
+        loop_vars = _brace_header_vars(header)
+        loops.append({'start': match.start(), 'body': body, 'root': root, 'vars': loop_vars,
+                      'refs': set(_IDENT.findall(header)) - loop_vars,
+                      'counted': bool(root or loop_vars), 'counter': header.count(';') >= 2 or bool(_RANGE_HEADER.search(header))})
+    
+    for match in _CALLBACK_LOOP.finditer(masked):
+        open_paren = match.end() - 1
+        body = (open_paren, pairs.get(open_paren, len(masked)))
+        params = _CALLBACK_PARAMS.match(masked, open_paren + 1, body[1])
+        loop_vars = set(_IDENT.findall(params.group(params.lastindex or 1) or '')) if params else set()
+        if not loop_vars and masked[open_paren] == '{':
+            loop_vars = {'it'}  # Kotlin's implicit lambda parameter
+        receiver = _RECEIVER.search(masked, max(0, match.start() - 200), match.start())
+        root = _normalize_chain(receiver.group(1)) if receiver else None
+        loops.append({'start': receiver.start() if receiver else open_paren, 'body': body,
+                      'root': root, 'vars': loop_vars, 'refs': set(root.split('.')) if root else set(),
+                      'counted': True})
+    
+    # Nesting tree: parent = innermost loop whose body contains the header
+    loops.sort(key=lambda loop: (loop['start'], -loop['body'][1]))
+    open_loops = []
+    for loop in loops:
+        while open_loops and not (open_loops[-1]['body'][0] <= loop['start'] < open_loops[-1]['body'][1]):
+            open_loops.pop()
+        loop['ancestors'] = list(open_loops)
+        open_loops.append(loop)
+    
+    issues = []
+    
+    def add(issue_type: str, pos: int, end: int, **names):
+        line = line_of(pos)
+        issues.append(_loop_issue(issue_type, line, line_of(end), lines[line - 1].strip(), function_at(line), **names))
+    
+    for loop in loops:
+        ancestors = loop['ancestors']
+        if not ancestors or not loop.get('counted'):
+            continue
+        root = loop['root']
+        related = next((a for a in ancestors if root and a['root'] == root), None)
+        outer_vars = set().union(*(a['vars'] for a in ancestors))
+        if related is None and root in outer_vars and loop.get('counter'):
+            related = next(a for a in reversed(ancestors) if root in a['vars'])  # j < i style counters
+        if related is not None:
+            add('n_squared_iteration', loop['start'], loop['body'][1], name=root, outer=line_of(related['start']))
+        elif loop.get('counter') or not loop['refs'] & outer_vars:
+            outer = next((a for a in reversed(ancestors) if a.get('counted')), None)
+            if outer is not None:
+                add('nested_loops', loop['start'], loop['body'][1], outer=line_of(outer['start']))
+    
+    if not loops:
+        return issues
+    
+    # Loop bodies merged into disjoint spans, so the body checks only scan loop code
+    spans = []
+    for start, end in sorted(loop['body'] for loop in loops):
+        if spans and start <= spans[-1][1]:
+            spans[-1][1] = max(spans[-1][1], end)
+        else:
+            spans.append([start, end])
+    
+    def in_loops(pattern: 're.Pattern'):
+        for start, end in spans:
+            yield from pattern.finditer(masked, start + 1, end)
+    
+    for issue_type, pattern in _BRACE_CALL_RULES + plugin.loop_call_rules:
+        for match in in_loops(pattern):
+            add(issue_type, match.start(), match.end())
+    
+    list_names = {name for match in _BRACE_LIST_DECLS.finditer(masked) for name in match.groups() if name}
+    string_names = {name for match in _BRACE_STRING_DECLS.finditer(masked) for name in match.groups() if name}
+    
+    for match in in_loops(_BRACE_MEMBERSHIP):
+        receiver = match.group(1)
+        if receiver is None or receiver in list_names:
+            add('linear_membership', match.start(), match.end(), name=receiver or match.group().rstrip('( '))
+    
+    for match in in_loops(_BRACE_CONCAT):
+        name = match.group(1) or match.group(3)
+        if match.group(3) and match.group(3) != match.group(4):
+            continue
+        if name in string_names or match.group(2):
+            add('string_concat_in_loop', match.start(), match.end(), name=name)
+    
+    return sorted(issues, key=lambda issue: issue['line'])
+
+
+# Taint-lite dataflow: within one function, values derived from parameters or
+# request input are tracked through assignments, and a finding is reported
+# only when such a value is concatenated/interpolated into a string that
+# reaches a SQL or shell sink (or request input reaches a shell directly).
+# A helper that just passes its sql/cmd parameter through is not reported.
+TAINT_CATEGORIES = ('sql_injection', 'command_injection')
+
+# Parameters of these types cannot carry an injection
+_SAFE_PARAM_TYPES = {'int', 'float', 'bool', 'number', 'boolean', 'long', 'short', 'double', 'byte',
+                     'i8', 'i16', 'i32', 'i64', 'u8', 'u16', 'u32', 'u64', 'usize', 'isize', 'f32', 'f64',
+                     'int8', 'int16', 'int32', 'int64', 'uint', 'uint8', 'uint16', 'uint32', 'uint64',
+                     'float32', 'float64', 'Int', 'Long', 'Boolean', 'Double', 'Float', 'Integer', 'decimal'}
+
+_PY_REQUEST_SOURCES = ('request.args', 'request.form', 'request.values', 'request.json', 'request.data',
+                       'request.get_json', 'request.cookies', 'request.headers', 'request.GET', 'request.POST',
+                       'request.body', 'request.query_params', 'request.path_params', 'sys.argv')
+_PY_SQL_SINKS = {'execute', 'executemany', 'executescript', 'raw', 'mogrify', 'read_sql', 'read_sql_query'}
+_PY_SHELL_SINKS = {'os.system', 'os.popen', 'subprocess.getoutput', 'subprocess.getstatusoutput', 'eval', 'exec'}
+_PY_SUBPROCESS = {'run', 'call', 'Popen', 'check_call', 'check_output'}
+# Substrings every sink call contains: files and functions without any skip the dataflow
+_PY_SINK_HINTS = ('execute', 'raw', 'mogrify', 'read_sql', 'system', 'popen', 'getoutput', 'shell', 'eval', 'exec')
+_BRACE_SINK_HINTS = ('query', 'Query', 'xec', 'raw', 'prepare', 'spawn', 'Command', 'Start', 'execSQL')
+# Calls whose result is safe to interpolate whatever their input
+_SANITIZERS = {'int', 'float', 'bool', 'len', 'abs', 'round', 'quote', 'escape', 'escape_string', 'literal',
+               'parseInt', 'parseFloat', 'Number', 'Boolean', 'Atoi', 'ParseInt', 'ParseFloat', 'Itoa',
+               'escapeId', 'escapeLiteral', 'escapeIdentifier'}
+
+
+def _taint_finding(category: str, line: int, source: str, sink: str) -> Dict:
+    if category == 'sql_injection':
+        description = f'SQL injection: query built from {source} reaches {sink}()'
+    else:
+        description = f'Command injection: {source} reaches {sink}()'
+    return {'category': category, 'line': line, 'description': description}
+
+
+def _is_numeric_annotation(annotation) -> bool:
+    return isinstance(annotation, ast.Name) and annotation.id in _SAFE_PARAM_TYPES
+
+
+def _walk_unsanitized(node):
+    """ast.walk that skips sanitizer calls and lookups in literal dicts/lists"""
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ast.Call):
+            name = _dotted_name(node.func)
+            if name and name.rsplit('.', 1)[-1] in _SANITIZERS:
+                continue
+        if isinstance(node, ast.Subscript) and isinstance(node.value, (ast.Dict, ast.List, ast.Tuple)):
+            continue
+        yield node
+        stack.extend(ast.iter_child_nodes(node))
+
+
+class _PythonTaintVisitor(ast.NodeVisitor):
+    """Dataflow through one function body; nested functions are analyzed on their own"""
+    
+    def __init__(self, function):
+        self.tainted = {}     # name -> source label
+        self.built = set()    # strings built dynamically from tainted values
+        self.request = set()  # names holding request input
+        self.findings = []
+        args = function.args
+        for arg in args.posonlyargs + args.args + args.kwonlyargs + [args.vararg, args.kwarg]:
+            if arg is not None and arg.arg not in ('self', 'cls') and not _is_numeric_annotation(arg.annotation):
+                self.tainted[arg.arg] = f'parameter "{arg.arg}"'
+        for statement in function.body:
+            self.visit(statement)
+    
+    def visit_FunctionDef(self, node):
+        pass
+    
+    visit_AsyncFunctionDef = visit_Lambda = visit_ClassDef = visit_FunctionDef
+    
+    def _request_source(self, node) -> bool:
+        for child in _walk_unsanitized(node):
+            if isinstance(child, ast.Name) and child.id in self.request:
+                return True
+            if isinstance(child, ast.Attribute):
+                name = _dotted_name(child)
+                if name and name.startswith(_PY_REQUEST_SOURCES):
+                    return True
+            if isinstance(child, ast.Call) and isinstance(child.func, ast.Name) and child.func.id == 'input':
+                return True
+        return False
+    
+    def _source(self, node) -> Optional[str]:
+        """Label of the tainted data an expression uses (None when clean)"""
+        if self._request_source(node):
+            return 'request input'
+        for child in _walk_unsanitized(node):
+            if isinstance(child, ast.Name) and child.id in self.tainted:
+                return self.tainted[child.id]
+        return None
+    
+    def _is_dynamic(self, node) -> bool:
+        """A string assembled at runtime: f-string, +, % or .format/.join"""
+        if isinstance(node, ast.JoinedStr):
+            return any(isinstance(value, ast.FormattedValue) for value in node.values)
+        if isinstance(node, ast.Name):
+            return node.id in self.built
+        if isinstance(node, ast.BinOp):
+            if isinstance(node.op, ast.Mod):
+                return isinstance(node.left, (ast.Constant, ast.JoinedStr)) or self._is_dynamic(node.left)
+            if isinstance(node.op, ast.Add):
+                return any(isinstance(side, ast.Constant) and isinstance(side.value, str) or self._is_dynamic(side)
+                           for side in (node.left, node.right))
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr in ('format', 'join'):
+            return True
+        return False
+    
+    def _bind(self, targets, value):
+        source = self._source(value)
+        dynamic = source is not None and self._is_dynamic(value)
+        request = self._request_source(value)
+        for name in _stored_names(targets):
+            if source is None:
+                self.tainted.pop(name, None)
+            else:
+                self.tainted[name] = source
+            (self.built.add if dynamic else self.built.discard)(name)
+            (self.request.add if request else self.request.discard)(name)
+    
+    def visit_Assign(self, node):
+        self.visit(node.value)
+        self._bind(node.targets, node.value)
+    
+    def visit_AnnAssign(self, node):
+        if node.value is not None:
+            self.visit(node.value)
+            self._bind([node.target], node.value)
+    
+    def visit_AugAssign(self, node):
+        self.visit(node.value)
+        source = self._source(node.value)
+        if isinstance(node.target, ast.Name) and source is not None:
+            self.tainted.setdefault(node.target.id, source)
+            if isinstance(node.op, (ast.Add, ast.Mod)):
+                self.built.add(node.target.id)
+            if self._request_source(node.value):
+                self.request.add(node.target.id)
+    
+    def visit_For(self, node):
+        self.visit(node.iter)
+        self._bind([node.target], node.iter)
+        for statement in node.body + node.orelse:
+            self.visit(statement)
+    
+    visit_AsyncFor = visit_For
+    
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        name = _dotted_name(node.func)
+        if not name or not node.args:
+            return
+        last = name.rsplit('.', 1)[-1]
+        argument = node.args[0]
+        
+        if last in _PY_SQL_SINKS and '.' in name:
+            source = self._source(argument)
+            if source and self._is_dynamic(argument):
+                self.findings.append(_taint_finding('sql_injection', node.lineno, source, last))
+            return
+        
+        shell = name in _PY_SHELL_SINKS or (
+            name.startswith('subprocess.') and last in _PY_SUBPROCESS and any(
+                keyword.arg == 'shell' and isinstance(keyword.value, ast.Constant) and keyword.value.value is True
+                for keyword in node.keywords))
+        if shell:
+            source = self._source(argument)
+            if source and (self._is_dynamic(argument) or self._request_source(argument)):
+                self.findings.append(_taint_finding('command_injection', node.lineno, source, last))
+
+
+_STATEMENT_BLOCKS = ('body', 'orelse', 'finalbody', 'handlers', 'cases')
+
+
+def _python_taint_units(body: List[ast.AST]):
+    """Every function definition, nested ones included (statements only, expressions are not walked)"""
+    for node in body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            yield node
+        for field in _STATEMENT_BLOCKS:
+            block = getattr(node, field, None)
+            if block:
+                yield from _python_taint_units(block)
+
+
+# Brace languages: the same dataflow over masked source text
+_BRACE_REQUEST_SOURCE = re.compile(
+    r'\b(?:req|request|ctx\.request|ctx)\.(?:body|query|params|headers|cookies)\b'
+    r'|\bevent\.(?:body|queryStringParameters|pathParameters)\b|\bprocess\.argv\b'
+    r'|\blocation\.(?:search|hash|href)\b|\bURLSearchParams\b'
+    r'|\br\.(?:URL\.Query|FormValue|PostFormValue)\b|\bc\.(?:Query|Param|PostForm)\s*\(|\bgetParameter\s*\('
+)
+_BRACE_SQL_SINK = re.compile(
+    r'\.\s*(\$?(?:query|execute|raw|prepare|queryRawUnsafe|executeRawUnsafe|executeQuery|executeUpdate'
+    r'|prepareStatement|createQuery|createNativeQuery|rawQuery|execSQL|Query|QueryRow|QueryContext'
+    r'|QueryRowContext|Exec|ExecContext))\s*\('
+)
+_BRACE_SHELL_SINK = re.compile(
+    r'(?:(?<![\w$.])|\bchild_process\.|\bgetRuntime\(\)\.)(exec|execSync)\s*\('
+    r'|(?<![\w$.])(spawn|spawnSync)\s*\(|\bexec\.(Command|CommandContext)\s*\(|\bProcess\.(Start)\s*\('
+)
+_SHELL_PROGRAMS = re.compile(r'^\s*["\'](?:/bin/)?(?:sh|bash|zsh|cmd(?:\.exe)?|powershell)["\']')
+_SHELL_OPTION = re.compile(r'\bshell\s*:\s*true\b')
+_BRACE_ASSIGN = re.compile(r'(?<![\w$.])([A-Za-z_$][\w$]*)\s*(?::\s*[\w$<>\[\]|.? ]+?)?\s*(\+=|:=|=)(?![=>])')
+# Anonymous functions and methods the function patterns miss: function (...) {, (...) => {,
+# x => {, Java/Kotlin (...) -> { and Go methods func (r *T) name(...) ... {
+_BRACE_CALLBACK = re.compile(
+    r'(?:\b(?:function|func)\b\s*\*?\s*[\w$]*\s*\(([^()]*)\)[^{};\n]*'
+    r'|\(([^()]*)\)\s*(?::\s*[\w$<>\[\]|.,?]+)?\s*(?:=>|->)'
+    r'|(?<![\w$.])([A-Za-z_$][\w$]*)\s*(?:=>|->)'
+    r'|\bfunc\s*\([^()]*\)\s*\w+\s*\(([^()]*)\)[^{};\n]*)\s*\{'
+)
+_INTERPOLATION = re.compile(r'\$\{([^}]*)\}|\$([A-Za-z_]\w*)')
+_FORMAT_CALL = re.compile(r'\b(?:Sprintf|format|Format|concat)\s*\(|\bformat!\s*\(')
+_WORD = re.compile(r'(?<![\w$.])[A-Za-z_$][\w$]*')
+_BRACE_SANITIZED = re.compile(r'\b(?:%s)\s*\([^()]*\)' % '|'.join(sorted(_SANITIZERS)))
+_KEYWORDS = {'const', 'let', 'var', 'val', 'new', 'await', 'return', 'typeof', 'true', 'false', 'null',
+             'undefined', 'this', 'nil', 'None', 'async', 'function', 'string', 'String'}
+
+
+def _split_top_level(text: str) -> List[Tuple[int, int]]:
+    """Spans of the comma-separated parts of masked text, ignoring nested commas"""
+    spans, depth, start = [], 0, 0
+    for i, char in enumerate(text):
+        if char in '([{':
+            depth += 1
+        elif char in ')]}':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            spans.append((start, i))
+            start = i + 1
+    spans.append((start, len(text)))
+    return [(a, b) for a, b in spans if text[a:b].strip()]
+
+
+def _brace_params(params: str, language: str) -> Dict[str, str]:
+    """Parameter names (minus numeric ones) of a parameter list"""
+    tainted = {}
+    for start, end in _split_top_level(params):
+        part = params[start:end].split('=', 1)[0].strip()
+        if part.startswith(('{', '[')):  # destructuring: every name is a parameter
+            names, type_name = _WORD.findall(part.split(':', 1)[0] if part.startswith('[') else part), None
+        elif ':' in part:
+            name, type_name = part.split(':', 1)
+            names, type_name = _WORD.findall(name)[-1:], type_name.strip()
+        else:
+            words = _WORD.findall(part)
+            if not words:
+                continue
+            if language == 'go':
+                names, type_name = words[:1], ' '.join(words[1:])
+            else:
+                names, type_name = words[-1:], ' '.join(words[:-1])
+        if type_name and type_name.split()[-1].strip('?') in _SAFE_PARAM_TYPES:
+            continue
+        for name in names:
+            if name not in _KEYWORDS and name not in ('self', 'this', 'mut'):
+                tainted[name] = f'parameter "{name}"'
+    return tainted
+
+
+class _BraceTaint:
+    """Dataflow through one brace-language function body; offsets are into the whole file"""
+    
+    def __init__(self, raw: str, masked: str, language: str, params: str):
+        self.raw = raw
+        self.masked = masked
+        self.language = language
+        self.tainted = _brace_params(params, language)
+        self.built = set()
+        self.request = set()
+    
+    def _names(self, start: int, end: int) -> Set[str]:
+        masked = _BRACE_SANITIZED.sub('', self.masked[start:end])
+        names = set(_WORD.findall(masked)) - _KEYWORDS
+        for match in _INTERPOLATION.finditer(self.raw[start:end]):
+            names.update(_WORD.findall(match.group(1) or match.group(2) or ''))
+        return names
+    
+    def _request_source(self, start: int, end: int, names: Set[str]) -> bool:
+        return bool(names & self.request) or bool(_BRACE_REQUEST_SOURCE.search(self.raw[start:end]))
+    
+    def _source(self, start: int, end: int, names: Set[str]) -> Optional[str]:
+        if self._request_source(start, end, names):
+            return 'request input'
+        for name in sorted(names):
+            if name in self.tainted:
+                return self.tainted[name]
+        return None
+    
+    def _is_dynamic(self, start: int, end: int, names: Set[str]) -> bool:
+        masked = self.masked[start:end]
+        raw = self.raw[start:end]
+        if names & self.built or _FORMAT_CALL.search(masked) or '${' in raw:
+            return True
+        if self.language == 'kotlin' and _INTERPOLATION.search(raw):
+            return True
+        return '+' in masked and bool(re.search(r'["\'`]', masked))
+    
+    def _statement_end(self, pos: int) -> int:
+        """End of the expression starting at pos: ; or a line break outside brackets"""
+        depth = 0
+        while pos < len(self.masked):
+            char = self.masked[pos]
+            if char in '([{':
+                depth += 1
+            elif char in ')]}':
+                if depth == 0:
+                    return pos
+                depth -= 1
+            elif depth == 0 and (char == ';' or char == ','):
+                return pos
+            elif depth == 0 and char == '\n':
+                before = self._previous_char(pos)
+                after = self._next_char(pos)
+                if before not in '+(,=?:&|' and after not in '+.?:':
+                    return pos
+            pos += 1
+        return pos
+    
+    def _previous_char(self, pos: int) -> str:
+        pos -= 1
+        while pos >= 0 and self.masked[pos].isspace():
+            pos -= 1
+        return self.masked[pos] if pos >= 0 else ''
+    
+    def _next_char(self, pos: int) -> str:
+        while pos < len(self.masked) and self.masked[pos].isspace():
+            pos += 1
+        return self.masked[pos] if pos < len(self.masked) else ''
+    
+    def run(self, start: int, end: int, pairs: Dict[int, int]) -> List[Tuple[int, str, str, str]]:
+        """Findings of the body between start and end as (offset, category, source, sink)"""
+        events = []
+        for match in _BRACE_ASSIGN.finditer(self.masked, start, end):
+            events.append((match.end(), 'assign', match))
+        for pattern, category in ((_BRACE_SQL_SINK, 'sql_injection'), (_BRACE_SHELL_SINK, 'command_injection')):
+            for match in pattern.finditer(self.masked, start, end):
+                events.append((match.end() - 1, category, match))
+        events.sort(key=lambda event: event[0])
+        
+        findings = []
+        for pos, kind, match in events:
+            if kind == 'assign':
+                end = self._statement_end(pos)
+                names = self._names(pos, end)
+                source = self._source(pos, end, names)
+                name = match.group(1)
+                if source is None:
+                    if match.group(2) != '+=':
+                        self.tainted.pop(name, None)
+                        self.built.discard(name)
+                        self.request.discard(name)
+                    continue
+                self.tainted[name] = source
+                if match.group(2) == '+=' or self._is_dynamic(pos, end, names):
+                    self.built.add(name)
+                if self._request_source(pos, end, names):
+                    self.request.add(name)
+                continue
+            
+            close = pairs.get(pos)
+            if close is None:
+                continue
+            arguments = _split_top_level(self.masked[pos + 1:close])
+            sink = next(group for group in match.groups() if group)
+            if kind == 'command_injection':
+                raw_args = self.raw[pos + 1:close]
+                if sink in ('Command', 'CommandContext', 'Start') and not _SHELL_PROGRAMS.match(
+                        raw_args[arguments[1][0]:] if sink == 'CommandContext' and len(arguments) > 1 else raw_args):
+                    continue
+                if sink in ('spawn', 'spawnSync') and not _SHELL_OPTION.search(raw_args):
+                    continue
+            for start, end in arguments:
+                start, end = pos + 1 + start, pos + 1 + end
+                names = self._names(start, end)
+                source = self._source(start, end, names)
+                if source is None:
+                    continue
+                dynamic = self._is_dynamic(start, end, names)
+                if dynamic or (kind == 'command_injection' and self._request_source(start, end, names)):
+                    findings.append((pos, kind, source, sink))
+                    break
+        return findings
+
+
+def _brace_taint_units(masked: str, functions: List[FunctionInfo], line_starts: List[int],
+                       pairs: Dict[int, int]):
+    """(params start, params end, body start, body end) of named functions and anonymous callbacks"""
+    units = {}
+    for function in functions:
+        start = line_starts[function.line - 1]
+        open_paren = masked.find('(', start)
+        close_paren = pairs.get(open_paren)
+        if close_paren is None:
+            continue
+        body = masked.find('{', close_paren)
+        if body != -1 and body in pairs:
+            units[body] = (open_paren + 1, close_paren, body, pairs[body])
+    for match in _BRACE_CALLBACK.finditer(masked):
+        body = match.end() - 1
+        group = next(i for i in range(1, 5) if match.group(i) is not None)
+        if body in pairs and body not in units:
+            units[body] = (match.start(group), match.end(group), body, pairs[body])
+    return sorted(units.values())
+
+
+# Findings per function body hash (offset from the function's first line,
+# category, description), shared with workers and persisted by the result store
+_taint_cache: Dict[str, List] = {}
+_taint_added: Dict[str, List] = {}
+
+
+def load_taint_cache(entries: Dict[str, List]):
+    """Seed the per-function cache (forked workers inherit it, others are seeded on start)"""
+    _taint_cache.update(entries)
+
+
+def take_taint_additions() -> Dict[str, List]:
+    """Entries computed since the last call, to send back to the parent and persist"""
+    added = dict(_taint_added)
+    _taint_added.clear()
+    return added
+
+
+def reset_taint_cache():
+    """Forget every cached function (benchmarks measure cold analysis)"""
+    _taint_cache.clear()
+    _taint_added.clear()
+
+
+def _cached_taint(key: str, first_line: int, compute) -> List[Dict]:
+    entries = _taint_cache.get(key)
+    if entries is None:
+        entries = [[finding['line'] - first_line, finding['category'], finding['description']]
+                   for finding in compute()]
+        _taint_cache[key] = _taint_added[key] = entries
+    return [{'category': category, 'line': first_line + offset, 'description': description}
+            for offset, category, description in entries]
+
+
+def python_taint_findings(tree: ast.Module, lines: List[str]) -> List[Dict]:
+    """SQL/command injection findings of a parsed Python module"""
+    findings = []
+    for function in _python_taint_units(tree.body):
+        end = getattr(function, 'end_lineno', function.lineno)
+        body = '\n'.join(lines[function.lineno - 1:end])
+        if not any(hint in body for hint in _PY_SINK_HINTS):
+            continue
+        key = hash_text('python\0' + body)
+        findings.extend(_cached_taint(key, function.lineno, lambda: _PythonTaintVisitor(function).findings))
+    return findings
+
+
+def brace_taint_findings(content: str, language: str, functions: List[FunctionInfo],
+                         structure: Optional[Tuple[str, List[int], Dict[int, int]]] = None) -> List[Dict]:
+    """SQL/command injection findings of a brace-language file"""
+    masked, line_starts, pairs = structure or brace_structure(content, language)
+    findings = []
+    for params_start, params_end, body_start, body_end in _brace_taint_units(masked, functions, line_starts, pairs):
+        body = masked[body_start:body_end]
+        if not any(hint in body for hint in _BRACE_SINK_HINTS):
+            continue
+        first_line = bisect_right(line_starts, body_start)
+        key = hash_text(f'{language}\0{content[params_start:params_end]}\0{content[body_start:body_end]}')
+        
+        def compute():
+            flow = _BraceTaint(content, masked, language, masked[params_start:params_end])
+            return [_taint_finding(category, bisect_right(line_starts, offset), source, sink)
+                    for offset, category, source, sink in flow.run(body_start, body_end, pairs)]
+        
+        findings.extend(_cached_taint(key, first_line, compute))
+    return findings
 
 
 class CodeAnalyzer:
     def __init__(self, file_path: str, content: str):
         self.file_path = file_path
         self.content = content
-        self.language = self._detect_language()
+        self.plugin = language_for_path(file_path)
+        self.language = self.plugin.name
         self.lines = content.split('\n')
-        
-    def _detect_language(self) -> str:
-        """Detect programming language from file extension"""
-        ext = Path(self.file_path).suffix.lower()
-        mapping = {
-            '.py': 'python',
-            '.js': 'javascript',
-            '.jsx': 'javascript',
-            '.ts': 'typescript',
-            '.tsx': 'typescript',
-            '.go': 'go',
-            '.rs': 'rust',
-            '.java': 'java',
-            '.cpp': 'cpp',
-            '.cc': 'cpp',
-            '.c': 'cpp',
-            '.h': 'cpp',
-            '.hpp': 'cpp',
-        }
-        return mapping.get(ext, 'unknown')
+        self._stats = None
+        self._line_offsets = None
+        self._python_tree = None
+        self._brace_structure = None
+    
+    def _line_at(self, pos: int) -> int:
+        """1-based line number of a content offset (binary search over line starts)"""
+        if self._line_offsets is None:
+            self._line_offsets = [0] + [m.end() for m in re.finditer('\n', self.content)]
+        return bisect_right(self._line_offsets, pos)
     
+    @property
+    def python_tree(self) -> Optional[ast.Module]:
+        """Syntax tree of a Python file, parsed once and shared by every check"""
+        if self._python_tree is None and self.language == 'python':
+            self._python_tree = parse_python(self.content) or False
+        return self._python_tree or None
+    
+    @property
+    def stats(self) -> SourceStats:
+        """Source stats shared by every metric (computed once, on first use)"""
+        if self._stats is None:
+            tree = self.python_tree
+            if tree is not None:
+                self._stats = python_source_stats(self.content, tree)
+            else:
+                self._stats = scan_source(self.content, self.language)
+        return self._stats
+    
+    @property
+    def brace_structure(self) -> Tuple[str, List[int], Dict[int, int]]:
+        """Masked text and bracket pairs of a brace-language file (computed once, on first use)"""
+        if self._brace_structure is None:
+            self._brace_structure = brace_structure(self.content, self.language)
+        return self._brace_structure
+        
     def calculate_quality_score(self) -> Dict:
         """Calculate comprehensive quality score"""
         scores = {
@@ -158,13 +1909,11 @@ class CodeAnalyzer:
     
     def _calculate_documentation_score(self) -> int:
         """Score based on documentation coverage"""
-        total_lines = len(self.lines)
-        comment_lines = sum(1 for line in self.lines if line.strip().startswith(('#', '//', '/*', '*', '///')))
-        
+        total_lines = self.stats.total_lines
         if total_lines == 0:
             return 0
         
-        coverage = (comment_lines / total_lines) * 100
+        coverage = (self.stats.comment_lines / total_lines) * 100
         
         # Score based on coverage
         if coverage >= 20:
@@ -180,16 +1929,12 @@ class CodeAnalyzer:
     
     def _calculate_complexity_score(self) -> int:
         """Score based on cyclomatic complexity"""
-        if self.language not in LANGUAGE_PATTERNS:
+        if not self.plugin.supported:
             return 15  # Default mid-score for unknown languages
         
-        keywords = LANGUAGE_PATTERNS[self.language].get('complexity_keywords', [])
-        complexity_count = sum(
-            sum(1 for _ in re.finditer(rf'\b{kw}\b', self.content)) 
-            for kw in keywords
-        )
+        complexity_count = self.stats.decision_points
         
-        lines = len(self.lines)
+        lines = self.stats.total_lines
         if lines == 0:
             return 15
         
@@ -212,10 +1957,10 @@ class CodeAnalyzer:
         score = 40
         
         # Line length penalty
-        long_lines = sum(1 for line in self.lines if len(line) > 120)
-        if long_lines > len(self.lines) * 0.2:
+        long_lines = self.stats.long_lines()
+        if long_lines > self.stats.total_lines * 0.2:
             score -= 10
-        elif long_lines > len(self.lines) * 0.1:
+        elif long_lines > self.stats.total_lines * 0.1:
             score -= 5
         
         # Function length penalty
@@ -236,47 +1981,12 @@ class CodeAnalyzer:
     
     def _get_average_function_length(self) -> float:
         """Calculate average function length"""
-        if self.language not in LANGUAGE_PATTERNS:
-            return 0
-        
-        pattern = LANGUAGE_PATTERNS[self.language].get('function', '')
-        if not pattern:
-            return 0
-        
-        function_starts = [m.start() for m in re.finditer(pattern, self.content)]
-        if not function_starts:
-            return 0
-        
-        # Estimate function lengths (rough approximation)
-        lengths = []
-        for i, start in enumerate(function_starts):
-            end = function_starts[i + 1] if i + 1 < len(function_starts) else len(self.content)
-            length = self.content[start:end].count('\n')
-            lengths.append(length)
-        
+        lengths = [function.length for function in self.stats.functions]
         return sum(lengths) / len(lengths) if lengths else 0
     
     def _get_max_nesting_depth(self) -> int:
         """Calculate maximum nesting depth"""
-        max_depth = 0
-        current_depth = 0
-        
-        for line in self.lines:
-            stripped = line.strip()
-            # Count opening braces/keywords
-            if self.language in ['python']:
-                if stripped.endswith(':') and any(kw in stripped for kw in ['if', 'for', 'while', 'def', 'class', 'with', 'try']):
-                    current_depth += 1
-                    max_depth = max(max_depth, current_depth)
-                elif stripped and not stripped.startswith('#'):
-                    # Dedent detection (rough)
-                    if len(line) - len(line.lstrip()) == 0 and current_depth > 0:
-                        current_depth = max(0, current_depth - 1)
-            else:
-                current_depth += line.count('{') - line.count('}')
-                max_depth = max(max_depth, current_depth)
-        
-        return max_depth
+        return self.stats.max_nesting
     
     def _get_grade(self, score: int) -> str:
         """Convert score to letter grade"""
@@ -303,93 +2013,313 @@ class CodeAnalyzer:
     
     def _get_documentation_details(self) -> str:
         """Get documentation details"""
-        total_lines = len(self.lines)
-        comment_lines = sum(1 for line in self.lines if line.strip().startswith(('#', '//', '/*', '*', '///')))
+        total_lines = self.stats.total_lines
+        comment_lines = self.stats.comment_lines
         coverage = (comment_lines / total_lines * 100) if total_lines > 0 else 0
-        return f"{coverage:.1f}% documentation coverage ({comment_lines}/{total_lines} lines)"
+        details = f"{coverage:.1f}% documentation coverage ({comment_lines}/{total_lines} lines)"
+        if self.stats.documented_definitions:
+            documented, definitions = self.stats.documented_definitions
+            details += f", {documented}/{definitions} definitions have docstrings"
+        return details
     
     def _get_complexity_details(self) -> str:
         """Get complexity details"""
-        if self.language not in LANGUAGE_PATTERNS:
+        if not self.plugin.supported:
             return "Language not supported for complexity analysis"
         
-        keywords = LANGUAGE_PATTERNS[self.language].get('complexity_keywords', [])
-        complexity_count = sum(
-            sum(1 for _ in re.finditer(rf'\b{kw}\b', self.content)) 
-            for kw in keywords
-        )
-        return f"{complexity_count} decision points"
+        details = f"{self.stats.decision_points} decision points"
+        measured = [function for function in self.stats.functions if function.complexity is not None]
+        if measured:
+            worst = max(measured, key=lambda function: function.complexity)
+            details += f", max cyclomatic complexity {worst.complexity} ({worst.name})"
+        return details
     
     def _get_maintainability_details(self) -> str:
         """Get maintainability details"""
-        long_lines = sum(1 for line in self.lines if len(line) > 120)
+        long_lines = self.stats.long_lines()
         avg_func_len = self._get_average_function_length()
         max_nesting = self._get_max_nesting_depth()
         return f"{long_lines} long lines, avg function: {avg_func_len:.0f} lines, max nesting: {max_nesting}"
     
     def scan_security_vulnerabilities(self) -> List[Dict]:
-        """Scan for common security vulnerabilities"""
+        """Scan for common security vulnerabilities in a single pass over the file"""
+        findings = []
+        # Each rule keeps its own non-overlapping semantics, as with one finditer per rule
+        next_allowed = [0] * len(_SECURITY_RULES)
+        generic_rules = _SECURITY_RULES_BY_CHAR.get(None, [])
+        
+        for match in _SECURITY_SCANNER.finditer(self.content):
+            pos = match.start()
+            first = _SECURITY_GROUP_TO_RULE[match.lastindex]
+            candidates = _SECURITY_RULES_BY_CHAR.get(self.content[pos].lower(), []) + generic_rules
+            
+            for i in candidates:
+                if i < first or pos < next_allowed[i]:
+                    continue
+                if i == first:
+                    end = match.end(match.lastindex)
+                else:
+                    rule_match = _SECURITY_RULES[i][1].match(self.content, pos)
+                    if not rule_match:
+                        continue
+                    end = rule_match.end()
+                next_allowed[i] = max(end, pos + 1)
+                findings.append((i, pos))
+        
+        # Python docstrings are prose, not code (known from the shared parse)
+        docstring_lines = self.stats.docstring_lines if self.python_tree is not None else ()
+        
         vulnerabilities = []
+        for start, end, rule, description, secret in scan_secrets(self.content):
+            line_num = self._line_at(start)
+            if line_num in docstring_lines:
+                continue
+            line = self.lines[line_num - 1] if line_num <= len(self.lines) else ''
+            line_start = start - self._line_offsets[line_num - 1]
+            vulnerabilities.append({
+                'category': 'hardcoded_secret',
+                'rule': rule,
+                'severity': 'MEDIUM' if rule == 'entropy' else 'HIGH',
+                'description': f'{description} detected',
+                'line': line_num,
+                # The secret itself never reaches reports, results or SARIF
+                'code': (line[:line_start] + _redact(secret) + line[line_start + end - start:]).strip(),
+                'secret_hash': hash_text(secret)[:16]
+            })
+        
+        # Where dataflow is available, it replaces the injection patterns
+        taint = self.taint_findings()
         
-        for category, patterns in SECURITY_PATTERNS.items():
-            for pattern, description in patterns:
-                for match in re.finditer(pattern, self.content, re.IGNORECASE | re.MULTILINE):
-                    line_num = self.content[:match.start()].count('\n') + 1
-                    vulnerabilities.append({
-                        'category': category,
-                        'severity': 'HIGH' if category in ['sql_injection', 'command_injection'] else 'MEDIUM',
-                        'description': description,
-                        'line': line_num,
-                        'code': self.lines[line_num - 1].strip() if line_num <= len(self.lines) else ''
-                    })
+        for i, pos in sorted(findings):
+            category, _, description = _SECURITY_RULES[i]
+            line_num = self._line_at(pos)
+            if line_num in docstring_lines or (taint is not None and category in TAINT_CATEGORIES):
+                continue
+            vulnerabilities.append({
+                'category': category,
+                'severity': 'HIGH' if category in TAINT_CATEGORIES else 'MEDIUM',
+                'description': description,
+                'line': line_num,
+                'code': self.lines[line_num - 1].strip() if line_num <= len(self.lines) else ''
+            })
+        
+        seen = set()
+        for finding in taint or []:
+            line_num = finding['line']
+            if (line_num, finding['category']) in seen:
+                continue  # a callback inside a function is analyzed as part of both
+            seen.add((line_num, finding['category']))
+            vulnerabilities.append({
+                'category': finding['category'],
+                'severity': 'HIGH',
+                'description': finding['description'],
+                'line': line_num,
+                'code': self.lines[line_num - 1].strip() if line_num <= len(self.lines) else ''
+            })
         
         return vulnerabilities
     
-    def detect_performance_issues(self) -> List[Dict]:
-        """Detect potential performance regressions"""
+    def taint_findings(self) -> Optional[List[Dict]]:
+        """Injection findings of the taint-lite dataflow (None when the language has no dataflow support)"""
+        tree = self.python_tree
+        if tree is not None:
+            if not any(hint in self.content for hint in _PY_SINK_HINTS):
+                return []
+            return sorted(python_taint_findings(tree, self.lines), key=lambda finding: finding['line'])
+        if self.plugin.function_pattern is not None and not self.plugin.indent_blocks:
+            if not any(hint in self.content for hint in _BRACE_SINK_HINTS):
+                return []
+            return sorted(brace_taint_findings(self.content, self.language, self.stats.functions,
+                                               self.brace_structure),
+                          key=lambda finding: finding['line'])
+        return None
+    
+    def detect_performance_issues(self, diff: bool = False) -> List[Dict]:
+        """
+        Detect potential performance regressions
+        
+        With diff, Python loops are also checked for loop-invariant calls;
+        that check is only reported for code a change introduced.
+        """
+        issues = []
+        
+        # Loop anti-patterns from the loop nesting tree, with exact line ranges
+        tree = self.python_tree
+        if tree is not None:
+            issues.extend(python_loop_issues(tree, self.lines, invariant_calls=diff))
+        elif self.plugin.loop_style:
+            issues.extend(brace_loop_issues(self.content, self.language, self.stats.functions,
+                                            self.brace_structure))
+        else:
+            issues.extend(self._regex_loop_issues())
+        
+        # Large functions (>100 lines)
+        for function in self.stats.functions:
+            if function.length > 100:
+                issues.append({
+                    'type': 'large_function',
+                    'severity': 'LOW',
+                    'description': f'Large function "{function.name}" ({function.length} lines) may impact performance',
+                    'line': function.line,
+                    'function': function.name,
+                    'suggestion': 'Consider breaking into smaller functions'
+                })
+        
+        return issues
+    
+    def _regex_loop_issues(self) -> List[Dict]:
+        """Line-pattern loop checks for files without a structural detector"""
         issues = []
         
         # Nested loops (O(n²))
-        for match in re.finditer(PERFORMANCE_PATTERNS['nested_loops'], self.content, re.MULTILINE):
-            line_num = self.content[:match.start()].count('\n') + 1
+        for match in _PERFORMANCE_REGEXES['nested_loops'].finditer(self.content):
+            line_num = self._line_at(match.start())
             issues.append({
                 'type': 'nested_loops',
                 'severity': 'MEDIUM',
                 'description': 'Nested loops detected - possible O(n²) complexity',
                 'line': line_num,
+                'code': self._code_at(line_num),
                 'suggestion': 'Consider using hash maps or optimizing the algorithm'
             })
         
         # N² pattern (iterating same collection twice nested)
-        for match in re.finditer(PERFORMANCE_PATTERNS['n_squared'], self.content, re.MULTILINE):
-            line_num = self.content[:match.start()].count('\n') + 1
+        for match in _PERFORMANCE_REGEXES['n_squared'].finditer(self.content):
+            line_num = self._line_at(match.start())
             issues.append({
                 'type': 'n_squared_iteration',
                 'severity': 'HIGH',
                 'description': 'O(n²) pattern detected - iterating same collection in nested loops',
                 'line': line_num,
+                'code': self._code_at(line_num),
                 'suggestion': 'Use hash set/map for O(n) lookup instead'
             })
         
-        # Large functions (>100 lines)
-        if self.language in LANGUAGE_PATTERNS:
-            pattern = LANGUAGE_PATTERNS[self.language].get('function', '')
-            if pattern:
-                function_starts = [(m.start(), m.group(1) or m.group(2)) for m in re.finditer(pattern, self.content)]
-                for i, (start, name) in enumerate(function_starts):
-                    end = function_starts[i + 1][0] if i + 1 < len(function_starts) else len(self.content)
-                    length = self.content[start:end].count('\n')
-                    if length > 100:
-                        line_num = self.content[:start].count('\n') + 1
-                        issues.append({
-                            'type': 'large_function',
-                            'severity': 'LOW',
-                            'description': f'Large function "{name}" ({length} lines) may impact performance',
-                            'line': line_num,
-                            'suggestion': 'Consider breaking into smaller functions'
-                        })
-        
         return issues
+    
+    def _code_at(self, line_num: int) -> str:
+        return self.lines[line_num - 1].strip() if line_num <= len(self.lines) else ''
+
+
+def _issue_key(issue: Dict) -> Tuple[str, str, str]:
+    """Line-number independent identity of a performance issue"""
+    return issue['type'], issue.get('function') or '', issue.get('code') or ''
+
+
+def _issue_lines(issue: Dict) -> str:
+    """'Line 12' or 'Lines 12-18' for issues that span a loop"""
+    end_line = issue.get('end_line') or issue['line']
+    return f"Lines {issue['line']}-{end_line}" if end_line > issue['line'] else f"Line {issue['line']}"
+
+
+def compare_performance(base: CodeAnalyzer, head: CodeAnalyzer) -> Dict:
+    """
+    Performance issues introduced between two versions of a file.
+    
+    Issues are matched by type and code (or function name), so moved code
+    is not reported again; functions that grew substantially are reported
+    as function_growth.
+    
+    Returns:
+        {'introduced': [...], 'resolved': int, 'severity_delta': int}
+    """
+    remaining = defaultdict(list)
+    for issue in base.detect_performance_issues(diff=True):
+        remaining[_issue_key(issue)].append(issue)
+    
+    introduced = []
+    for issue in head.detect_performance_issues(diff=True):
+        matched = remaining.get(_issue_key(issue))
+        if matched:
+            matched.pop()
+        else:
+            introduced.append({**issue, 'change': 'new'})
+    
+    base_lengths = defaultdict(deque)
+    for function in base.stats.functions:
+        base_lengths[function.name].append(function.length)
+    
+    for function in head.stats.functions:
+        if not base_lengths[function.name]:
+            continue
+        before = base_lengths[function.name].popleft()
+        growth = function.length - before
+        if growth >= FUNCTION_GROWTH_MIN_LINES and growth >= before * 0.25:
+            introduced.append({
+                'type': 'function_growth',
+                'severity': 'MEDIUM' if function.length > 100 else 'LOW',
+                'description': f'Function "{function.name}" grew from {before} to {function.length} lines',
+                'line': function.line,
+                'function': function.name,
+                'suggestion': 'Extract the new logic into helper functions',
+                'change': 'grown'
+            })
+    
+    resolved = [issue for issues in remaining.values() for issue in issues]
+    severity_delta = sum(SEVERITY_WEIGHTS[i['severity']] for i in introduced) - \
+        sum(SEVERITY_WEIGHTS[i['severity']] for i in resolved)
+    
+    return {'introduced': introduced, 'resolved': len(resolved), 'severity_delta': severity_delta}
+
+
+def read_base_content(file_path: str, base_ref: str) -> Optional[str]:
+    """File content at base_ref ('' when the file did not exist there, None if git fails)"""
+    try:
+        result = subprocess.run(['git', 'show', f'{base_ref}:{file_path}'], capture_output=True)
+    except OSError:
+        return None
+    if result.returncode != 0:
+        missing = b'does not exist' in result.stderr or b'exists on disk, but not in' in result.stderr
+        return '' if missing else None
+    return result.stdout.decode('utf-8', errors='ignore')
+
+
+def base_ref_exists(base_ref: str) -> bool:
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--verify', '--quiet', f'{base_ref}^{{commit}}'],
+                                capture_output=True)
+    except OSError:
+        return False
+    return result.returncode == 0
+
+
+def detect_regressions(file_path: str, base_ref: str) -> Optional[Dict]:
+    """Compare a file's performance issues against its version at base_ref"""
+    if not os.path.exists(file_path):
+        return None
+    
+    base_content = read_base_content(file_path, base_ref)
+    if base_content is None:
+        return None
+    
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        content = f.read()
+    
+    regressions = compare_performance(CodeAnalyzer(file_path, base_content), CodeAnalyzer(file_path, content))
+    regressions['base_ref'] = base_ref
+    return regressions
+
+
+def add_diff_issues(result: Dict):
+    """
+    Add the introduced issues only a diff detects (loop-invariant calls,
+    function_growth) to the result's performance issues, so every new
+    issue is also counted, reported and exported as an issue of the file
+    """
+    regressions = result.get('performance_regressions')
+    if not regressions:
+        return
+    
+    present = Counter(_issue_key(issue) for issue in result['performance_issues'])
+    extra = []
+    for issue in regressions['introduced']:
+        key = _issue_key(issue)
+        if present[key] > 0:
+            present[key] -= 1
+        else:
+            extra.append({name: value for name, value in issue.items() if name != 'change'})
+    if extra:
+        result['performance_issues'] = result['performance_issues'] + extra
 
 
 def analyze_file(file_path: str) -> Dict:
@@ -415,21 +2345,317 @@ def analyze_file(file_path: str) -> Dict:
     }
 
 
+# Below this many files, process startup costs more than parallelism saves
+PARALLEL_MIN_FILES = 8
+
+
+def resolve_workers(workers: Optional[str] = None) -> int:
+    """Worker count from the argument or ANALYZER_WORKERS ('auto' = usable CPUs)"""
+    value = str(workers or os.environ.get('ANALYZER_WORKERS', 'auto')).strip().lower()
+    if value == 'auto':
+        try:
+            return max(1, len(os.sched_getaffinity(0)))
+        except AttributeError:
+            return os.cpu_count() or 1
+    try:
+        return max(1, int(value))
+    except ValueError:
+        print(f"⚠️  Invalid worker count '{value}' - using 'auto'")
+        return resolve_workers('auto')
+
+
+def _analyze_parallel(items: List, workers: int, analyze=analyze_file, *args):
+    """
+    Analyze items in a process pool, yielding results in input order.
+    Items are dispatched in chunks so IPC overhead is paid per chunk, not per item.
+    Extra args are passed to every analyze call.
+    """
+    # fork is cheapest, but forking while other threads run (pipeline.py runs the
+    # docs stage next to analysis) can deadlock a child on a lock one of them held.
+    # Other start methods re-import the function, and this script may be loaded
+    # under a module name that is not importable: they go through analysis_worker,
+    # and start with a copy of the per-function cache a forked worker would inherit.
+    methods = multiprocessing.get_all_start_methods()
+    initializer, initargs = None, ()
+    if 'fork' in methods and threading.active_count() == 1:
+        context = multiprocessing.get_context('fork')
+    else:
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        analyze = partial(analysis_worker.call, analyze.__name__)
+        if _taint_cache:
+            initializer, initargs = partial(analysis_worker.call, 'load_taint_cache'), (dict(_taint_cache),)
+    chunksize = max(1, len(items) // (workers * 4))
+    
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=initializer, initargs=initargs) as pool:
+        extra = [[arg] * len(items) for arg in args]
+        yield from pool.map(analyze, items, *extra, chunksize=chunksize)
+
+
+def analyzer_version() -> str:
+    """Results are reusable only while the analyzer and language plugin sources are unchanged"""
+    sources = [Path(__file__), Path(__file__).parent / 'language_registry.py'] + sorted(PLUGINS_DIR.glob('*.py'))
+    return hash_text(''.join(script_version(str(path.resolve())) for path in sources))[:16]
+
+
+def _analyze_entry(entry: Tuple[str, Optional[str]], version: str,
+                   base_ref: Optional[str]) -> Tuple[Optional[Dict], bool, Dict[str, List]]:
+    """
+    Result for one (file, blob): from the store when this content was analyzed
+    before, otherwise analyzed now; regressions against base_ref are added.
+    
+    Returns:
+        (result, fresh, new per-function cache entries) - fresh results and
+        new entries still have to be stored
+    """
+    file_path, blob = entry
+    result = get_store().get(version, blob, file_path) if blob else None
+    fresh = result is None
+    if fresh:
+        result = analyze_file(file_path)
+    
+    # Regressions depend on the base version too, so they are never stored
+    if result and base_ref:
+        regression = detect_regressions(file_path, base_ref)
+        if regression is not None:
+            result['performance_regressions'] = regression
+    
+    return result, fresh, take_taint_additions()
+
+
+def _print_result(result: Dict):
+    """Per-file summary lines"""
+    score = result['quality_score']
+    print(f"   Quality: {score['total']}/100 ({score['grade']})")
+    print(f"   - Documentation: {score['documentation']}/30")
+    print(f"   - Complexity: {score['complexity']}/30")
+    print(f"   - Maintainability: {score['maintainability']}/40")
+    
+    vulns = result['security_vulnerabilities']
+    if vulns:
+        print(f"   ⚠️  {len(vulns)} security issue(s) found")
+    if result.get('allowlisted_secrets'):
+        print(f"   🔕 {result['allowlisted_secrets']} allowlisted secret(s) suppressed")
+    
+    perf = result['performance_issues']
+    if perf:
+        print(f"   🐌 {len(perf)} performance issue(s) found")
+    
+    regressions = result.get('performance_regressions')
+    if regressions and regressions['introduced']:
+        print(f"   📉 {len(regressions['introduced'])} new vs {regressions['base_ref']} "
+              f"(severity delta {regressions['severity_delta']:+d})")
+
+
+def iter_analysis(code_files: List[str], workers: Optional[str] = None,
+                  base_ref: Optional[str] = None) -> Iterator[Tuple[Dict, Optional[str]]]:
+    """
+    Analyze code files, yielding (result, blob) in input order as each
+    completes and printing a per-file summary.
+    
+    Files whose content was analyzed before (same blob, same analyzer
+    version) are served from the result store; only the rest are analyzed,
+    in parallel for large sets. With a base_ref (default $ANALYSIS_BASE_REF
+    or HEAD~1), each result also gets the performance regressions against
+    that commit. Secrets accepted in the allowlist are dropped from every
+    result. Nothing is accumulated, so callers that stream the results
+    onward keep memory flat.
+    """
+    store = get_store()
+    version = analyzer_version()
+    allowlist = load_secret_allowlist()
+    # Loaded before the pool forks, so workers start with every known function
+    load_taint_cache(store.load_functions(version))
+    functions_added = 0
+    
+    entries = [(file_path, blob_hash(file_path)) for file_path in code_files]
+    reused = sum(1 for file_path, blob in entries if blob and store.has(version, blob, file_path))
+    
+    base_ref = base_ref or os.environ.get('ANALYSIS_BASE_REF', 'HEAD~1')
+    if not base_ref_exists(base_ref):
+        print(f"⚠️  Base commit {base_ref} not available - skipping performance regression detection\n")
+        base_ref = None
+    
+    # Stored results are cheap unless regressions have to be computed for them too
+    work = len(entries) if base_ref else len(entries) - reused
+    workers = min(resolve_workers(workers), max(1, work))
+    parallel = workers > 1 and work >= PARALLEL_MIN_FILES
+    mode = f"{workers} workers" if parallel else "1 worker"
+    print(f"Analyzing {len(entries) - reused} files ({mode}), {reused} unchanged file(s) reused...\n")
+    
+    if parallel:
+        outcomes = _analyze_parallel(entries, workers, _analyze_entry, version, base_ref)
+    else:
+        outcomes = (_analyze_entry(entry, version, base_ref) for entry in entries)
+    
+    for (file_path, blob), (result, fresh, taint_added) in zip(entries, outcomes):
+        load_taint_cache(taint_added)
+        functions_added += len(taint_added)
+        print(f"📊 Analyzing: {file_path}")
+        if not result:
+            continue
+        
+        if fresh and blob:
+            stored = {key: value for key, value in result.items() if key != 'performance_regressions'}
+            store.put(version, blob, stored)
+        
+        add_diff_issues(result)
+        apply_secret_allowlist(result, allowlist)
+        _print_result(result)
+        print()
+        yield result, blob
+    
+    if functions_added:
+        store.save_functions(version, _taint_cache)
+
+
+def analyze_files(code_files: List[str], workers: Optional[str] = None,
+                  base_ref: Optional[str] = None) -> List[Dict]:
+    """Analyze code files and print a per-file summary (see iter_analysis)"""
+    return [result for result, _ in iter_analysis(code_files, workers, base_ref)]
+
+
+class HistoryRecorder:
+    """
+    Streams one run into the history database. Earlier runs are back-filled
+    by the `analysis_history.py import` command, not here. History is
+    auxiliary: a database error stops recording, not the analysis.
+    """
+    
+    def __init__(self, run_name: str, commit: str, timestamp: str):
+        self.timestamp = timestamp
+        self.history = None
+        try:
+            self.history = AnalysisHistory()
+            self.run_id = self.history.start_run(run_name, commit, timestamp)
+        except sqlite3.Error as e:
+            self._fail(e)
+    
+    def _fail(self, error: Exception):
+        print(f"⚠️  Could not record analysis history: {error}")
+        if self.history is not None:
+            self.history.conn.rollback()
+            self.history.close()
+            self.history = None
+    
+    def add(self, result: Dict):
+        if self.history is None:
+            return
+        try:
+            self.history.add_result(self.run_id, self.timestamp, result)
+        except sqlite3.Error as e:
+            self._fail(e)
+    
+    def close(self):
+        if self.history is None:
+            return
+        try:
+            self.history.conn.commit()
+        except sqlite3.Error as e:
+            self._fail(e)
+            return
+        self.history.close()
+        self.history = None
+
+
+def _introduced_indexes(result: Dict) -> Optional[Set[int]]:
+    """Indexes of the result's performance issues that are new against the base commit"""
+    regressions = result.get('performance_regressions')
+    if regressions is None:
+        return None
+    
+    # compare_performance matches the earlier occurrences of a repeated issue,
+    # so the new ones are the last of each key
+    new = Counter(_issue_key(issue) for issue in regressions['introduced'])
+    indexes = set()
+    for index in range(len(result['performance_issues']) - 1, -1, -1):
+        key = _issue_key(result['performance_issues'][index])
+        if new[key] > 0:
+            new[key] -= 1
+            indexes.add(index)
+    return indexes
+
+
+# Root outputs read by notifications, PR comments and code scanning
+RESULTS_JSONL = Path('analysis_results.jsonl')
+RESULTS_SARIF = Path('analysis_results.sarif')
+REPORT_FILE = Path('analysis_report.md')
+
+
+def write_analysis(analyzed: Iterable[Tuple[Dict, Optional[str]]]) -> Tuple[Path, Dict]:
+    """
+    Stream (result, blob) pairs into every run output, one result at a time.
+    
+    Each result goes to analysis_results.jsonl, analysis_results.sarif, the
+    history database and the report aggregates as it arrives. The run is then
+    recorded in the result store (manifest plus the delta against the
+    previous state), results of older analyzer versions are dropped, and
+    report.md is written to the run directory, with a root copy for PR comments.
+    
+    Returns:
+        (run directory, run summary)
+    """
+    commit = os.environ.get('GITHUB_SHA', 'unknown')
+    now = datetime.now()
+    run_name = f"{now.strftime('%Y%m%d-%H%M%S')}_{commit[:7]}"
+    timestamp = now.isoformat()
+    version = analyzer_version()
+    
+    report = SummaryReport()
+    history = HistoryRecorder(run_name, commit, timestamp)
+    files = {}
+    try:
+        with JsonLinesWriter(RESULTS_JSONL) as jsonl, \
+                SarifWriter(RESULTS_SARIF, 'code-analyzer', version) as sarif:
+            for result, blob in analyzed:
+                jsonl.write(result)
+                sarif.add_file(result, _introduced_indexes(result))
+                report.add(result)
+                history.add(result)
+                files[result['file']] = blob
+            
+            summary = {'commit': commit, 'timestamp': timestamp, **report.totals()}
+            sarif.properties = summary
+    finally:
+        history.close()
+    
+    store = get_store()
+    analysis_dir = store.record_run(run_name, version, files, summary)
+    pruned = store.prune_versions(version)
+    if pruned:
+        print(f"🧹 Removed results of {pruned} old analyzer version(s)")
+    
+    report_file = analysis_dir / 'report.md'
+    report.write(report_file)
+    shutil.copy(report_file, REPORT_FILE)
+    
+    return analysis_dir, summary
+
+
+def save_analysis(results: List[Dict]) -> Path:
+    """Record already collected results as a run (see write_analysis)"""
+    analysis_dir, _ = write_analysis((result, blob_hash(result['file'])) for result in results)
+    return analysis_dir
+
+
 def main():
+    parser = argparse.ArgumentParser(description='Analyze changed code files')
+    parser.add_argument('--workers', help="Worker processes: a number or 'auto' (default: $ANALYZER_WORKERS or auto)")
+    parser.add_argument('--base', help='Base commit for regression detection (default: $ANALYSIS_BASE_REF or HEAD~1)')
+    parser.add_argument('--allow-secret', nargs='+', metavar='FINGERPRINT',
+                        help=f'Accept reported secrets by fingerprint (stored in {SECRETS_ALLOWLIST}) and exit')
+    parser.add_argument('--reason', default='accepted', help='Why the secrets passed to --allow-secret are accepted')
+    args = parser.parse_args()
+    
+    if args.allow_secret:
+        added = allow_secrets(args.allow_secret, args.reason)
+        print(f"✓ {added} secret fingerprint(s) added to {SECRETS_ALLOWLIST}")
+        return
+    
     print("="*80)
     print("ADVANCED CODE ANALYZER")
     print("="*80)
     
-    # Get commit info
-    commit_sha = os.environ.get('GITHUB_SHA', 'unknown')[:7]
-    timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
-    
-    # Create analysis directory with commit info
-    analysis_dir = Path('code-analysis') / f"{timestamp}_{commit_sha}"
-    analysis_dir.mkdir(parents=True, exist_ok=True)
-    
-    print(f"Analysis directory: {analysis_dir}\n")
-    
     # Read changed files
     if not os.path.exists('changed_files.txt'):
         print("No changed files detected")
@@ -438,145 +2664,182 @@ def main():
     with open('changed_files.txt', 'r') as f:
         changed_files = [line.strip() for line in f if line.strip()]
     
-    code_extensions = {'.ts', '.js', '.tsx', '.jsx', '.py', '.go', '.rs', '.java', '.cpp', '.cc', '.c', '.h', '.hpp'}
-    code_files = [f for f in changed_files if Path(f).suffix in code_extensions]
+    extensions = code_extensions()
+    code_files = [f for f in changed_files if Path(f).suffix.lower() in extensions]
     
     if not code_files:
         print("No code files to analyze")
         sys.exit(0)
     
-    print(f"Analyzing {len(code_files)} files...\n")
+    analysis_dir, summary = write_analysis(iter_analysis(code_files, args.workers, args.base))
     
-    results = []
-    total_vulns = 0
-    total_perf_issues = 0
+    print("="*80)
+    print("ANALYSIS COMPLETE")
+    print("="*80)
+    print(f"✓ {summary['files']} files analyzed")
+    print(f"⚠️  {summary['security_vulnerabilities']} security vulnerabilities found")
+    print(f"🐌 {summary['performance_issues']} performance issues found")
+    print(f"📂 Analysis saved to: {analysis_dir}")
+    print(f"📄 Report: {analysis_dir / 'report.md'}")
+    print(f"📊 Manifest: {analysis_dir / 'manifest.json'}")
+    print(f"🔎 SARIF: {RESULTS_SARIF}")
+
+
+class SummaryReport:
+    """
+    Markdown summary built from running aggregates. Results are added one at
+    a time; only totals, one score row per file and the rendered section text
+    (spooled to disk once it grows) are kept, never the results themselves.
+    """
     
-    for file_path in code_files:
-        print(f"📊 Analyzing: {file_path}")
-        result = analyze_file(file_path)
+    SPOOL_SIZE = 1 << 20
+    
+    def __init__(self):
+        self.files = 0
+        self.score_sum = 0
+        self.vulnerabilities = 0
+        self.performance_issues = 0
+        self.diffed = 0
+        self.regressions = 0
+        self.severity_delta = 0
+        self.base_ref = None
+        self._scores = []
+        self._security = self._spool()
+        self._regressions = self._spool()
+        self._performance = self._spool()
+    
+    def _spool(self):
+        return tempfile.SpooledTemporaryFile(max_size=self.SPOOL_SIZE, mode='w+', encoding='utf-8')
+    
+    def add(self, result: Dict):
+        """Fold one file's result into the aggregates and sections"""
+        name = Path(result['file']).name
+        score = result['quality_score']
+        self.files += 1
+        self.score_sum += score['total']
+        self._scores.append((score['total'], name, score['grade'], score['documentation'],
+                             score['complexity'], score['maintainability']))
         
-        if result:
-            results.append(result)
-            
-            # Print quality score
-            score = result['quality_score']
-            print(f"   Quality: {score['total']}/100 ({score['grade']})")
-            print(f"   - Documentation: {score['documentation']}/30")
-            print(f"   - Complexity: {score['complexity']}/30")
-            print(f"   - Maintainability: {score['maintainability']}/40")
-            
-            # Print vulnerabilities
-            vulns = result['security_vulnerabilities']
-            if vulns:
-                print(f"   ⚠️  {len(vulns)} security issue(s) found")
-                total_vulns += len(vulns)
-            
-            # Print performance issues
-            perf = result['performance_issues']
-            if perf:
-                print(f"   🐌 {len(perf)} performance issue(s) found")
-                total_perf_issues += len(perf)
-            
-            print()
+        vulns = result['security_vulnerabilities']
+        self.vulnerabilities += len(vulns)
+        if vulns:
+            self._security.write(f"### {name}\n\n")
+            for vuln in vulns:
+                fingerprint = f" (fingerprint `{vuln['fingerprint']}`)" if 'fingerprint' in vuln else ''
+                self._security.write(f"**{vuln['severity']}** - Line {vuln['line']}: {vuln['description']}{fingerprint}\n")
+                self._security.write(f"```\n{vuln['code']}\n```\n\n")
+        
+        regressions = result.get('performance_regressions')
+        if regressions is not None:
+            self.diffed += 1
+            self.regressions += len(regressions['introduced'])
+            self.severity_delta += regressions['severity_delta']
+            self.base_ref = self.base_ref or regressions['base_ref']
+            if regressions['introduced']:
+                self._regressions.write(f"### {name} (severity delta {regressions['severity_delta']:+d})\n\n")
+                self._write_issues(self._regressions, regressions['introduced'])
+        
+        perf = result['performance_issues']
+        self.performance_issues += len(perf)
+        if perf:
+            self._performance.write(f"### {name}\n\n")
+            self._write_issues(self._performance, perf)
     
-    # Save results to timestamped directory
-    results_file = analysis_dir / 'results.json'
-    with open(results_file, 'w') as f:
-        json.dump(results, f, indent=2)
+    @staticmethod
+    def _write_issues(section, issues: List[Dict]):
+        for issue in issues:
+            section.write(f"**{issue['severity']}** - {_issue_lines(issue)}: {issue['description']}\n")
+            section.write(f"*Suggestion: {issue['suggestion']}*\n\n")
     
-    # Generate summary report in timestamped directory
-    report_file = analysis_dir / 'report.md'
-    generate_summary_report(results, report_file)
+    @property
+    def average_score(self) -> float:
+        return self.score_sum / self.files if self.files else 0
     
-    # Create symlinks/copies for easy access (for notifications)
-    latest_report = Path('analysis_report.md')
-    latest_results = Path('analysis_results.json')
+    def totals(self) -> Dict:
+        """Run totals for the manifest, SARIF properties and notifications"""
+        return {
+            'files': self.files,
+            'average_score': round(self.average_score, 1),
+            'security_vulnerabilities': self.vulnerabilities,
+            'performance_issues': self.performance_issues,
+            'new_performance_issues': self.regressions if self.diffed else None
+        }
     
-    # Copy to root for backward compatibility
-    import shutil
-    shutil.copy(report_file, latest_report)
-    shutil.copy(results_file, latest_results)
+    def write(self, output_file: Path):
+        """Write the markdown report"""
+        commit_sha = os.environ.get('GITHUB_SHA', 'unknown')[:7]
+        commit_url = f"https://github.com/{os.environ.get('GITHUB_REPOSITORY', '')}/commit/{os.environ.get('GITHUB_SHA', '')}"
+        
+        with open(output_file, 'w') as f:
+            f.write("# Code Analysis Report\n\n")
+            f.write(f"*Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n\n")
+            f.write(f"**Commit:** [`{commit_sha}`]({commit_url})\n\n")
+            
+            # Overall statistics
+            f.write("## 📊 Overall Statistics\n\n")
+            f.write(f"- **Files Analyzed:** {self.files}\n")
+            f.write(f"- **Average Quality Score:** {self.average_score:.1f}/100\n")
+            f.write(f"- **Security Vulnerabilities:** {self.vulnerabilities}\n")
+            f.write(f"- **Performance Issues:** {self.performance_issues}\n")
+            if self.diffed:
+                f.write(f"- **New Performance Issues:** {self.regressions} (severity delta {self.severity_delta:+d})\n")
+            f.write("\n")
+            
+            # Quality scores by file
+            f.write("## 📈 Quality Scores\n\n")
+            f.write("| File | Score | Grade | Doc | Complexity | Maint |\n")
+            f.write("|------|-------|-------|-----|------------|-------|\n")
+            for total, name, grade, documentation, complexity, maintainability in \
+                    sorted(self._scores, key=lambda row: row[0], reverse=True):
+                f.write(f"| {name} | {total}/100 | {grade} | {documentation}/30 | {complexity}/30 | {maintainability}/40 |\n")
+            
+            # Security vulnerabilities
+            if self.vulnerabilities > 0:
+                f.write("\n## 🚨 Security Vulnerabilities\n\n")
+                self._copy(self._security, f)
+            
+            # Performance regressions (only what this change introduced)
+            if self.regressions > 0:
+                f.write(f"\n## 📉 Performance Regressions (vs `{self.base_ref}`)\n\n")
+                self._copy(self._regressions, f)
+            
+            # Performance issues (pre-existing ones included; collapsed when regressions are known)
+            if self.performance_issues > 0:
+                f.write("\n## 🐌 Performance Issues\n\n")
+                if self.diffed:
+                    f.write("<details>\n<summary>All performance issues, including pre-existing code</summary>\n\n")
+                self._copy(self._performance, f)
+                if self.diffed:
+                    f.write("</details>\n")
+            
+            # Recommendations
+            f.write("\n## 💡 Recommendations\n\n")
+            
+            if self.average_score < 70:
+                f.write("- 📝 **Improve documentation coverage** - Add comments explaining complex logic\n")
+            
+            if self.vulnerabilities > 0:
+                f.write(f"- 🔒 **Address {self.vulnerabilities} security vulnerabilities** - Review flagged issues\n")
+            
+            if self.regressions > 0:
+                f.write(f"- 📉 **Fix {self.regressions} newly introduced performance issues** before merging\n")
+            elif self.performance_issues > 0:
+                f.write(f"- ⚡ **Optimize {self.performance_issues} performance issues** - Consider algorithmic improvements\n")
     
-    print("="*80)
-    print("ANALYSIS COMPLETE")
-    print("="*80)
-    print(f"✓ {len(results)} files analyzed")
-    print(f"⚠️  {total_vulns} security vulnerabilities found")
-    print(f"🐌 {total_perf_issues} performance issues found")
-    print(f"📂 Analysis saved to: {analysis_dir}")
-    print(f"📄 Report: {report_file}")
-    print(f"📊 Data: {results_file}")
+    @staticmethod
+    def _copy(section, f):
+        section.seek(0)
+        shutil.copyfileobj(section, f)
+        section.seek(0, os.SEEK_END)
 
 
-def generate_summary_report(results: List[Dict], output_file: Path):
+def generate_summary_report(results: Iterable[Dict], output_file: Path):
     """Generate markdown summary report"""
-    commit_sha = os.environ.get('GITHUB_SHA', 'unknown')[:7]
-    commit_url = f"https://github.com/{os.environ.get('GITHUB_REPOSITORY', '')}/commit/{os.environ.get('GITHUB_SHA', '')}"
-    
-    report = "# Code Analysis Report\n\n"
-    report += f"*Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n\n"
-    report += f"**Commit:** [`{commit_sha}`]({commit_url})\n\n"
-    
-    # Overall statistics
-    avg_score = sum(r['quality_score']['total'] for r in results) / len(results) if results else 0
-    total_vulns = sum(len(r['security_vulnerabilities']) for r in results)
-    total_perf = sum(len(r['performance_issues']) for r in results)
-    
-    report += "## 📊 Overall Statistics\n\n"
-    report += f"- **Files Analyzed:** {len(results)}\n"
-    report += f"- **Average Quality Score:** {avg_score:.1f}/100\n"
-    report += f"- **Security Vulnerabilities:** {total_vulns}\n"
-    report += f"- **Performance Issues:** {total_perf}\n\n"
-    
-    # Quality scores by file
-    report += "## 📈 Quality Scores\n\n"
-    report += "| File | Score | Grade | Doc | Complexity | Maint |\n"
-    report += "|------|-------|-------|-----|------------|-------|\n"
-    
-    for result in sorted(results, key=lambda x: x['quality_score']['total'], reverse=True):
-        score = result['quality_score']
-        name = Path(result['file']).name
-        report += f"| {name} | {score['total']}/100 | {score['grade']} | {score['documentation']}/30 | {score['complexity']}/30 | {score['maintainability']}/40 |\n"
-    
-    # Security vulnerabilities
-    if total_vulns > 0:
-        report += "\n## 🚨 Security Vulnerabilities\n\n"
-        for result in results:
-            vulns = result['security_vulnerabilities']
-            if vulns:
-                report += f"### {Path(result['file']).name}\n\n"
-                for vuln in vulns:
-                    report += f"**{vuln['severity']}** - Line {vuln['line']}: {vuln['description']}\n"
-                    report += f"```\n{vuln['code']}\n```\n\n"
-    
-    # Performance issues
-    if total_perf > 0:
-        report += "\n## 🐌 Performance Issues\n\n"
-        for result in results:
-            perf = result['performance_issues']
-            if perf:
-                report += f"### {Path(result['file']).name}\n\n"
-                for issue in perf:
-                    report += f"**{issue['severity']}** - Line {issue['line']}: {issue['description']}\n"
-                    report += f"*Suggestion: {issue['suggestion']}*\n\n"
-    
-    # Recommendations
-    report += "\n## 💡 Recommendations\n\n"
-    
-    if avg_score < 70:
-        report += "- 📝 **Improve documentation coverage** - Add comments explaining complex logic\n"
-    
-    if total_vulns > 0:
-        report += f"- 🔒 **Address {total_vulns} security vulnerabilities** - Review flagged issues\n"
-    
-    if total_perf > 0:
-        report += f"- ⚡ **Optimize {total_perf} performance issues** - Consider algorithmic improvements\n"
-    
-    # Save report to specified file
-    with open(output_file, 'w') as f:
-        f.write(report)
+    report = SummaryReport()
+    for result in results:
+        report.add(result)
+    report.write(output_file)
 
 
 if __name__ == '__main__':
-    from datetime import datetime
     main()
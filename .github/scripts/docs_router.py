@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Deterministic documentation routing from .github/docs-routing.yml
+Every route's glob is compiled once into a single anchored regex, so a file
+is routed in one match over all patterns (first listed route wins) and only
+files no route covers are left to the LLM.
+
+Globs follow .gitignore conventions: '*' and '?' stay within a path segment,
+'**' spans segments, and a glob matching a directory also matches every file
+below it ('**/auth*' covers both 'src/auth.ts' and 'src/auth/session.ts').
+"""
+
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+ROUTING_FILE = Path(os.environ.get('DOCS_ROUTING_FILE', '.github/docs-routing.yml'))
+
+
+class Route(NamedTuple):
+    glob: str
+    pages: Optional[str]  # page path under the pages dir
+    wiki: Optional[str]   # wiki page name
+
+
+def glob_to_regex(glob: str) -> str:
+    """Regex source (unanchored) for a glob in .gitignore syntax"""
+    out = []
+    i = 0
+    while i < len(glob):
+        c = glob[i]
+        if glob.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+            continue
+        if glob.startswith('**', i):
+            out.append('.*')
+            i += 2
+            continue
+        if c == '*':
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            end = glob.find(']', i + 2)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = glob[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                out.append('[' + body.replace('\\', '\\\\') + ']')
+                i = end
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+
+class DocsRouter:
+    """
+    Routes from docs-routing.yml plus its strategy flags
+
+    route() is the pre-LLM lookup and counts hits and misses for the report;
+    match() is the same lookup without counting (used by fallbacks). Safe to
+    use from several threads.
+    """
+
+    def __init__(self, routing_file: Path = ROUTING_FILE):
+        self.routes: List[Route] = []
+        self.strategy: Dict = {'prefer_rules': True, 'llm_fallback': True}
+        self.hits = 0
+        self.misses = 0
+        self._pattern = None
+        self._lock = threading.Lock()
+        self._load(Path(routing_file))
+
+    def _load(self, routing_file: Path):
+        if not routing_file.exists():
+            return
+        try:
+            import yaml
+        except ImportError:
+            print(f"⚠️  PyYAML not installed, ignoring {routing_file}")
+            return
+        try:
+            with open(routing_file, 'r', encoding='utf-8') as f:
+                config = yaml.safe_load(f) or {}
+        except (OSError, yaml.YAMLError) as e:
+            print(f"⚠️  Could not read {routing_file}: {e}")
+            return
+
+        self.strategy.update(config.get('strategy') or {})
+        for entry in config.get('routes') or []:
+            if isinstance(entry, dict) and entry.get('glob') and (entry.get('pages') or entry.get('wiki')):
+                self.routes.append(Route(str(entry['glob']), entry.get('pages'), entry.get('wiki')))
+        if self.routes:
+            # One group per route; alternation tries them in order, so the first listed route wins
+            self._pattern = re.compile('|'.join(
+                f'(?P<r{i}>{glob_to_regex(route.glob.lstrip("/"))}(?:/.*)?)'
+                for i, route in enumerate(self.routes)
+            ))
+        print(f"✓ Loaded {len(self.routes)} routing rules from {routing_file}")
+
+    @property
+    def prefer_rules(self) -> bool:
+        return bool(self.routes) and bool(self.strategy.get('prefer_rules', True))
+
+    @property
+    def llm_fallback(self) -> bool:
+        return bool(self.strategy.get('llm_fallback', True))
+
+    def match(self, file_path: str) -> Optional[Route]:
+        """First route whose glob matches the file's path, if any"""
+        if self._pattern is None:
+            return None
+        found = self._pattern.fullmatch(Path(file_path).as_posix())
+        return self.routes[int(found.lastgroup[1:])] if found else None
+
+    def route(self, file_path: str, target: str) -> Optional[Route]:
+        """
+        Pre-LLM lookup for a 'pages' or 'wiki' target
+
+        Returns:
+            The matching route, or None when no route covers the file for that target
+        """
+        route = self.match(file_path)
+        if route is not None and not getattr(route, target):
+            route = None
+        with self._lock:
+            if route is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return route
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def report_line(self) -> str:
+        """Markdown line for the run summaries"""
+        total = self.hits + self.misses
+        return (f"**Routing:** {self.hits}/{total} files routed by docs-routing.yml "
+                f"({self.hit_rate():.0%}), {self.misses} unrouted")
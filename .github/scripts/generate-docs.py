@@ -18,11 +18,18 @@ from pathlib import Path
 from datetime import datetime
 import requests
 
+sys.path.insert(0, str(Path(__file__).parent))
+from stage_cache import get_cache, hash_text
+from language_registry import code_extensions
+
 GROQ_API_KEY = os.environ.get('GROQ_API_KEY')
 GROQ_API_URL = 'https://api.groq.com/openai/v1/chat/completions'
 MODEL = 'openai/gpt-oss-20b'  # Default (balanced speed and quality)
 # MODEL = 'openai/gpt-oss-120b'  # More powerful but slower and more expensive
 
+# Every extension of a registered language, including languages/ plugins
+CODE_EXTENSIONS = code_extensions()
+
 def extract_symbols_detailed(content):
     """Extract symbols with detailed information"""
     symbols = []
@@ -129,10 +136,12 @@ def analyze_cross_file_impact(files_data):
     
     # Find references to changed symbols in other files
     for changed_file, content in files_data.items():
+        # A whole-word match of a symbol is exactly one of the file's word tokens
+        words = set(re.findall(r'\w+', content))
         for symbol_name, symbol_info in all_symbols.items():
             if symbol_info['file'] != changed_file:
                 # Check if changed file references symbols from other files
-                if re.search(rf'\b{symbol_name}\b', content):
+                if symbol_name in words:
                     impacts.append({
                         'changed_file': Path(changed_file).name,
                         'affects_file': Path(symbol_info['file']).name,
@@ -180,10 +189,15 @@ def generate_changelog_entry(file_path, old_content, new_content, breaking_info)
     return '\n'.join(entry) if entry else None
 
 def generate_documentation(file_context, file_path):
-    """Generate documentation using Groq API"""
+    """
+    Generate documentation using Groq API
+
+    Returns:
+        (markdown, ok) - on failure the markdown is an error note and ok is False
+    """
     if not GROQ_API_KEY:
         print("ERROR: GROQ_API_KEY not set")
-        return "Documentation generation failed: No API key"
+        return "Documentation generation failed: No API key", False
     
     prompt = f"""Generate comprehensive API documentation for this code file.
 
@@ -218,11 +232,11 @@ Be thorough but concise. Format as GitHub-flavored Markdown."""
         )
         
         if response.status_code == 200:
-            return response.json()['choices'][0]['message']['content']
+            return response.json()['choices'][0]['message']['content'], True
         else:
-            return f"Error generating docs: {response.status_code}"
+            return f"Error generating docs: {response.status_code}", False
     except Exception as e:
-        return f"Error: {e}"
+        return f"Error: {e}", False
 
 def generate_impact_analysis(impacts, file_list):
     """Generate cross-file impact analysis"""
@@ -259,13 +273,28 @@ def main():
     with open('changed_files.txt', 'r') as f:
         changed_files = [line.strip() for line in f if line.strip()]
     
-    code_extensions = {'.ts', '.js', '.tsx', '.jsx', '.py', '.go', '.rs', '.java', '.cpp', '.cc', '.c', '.h', '.hpp'}
-    code_files = [f for f in changed_files if Path(f).suffix in code_extensions]
+    code_files = filter_code_files(changed_files)
     
     if not code_files:
         print("No code files changed")
         sys.exit(0)
     
+    if generate_docs(code_files) is None:
+        print("\nNo files to process")
+        sys.exit(0)
+
+def filter_code_files(changed_files):
+    """Keep only files with a supported source extension"""
+    return [f for f in changed_files if Path(f).suffix.lower() in CODE_EXTENSIONS]
+
+def generate_docs(code_files):
+    """
+    Generate docs, changelog and PR comment for the given code files.
+    
+    Returns:
+        Dict with doc_files, breaking_changes, changelog_entries, impacts
+        and pr_comment, or None if none of the files could be read
+    """
     print(f"Processing {len(code_files)} changed files\n")
     
     # Read files and get diffs
@@ -305,8 +334,7 @@ def main():
             print(f"  ERROR: {file_path} - {e}")
     
     if not files_data:
-        print("\nNo files to process")
-        sys.exit(0)
+        return None
     
     # Detect breaking changes
     print("\n" + "="*80)
@@ -367,8 +395,21 @@ def main():
         
         diff_context += f"```typescript\n{content}\n```\n\n"
         
-        # Generate documentation
-        doc_content = generate_documentation(diff_context, file_path)
+        # Generate documentation (reused from the stage cache if inputs are unchanged)
+        cache = get_cache()
+        cache_key = cache.key('docs', {
+            'content': hash_text(content),
+            'old_content': hash_text(old_content),
+            'diff': hash_text(file_diffs.get(file_path))
+        }, config={'model': MODEL, 'file': file_path}, script=__file__)
+        doc_content = cache.get('docs', cache_key)
+        
+        if doc_content is None:
+            doc_content, ok = generate_documentation(diff_context, file_path)
+            if ok:
+                cache.put('docs', cache_key, doc_content)
+        else:
+            print(f"   ✓ Using cached documentation")
         
         # Save to docs folder
         doc_filename = Path(file_path).stem + '.md'
@@ -440,6 +481,15 @@ def main():
     print(f"  ✓ PR comment generated")
     if breaking_changes_detected:
         print(f"  ⚠️  {len(all_breaking_changes)} breaking changes detected")
+    
+    return {
+        'code_files': code_files,
+        'doc_files': doc_files_created,
+        'breaking_changes': all_breaking_changes,
+        'changelog_entries': changelog_entries,
+        'impacts': impacts,
+        'pr_comment': pr_comment
+    }
 
 def update_changelog(entries):
     """Update or create CHANGELOG.md"""
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Language plugin registry for code-analyzer
+Each language registers its extensions, complexity keywords, function pattern
+and lexer syntax as raw strings. Patterns are compiled on first use of the
+language and shared by every file analyzed in the process, so the per-file
+cost never includes regex compilation. Extra languages are plugin modules in
+languages/, imported the first time a lookup misses the built-ins.
+"""
+
+import re
+import importlib.util
+from pathlib import Path
+from functools import cached_property
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+PLUGINS_DIR = Path(__file__).parent / 'languages'
+
+# Reusable lexer pieces
+HASH_COMMENT = r'#[^\n]*'
+C_COMMENT = r'//[^\n]*|/\*[\s\S]*?(?:\*/|\Z)'
+DOUBLE_QUOTED = r'"(?:\\.|[^"\\\n])*"?'
+SINGLE_QUOTED = r"'(?:\\.|[^'\\\n])*'?"
+BACKTICK = r'`(?:\\.|[^`\\])*`?'
+TRIPLE_QUOTED = r'"""[\s\S]*?(?:"""|\Z)'
+# Char literals only, so Rust lifetimes ('a) stay code
+CHAR_LITERAL = r"'(?:\\.|[^'\\\n]){1,4}'"
+
+
+@dataclass
+class LanguagePlugin:
+    name: str
+    extensions: List[str] = field(default_factory=list)
+    complexity_keywords: List[str] = field(default_factory=list)
+    function: Optional[str] = None    # definition pattern, name in the first matching group
+    comment: str = C_COMMENT
+    string: str = DOUBLE_QUOTED + '|' + CHAR_LITERAL
+    indent_blocks: bool = False       # blocks by indentation (python) instead of braces
+    loop_style: Optional[str] = None  # brace loop headers: 'paren' (for (...) {) or 'bare' (for x in y {)
+    loop_calls: List[Tuple[str, str]] = field(default_factory=list)  # extra (issue type, call pattern) checked in loops
+
+    @cached_property
+    def lexer(self) -> 're.Pattern':
+        """
+        Token pattern for the single-pass scanner. Only tokens that change lexical
+        state (newlines, comments, strings, brackets) or feed metrics (complexity
+        keywords) are matched; everything in between is plain code.
+        """
+        keyword = r'\b(?:' + '|'.join(self.complexity_keywords) + r')\b' if self.complexity_keywords else r'(?!)'
+        return re.compile(
+            r'(?P<nl>\n)|(?P<comment>' + self.comment + r')|(?P<string>' + self.string + r')'
+            r'|(?P<open>[{(\[])|(?P<close>[})\]])|(?P<kw>' + keyword + r')'
+        )
+
+    @cached_property
+    def function_pattern(self) -> Optional['re.Pattern']:
+        return re.compile(self.function) if self.function else None
+
+    @cached_property
+    def loop_call_rules(self) -> List[Tuple[str, 're.Pattern']]:
+        return [(issue_type, re.compile(pattern)) for issue_type, pattern in self.loop_calls]
+
+    @property
+    def supported(self) -> bool:
+        return self is not UNKNOWN
+
+
+JS_FUNCTION = r'(?:function\s+(\w+)|(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s*)?\()'
+C_FAMILY_KEYWORDS = ['if', 'else', 'for', 'while', 'switch', 'catch', 'case']
+
+BUILTIN_LANGUAGES = [
+    LanguagePlugin(
+        'python', ['.py'],
+        ['if', 'elif', 'else', 'for', 'while', 'try', 'except', 'with'],
+        function=r'def\s+(\w+)\s*\(',
+        comment=HASH_COMMENT,
+        string=(r'[rRbBuUfF]{0,2}(?:"""[\s\S]*?(?:"""|\Z)|\'\'\'[\s\S]*?(?:\'\'\'|\Z)'
+                r'|"(?:\\.|[^"\\\n])*"?|\'(?:\\.|[^\'\\\n])*\'?)'),
+        indent_blocks=True,
+    ),
+    LanguagePlugin(
+        'javascript', ['.js', '.jsx'], C_FAMILY_KEYWORDS,
+        function=JS_FUNCTION,
+        string='|'.join([DOUBLE_QUOTED, BACKTICK, SINGLE_QUOTED]),
+        loop_style='paren',
+    ),
+    LanguagePlugin(
+        'typescript', ['.ts', '.tsx'], C_FAMILY_KEYWORDS,
+        function=JS_FUNCTION,
+        string='|'.join([DOUBLE_QUOTED, BACKTICK, SINGLE_QUOTED]),
+        loop_style='paren',
+    ),
+    LanguagePlugin(
+        'go', ['.go'],
+        ['if', 'else', 'for', 'switch', 'case', 'select'],
+        function=r'func\s+(\w+)\s*\(',
+        string='|'.join([DOUBLE_QUOTED, BACKTICK, CHAR_LITERAL]),
+        loop_style='bare',
+    ),
+    LanguagePlugin(
+        'rust', ['.rs'],
+        ['if', 'else', 'for', 'while', 'match', 'loop'],
+        function=r'fn\s+(\w+)\s*(?:<[^>]*>)?\s*\(',
+        loop_style='bare',
+    ),
+    LanguagePlugin(
+        'java', ['.java'], C_FAMILY_KEYWORDS,
+        function=r'(?:public|private|protected)?\s*(?:static\s+)?(?:\w+\s+)?(\w+)\s*\([^)]*\)\s*(?:throws\s+[\w.,\s]+)?{',
+        loop_style='paren',
+    ),
+    LanguagePlugin(
+        'cpp', ['.cpp', '.cc', '.c', '.h', '.hpp'], C_FAMILY_KEYWORDS,
+        function=r'(?:\w+\s+)?(\w+)\s*\([^)]*\)\s*{',
+        loop_style='paren',
+    ),
+]
+
+# Files of no registered language: both comment styles, no keywords or functions
+UNKNOWN = LanguagePlugin(
+    'unknown',
+    comment=HASH_COMMENT + '|' + C_COMMENT,
+    string=DOUBLE_QUOTED + '|' + SINGLE_QUOTED,
+)
+
+_languages: Dict[str, LanguagePlugin] = {}
+_extensions: Dict[str, LanguagePlugin] = {}
+_plugins_loaded = False
+
+
+def register(plugin: LanguagePlugin) -> LanguagePlugin:
+    """Register a language (a later registration of the same name replaces it)"""
+    _languages[plugin.name] = plugin
+    for ext in plugin.extensions:
+        _extensions[ext.lower()] = plugin
+    return plugin
+
+
+for _plugin in BUILTIN_LANGUAGES:
+    register(_plugin)
+
+
+def load_plugins() -> int:
+    """
+    Import every plugin module in languages/ once; each calls register()
+
+    Returns:
+        Number of plugin modules loaded
+    """
+    global _plugins_loaded
+    if _plugins_loaded:
+        return 0
+    _plugins_loaded = True
+
+    loaded = 0
+    for path in sorted(PLUGINS_DIR.glob('*.py')) if PLUGINS_DIR.is_dir() else []:
+        spec = importlib.util.spec_from_file_location(f'language_plugin_{path.stem}', path)
+        module = importlib.util.module_from_spec(spec)
+        try:
+            spec.loader.exec_module(module)
+            loaded += 1
+        except Exception as e:
+            print(f"⚠️  Could not load language plugin {path.name}: {e}")
+    return loaded
+
+
+def get_language(name: str) -> LanguagePlugin:
+    """Plugin by language name (UNKNOWN when no plugin provides it)"""
+    if name not in _languages:
+        load_plugins()
+    return _languages.get(name, UNKNOWN)
+
+
+def language_for_path(path) -> LanguagePlugin:
+    """Plugin for a file, picked by its extension"""
+    ext = Path(path).suffix.lower()
+    if ext not in _extensions:
+        load_plugins()
+    return _extensions.get(ext, UNKNOWN)
+
+
+def code_extensions() -> Set[str]:
+    """Every extension a registered language (built-in or plugin) handles"""
+    load_plugins()
+    return set(_extensions)
@@ -0,0 +1,21 @@
+"""C# language plugin"""
+
+from language_registry import C_COMMENT, CHAR_LITERAL, DOUBLE_QUOTED, TRIPLE_QUOTED, LanguagePlugin, register
+
+# Verbatim (@"..." with "" escapes), raw ("""...""") and regular/interpolated strings
+VERBATIM = r'\$?@\$?"(?:[^"]|"")*"?'
+
+register(LanguagePlugin(
+    'csharp', ['.cs'],
+    ['if', 'else', 'for', 'foreach', 'while', 'switch', 'catch', 'case'],
+    function=(r'(?:(?:public|private|protected|internal|static|async|override|virtual|abstract|sealed|extern)\s+)+'
+              r'[\w<>\[\],.?]+\s+(\w+)\s*(?:<[^>()]*>)?\s*\([^)]*\)\s*{'),
+    comment=C_COMMENT,
+    string='|'.join([VERBATIM, TRIPLE_QUOTED, r'\$?' + DOUBLE_QUOTED, CHAR_LITERAL]),
+    loop_style='paren',
+    loop_calls=[
+        ('io_in_loop', r'\b(?:File|Directory)\s*\.\s*(?:Read|Write|Append|Open|Create|Copy|Move|Delete)\w*\s*\('),
+        ('network_in_loop', r'\.\s*(?:GetAsync|PostAsync|PutAsync|SendAsync|GetStringAsync|DownloadString)\s*\('),
+        ('query_in_loop', r'\.\s*(?:ExecuteReader|ExecuteNonQuery|ExecuteScalar)\w*\s*\('),
+    ],
+))
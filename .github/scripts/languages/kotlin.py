@@ -0,0 +1,17 @@
+"""Kotlin language plugin"""
+
+from language_registry import C_COMMENT, CHAR_LITERAL, DOUBLE_QUOTED, TRIPLE_QUOTED, LanguagePlugin, register
+
+register(LanguagePlugin(
+    'kotlin', ['.kt', '.kts'],
+    ['if', 'else', 'for', 'while', 'when', 'catch'],
+    function=r'\bfun\s+(?:<[^>]*>\s*)?(?:[\w.]+\.)?(\w+)\s*\(',
+    comment=C_COMMENT,
+    string='|'.join([TRIPLE_QUOTED, DOUBLE_QUOTED, CHAR_LITERAL]),
+    loop_style='paren',
+    loop_calls=[
+        ('regex_compile_in_loop', r'\bRegex\s*\(\s*"|"\s*\.\s*toRegex\s*\('),
+        ('io_in_loop', r'\bFile\s*\([^()]*\)\s*\.\s*(?:read|write|append|forEachLine|bufferedReader)\w*\s*\('),
+        ('network_in_loop', r'\bURL\s*\([^()]*\)\s*\.\s*(?:readText|openStream|openConnection)\s*\('),
+    ],
+))
@@ -9,6 +9,7 @@ import re
 import json
 import time
 import hashlib
+import threading
 import requests
 from pathlib import Path
 from typing import Optional, Dict, List, Any
@@ -16,6 +17,11 @@ from typing import Optional, Dict, List, Any
 GROQ_API_KEY = os.environ.get('GROQ_API_KEY')
 GROQ_API_URL = 'https://api.groq.com/openai/v1/chat/completions'
 CACHE_DIR = Path('.llm-cache')
+# Requests in flight at once, shared by every thread and stage of the process
+LLM_CONCURRENCY = max(1, int(os.environ.get('LLM_CONCURRENCY', '4')))
+
+_request_slots = threading.BoundedSemaphore(LLM_CONCURRENCY)
+_client_lock = threading.Lock()
 
 
 class LLMClient:
@@ -23,6 +29,7 @@ class LLMClient:
         self.api_key = api_key or GROQ_API_KEY
         self.cache_dir = CACHE_DIR
         self.cache_dir.mkdir(exist_ok=True)
+        self.max_concurrency = LLM_CONCURRENCY
     
     def call_chat(self,
                   model: str,
@@ -35,6 +42,9 @@ class LLMClient:
         """
         Call LLM with retries, caching, and JSON coercion
         
+        Safe to call from several threads: at most LLM_CONCURRENCY requests
+        are in flight at once (cache hits and retry waits don't hold a slot).
+        
         Returns:
             Response text or None on failure
         """
@@ -77,15 +87,16 @@ class LLMClient:
                 if response_format == 'json':
                     payload['response_format'] = {'type': 'json_object'}
                 
-                response = requests.post(
-                    GROQ_API_URL,
-                    headers={
-                        'Authorization': f'Bearer {self.api_key}',
-                        'Content-Type': 'application/json'
-                    },
-                    json=payload,
-                    timeout=timeout
-                )
+                with _request_slots:
+                    response = requests.post(
+                        GROQ_API_URL,
+                        headers={
+                            'Authorization': f'Bearer {self.api_key}',
+                            'Content-Type': 'application/json'
+                        },
+                        json=payload,
+                        timeout=timeout
+                    )
                 
                 if response.status_code == 200:
                     result = response.json()['choices'][0]['message']['content'].strip()
@@ -97,8 +108,11 @@ class LLMClient:
                     # Cache successful response
                     if cache_key:
                         try:
-                            with open(cache_key, 'w') as f:
+                            # Unique temp name: threads may cache the same prompt at once
+                            tmp = cache_key.with_suffix(f'.{threading.get_ident()}.tmp')
+                            with open(tmp, 'w') as f:
                                 f.write(result)
+                            os.replace(tmp, cache_key)
                         except:
                             pass
                     
@@ -274,6 +288,7 @@ _client = None
 def get_client() -> LLMClient:
     """Get or create LLM client singleton"""
     global _client
-    if _client is None:
-        _client = LLMClient()
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient()
     return _client
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate page detection for the documentation site
+Pages documenting the same code from two placements (api/payments.md and
+api/payment-processor.md) share most of their vocabulary even when no
+sentence is identical, so pages are compared by the cosine similarity of
+their term frequencies. A 64-bit SimHash of the same weighted terms is kept
+per page in .github/pages-dedup.json together with the duplicate pairs found:
+a run only fingerprints pages whose content hash changed, and compares them
+by Hamming distance against the stored fingerprints of the other pages in
+their section. Only pages within CANDIDATE_DISTANCE bits are read back for
+the exact similarity check.
+"""
+
+import os
+import re
+import json
+import math
+import hashlib
+from pathlib import Path
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from page_index import PageIndex
+from page_ranker import ENGLISH_STOPWORDS, tokenize
+from section_merge import fold_markdown
+
+DEDUP_FILE = Path(os.environ.get('PAGES_DEDUP_FILE', '.github/pages-dedup.json'))
+INDEX_VERSION = 1
+FINGERPRINT_BITS = 64
+# Pages further apart than this are never near-duplicates (unrelated pages sit around 32)
+CANDIDATE_DISTANCE = 24
+# Cosine similarity from which two pages are duplicates (unrelated pages of a section stay below 0.5)
+SIMILARITY = float(os.environ.get('PAGES_DEDUP_SIMILARITY', '0.85'))
+
+_FRONTMATTER = re.compile(r'\A---\n.*?\n---\n', re.DOTALL)
+
+# (page, page, similarity) with the two paths in sorted order
+Pair = Tuple[str, str, float]
+
+
+def page_vector(body: str) -> Counter:
+    """Term frequencies of a page (frontmatter left out)"""
+    return Counter(tokenize(_FRONTMATTER.sub('', body), ENGLISH_STOPWORDS))
+
+
+def _term_hash(term: str) -> int:
+    return int.from_bytes(hashlib.blake2b(term.encode('utf-8'), digest_size=FINGERPRINT_BITS // 8).digest(), 'big')
+
+
+def simhash(vector: Counter) -> int:
+    """SimHash fingerprint: each bit is the weighted majority vote of the terms' hash bits"""
+    votes = [0] * FINGERPRINT_BITS
+    for term, weight in vector.items():
+        bits = _term_hash(term)
+        for i in range(FINGERPRINT_BITS):
+            votes[i] += weight if bits >> i & 1 else -weight
+    return sum(1 << i for i, vote in enumerate(votes) if vote > 0)
+
+
+def cosine(a: Counter, b: Counter) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    dot = sum(weight * b[term] for term, weight in a.items() if term in b)
+    norm = math.sqrt(sum(w * w for w in a.values()) * sum(w * w for w in b.values()))
+    return dot / norm if norm else 0.0
+
+
+def _section(path: str) -> Optional[str]:
+    """Section dir pages are compared within (None for pages that are never compared)"""
+    parts = Path(path).parts
+    if len(parts) < 2 or parts[-1] == 'index.md':
+        return None
+    return parts[0]
+
+
+def merge_duplicate(canonical: str, duplicate: str) -> Tuple[str, Dict]:
+    """
+    Fold a duplicate page into the canonical one, section by section
+
+    Sections are matched by anchor or symbol at every level, whatever the
+    two docs' titles; where both pages have a section the canonical text is
+    kept, and only sections the duplicate alone has are added, so no LLM
+    call is needed.
+
+    Returns:
+        (merged page, stats counting 'kept' and 'added' sections)
+    """
+    return fold_markdown(canonical, _FRONTMATTER.sub('', duplicate))
+
+
+class DuplicateIndex:
+    """SimHash fingerprints and near-duplicate pairs of the pages, kept in step with a PageIndex"""
+
+    def __init__(self, index_file: Path = DEDUP_FILE):
+        self.index_file = Path(index_file)
+        self.state = self._load()
+        self._dirty = False
+
+    def _load(self) -> Dict:
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        if state.get('version') != INDEX_VERSION or state.get('similarity') != SIMILARITY:
+            # Pairs found at another threshold are not reused
+            state = {'version': INDEX_VERSION, 'similarity': SIMILARITY, 'pages': {}, 'pairs': []}
+        return state
+
+    def save(self):
+        """Write the index if anything changed since it was loaded"""
+        if not self._dirty:
+            return
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_file.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.index_file)
+        self._dirty = False
+
+    def update(self, page_index: PageIndex) -> Dict[str, int]:
+        """
+        Fingerprint changed pages and find their near-duplicates
+
+        Returns:
+            Counts of 'pages' fingerprinted, pages 'changed' and 'removed',
+            page pairs 'compared' by similarity, and duplicate 'pairs'
+        """
+        pages: Dict[str, Dict] = self.state['pages']
+        current = {entry.path: entry for entry in page_index.pages() if _section(entry.path)}
+        changed = sorted(path for path, entry in current.items()
+                         if path not in pages or pages[path]['hash'] != entry.hash)
+        removed = [path for path in pages if path not in current]
+        if not changed and not removed:
+            return {'pages': len(pages), 'changed': 0, 'removed': 0, 'compared': 0,
+                    'pairs': len(self.state['pairs'])}
+
+        stale = set(changed) | set(removed)
+        pairs = [pair for pair in self.state['pairs'] if pair[0] not in stale and pair[1] not in stale]
+        for path in removed:
+            del pages[path]
+
+        vectors: Dict[str, Counter] = {}
+
+        def vector(path: str) -> Optional[Counter]:
+            if path not in vectors:
+                body = page_index.body(path)
+                vectors[path] = page_vector(body) if body is not None else None
+            return vectors[path]
+
+        for path in changed:
+            if vector(path) is None:
+                pages.pop(path, None)
+                continue
+            pages[path] = {'hash': current[path].hash, 'simhash': f'{simhash(vectors[path]):016x}'}
+
+        # Each changed page against every fingerprint of its section (pairs of two changed pages once)
+        compared = 0
+        fingerprints = {path: int(page['simhash'], 16) for path, page in pages.items()}
+        for path in changed:
+            if path not in pages:
+                continue
+            for other, fingerprint in fingerprints.items():
+                if other == path or _section(other) != _section(path) or (other in stale and other < path):
+                    continue
+                if bin(fingerprints[path] ^ fingerprint).count('1') > CANDIDATE_DISTANCE:
+                    continue
+                other_vector = vector(other)
+                if other_vector is None:
+                    continue
+                compared += 1
+                similarity = cosine(vectors[path], other_vector)
+                if similarity >= SIMILARITY:
+                    pairs.append([min(path, other), max(path, other), round(similarity, 3)])
+
+        self.state['pairs'] = sorted(pairs)
+        self._dirty = True
+        return {'pages': len(pages), 'changed': len(changed), 'removed': len(removed),
+                'compared': compared, 'pairs': len(pairs)}
+
+    def pairs(self) -> List[Pair]:
+        return [tuple(pair) for pair in self.state['pairs']]
+
+    def clusters(self) -> List[List[str]]:
+        """Groups of pages joined (transitively) by duplicate pairs, each sorted"""
+        parent: Dict[str, str] = {}
+
+        def find(path: str) -> str:
+            while parent.setdefault(path, path) != path:
+                parent[path] = parent[parent[path]]
+                path = parent[path]
+            return path
+
+        for a, b, _ in self.state['pairs']:
+            parent[find(a)] = find(b)
+        groups: Dict[str, List[str]] = {}
+        for path in parent:
+            groups.setdefault(find(path), []).append(path)
+        return sorted(sorted(group) for group in groups.values())
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Persisted index of the documentation site's pages
+Holds what placement decisions need (section, title, headings, symbols,
+summary) for every page, refreshed incrementally: a page is only re-read when
+its mtime or size changed, and only re-parsed when its content hash changed.
+Page bodies are never kept in memory; they are read on demand.
+
+The committed index holds only what follows from page content. The mtimes
+that let a refresh skip reading a page differ per checkout, so they are kept
+in a sidecar in the pipeline cache dir; without it (a fresh checkout) every
+page is hashed once, and the committed index only changes with the pages.
+"""
+
+import os
+import re
+import json
+import hashlib
+import threading
+from pathlib import Path
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Set
+
+from stage_cache import CACHE_DIR
+
+INDEX_FILE = Path(os.environ.get('PAGES_INDEX_FILE', '.github/pages-index.json'))
+STAT_FILE = Path(os.environ.get('PAGES_INDEX_STAT_FILE', str(CACHE_DIR / 'pages-index-stat.json')))
+INDEX_VERSION = 2
+SUMMARY_CHARS = 200  # same head of the page the placement prompts always showed
+MAX_SYMBOLS = 100
+
+_FRONTMATTER = re.compile(r'\A---\n(.*?)\n---\n', re.DOTALL)
+_HEADING = re.compile(r'^(#{1,6})\s+(.+?)\s*#*\s*$')
+_FENCE = re.compile(r'^\s*(```|~~~)')
+# Identifiers in inline code: `AuthService`, `hashPassword()`, `db.query`
+_INLINE_SYMBOL = re.compile(r'`([A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)*)(?:\([^`]*\))?`')
+
+
+@dataclass
+class PageEntry:
+    path: str           # relative to the pages dir, forward slashes
+    section: str        # first path component ('' for top-level pages)
+    title: str
+    headings: List[str] = field(default_factory=list)
+    symbols: List[str] = field(default_factory=list)  # inline-code identifiers, in first-seen order
+    summary: str = ''
+    size: int = 0
+    hash: str = ''
+
+
+def extract_symbols(text: str, limit: int = MAX_SYMBOLS) -> List[str]:
+    """Identifiers quoted as inline code outside fenced blocks, deduplicated"""
+    symbols = {}
+    in_fence = False
+    for line in text.split('\n'):
+        if _FENCE.match(line):
+            in_fence = not in_fence
+            continue
+        if not in_fence and '`' in line:
+            for name in _INLINE_SYMBOL.findall(line):
+                symbols.setdefault(name, None)
+                if len(symbols) >= limit:
+                    return list(symbols)
+    return list(symbols)
+
+
+def parse_page(path: str, content: str) -> PageEntry:
+    """Index entry of a page's content (frontmatter title, else first heading, else file name)"""
+    title = None
+    frontmatter = _FRONTMATTER.match(content)
+    if frontmatter:
+        for line in frontmatter.group(1).split('\n'):
+            key, _, value = line.partition(':')
+            if key.strip() == 'title' and value.strip():
+                title = value.strip().strip('"\'')
+                break
+
+    body = content[frontmatter.end() if frontmatter else 0:]
+    headings = []
+    in_fence = False
+    for line in body.split('\n'):
+        if _FENCE.match(line):
+            in_fence = not in_fence
+            continue
+        if in_fence:
+            continue
+        match = _HEADING.match(line)
+        if match:
+            headings.append(match.group(2))
+            if title is None and len(match.group(1)) == 1:
+                title = match.group(2)
+
+    parts = path.split('/')
+    return PageEntry(
+        path=path,
+        section=parts[0] if len(parts) > 1 else '',
+        title=title or Path(path).stem.replace('-', ' ').title(),
+        headings=headings,
+        symbols=extract_symbols(body),
+        summary=content[:SUMMARY_CHARS]
+    )
+
+
+def page_url(path: str) -> str:
+    """Site URL of a page: api/auth.md -> /api/auth.html, api/index.md -> /api/"""
+    stem = path[:-3]
+    if stem == 'index' or stem.endswith('/index'):
+        return '/' + stem[:-5]
+    return f'/{stem}.html'
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+class PageIndex:
+    """
+    Page metadata by relative path, persisted as JSON
+
+    refresh() brings it up to date with the pages dir; update() re-indexes a
+    single page after it was written; body() reads a page's full text;
+    take_added_removed() reports pages that appeared or disappeared since it
+    was last called. Safe to use from several threads.
+    """
+
+    def __init__(self, pages_dir: Path, index_file: Path = INDEX_FILE, stat_file: Path = STAT_FILE):
+        self.pages_dir = Path(pages_dir)
+        self.index_file = Path(index_file)
+        self.stat_file = Path(stat_file)
+        self.entries: Dict[str, PageEntry] = {}
+        self.stats: Dict[str, List] = {}  # path -> [mtime, size, hash] when last read in this checkout
+        self._dirty = False
+        self._stats_dirty = False
+        self._added_removed = set()  # paths added or dropped since take_added_removed()
+        self._lock = threading.RLock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') != INDEX_VERSION:
+            return
+        for path, entry in data.get('pages', {}).items():
+            if entry.pop('mtime', None) is not None:
+                self._dirty = True  # older index with checkout-specific mtimes: rewritten without them
+            try:
+                self.entries[path] = PageEntry(**entry)
+            except TypeError:
+                continue  # written by another layout: re-indexed on refresh
+        try:
+            with open(self.stat_file, 'r', encoding='utf-8') as f:
+                self.stats = json.load(f)
+        except (OSError, ValueError):
+            self.stats = {}
+
+    @staticmethod
+    def _write_json(path: Path, data: Dict, **options):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, **options)
+        os.replace(tmp, path)
+
+    def save(self):
+        """Write the index (and the local stat sidecar) if anything changed since it was loaded"""
+        with self._lock:
+            if self._dirty:
+                self._write_json(self.index_file, {
+                    'version': INDEX_VERSION,
+                    'pages': {path: asdict(self.entries[path]) for path in sorted(self.entries)}
+                }, indent=2)
+                self._dirty = False
+            if self._stats_dirty:
+                self._write_json(self.stat_file, self.stats, separators=(',', ':'))
+                self._stats_dirty = False
+
+    def _index(self, path: str, file_path: Path, stat: os.stat_result) -> bool:
+        """Bring one entry up to date; True if its content changed"""
+        entry = self.entries.get(path)
+        if entry and self.stats.get(path) == [stat.st_mtime, stat.st_size, entry.hash]:
+            return False
+
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        digest = content_hash(data)
+        self.stats[path] = [stat.st_mtime, stat.st_size, digest]
+        self._stats_dirty = True
+        if entry and entry.hash == digest:
+            return False  # touched (e.g. a fresh checkout), same content
+
+        fresh = parse_page(path, data.decode('utf-8', errors='replace'))
+        fresh.size, fresh.hash = stat.st_size, digest
+        if entry is None:
+            self._added_removed.add(path)
+        self.entries[path] = fresh
+        self._dirty = True
+        return True
+
+    def refresh(self) -> Dict[str, int]:
+        """
+        Re-index pages whose mtime/size changed and drop deleted ones
+
+        Returns:
+            Counts of 'pages', 'changed' and 'removed' pages
+        """
+        seen = set()
+        changed = 0
+        with self._lock:
+            if self.pages_dir.exists():
+                for file_path in self.pages_dir.rglob('*.md'):
+                    path = file_path.relative_to(self.pages_dir).as_posix()
+                    seen.add(path)
+                    try:
+                        changed += self._index(path, file_path, file_path.stat())
+                    except OSError as e:
+                        print(f"⚠️  Could not read {path}: {e}")
+                        seen.discard(path)
+
+            removed = [path for path in self.entries if path not in seen]
+            for path in removed:
+                del self.entries[path]
+                self._added_removed.add(path)
+            if removed:
+                self._dirty = True
+            for path in [path for path in self.stats if path not in seen]:
+                del self.stats[path]
+                self._stats_dirty = True
+            return {'pages': len(self.entries), 'changed': changed, 'removed': len(removed)}
+
+    def update(self, path: str) -> Optional[PageEntry]:
+        """Re-index one page after it was written (or drop it if it is gone)"""
+        file_path = self.pages_dir / path
+        with self._lock:
+            try:
+                self._index(path, file_path, file_path.stat())
+            except OSError:
+                if self.stats.pop(path, None):
+                    self._stats_dirty = True
+                if self.entries.pop(path, None):
+                    self._added_removed.add(path)
+                    self._dirty = True
+                return None
+            return self.entries[path]
+
+    def take_added_removed(self) -> Set[str]:
+        """Paths of pages added or removed since the last call (then forgets them)"""
+        with self._lock:
+            paths, self._added_removed = self._added_removed, set()
+            return paths
+
+    def body(self, path: str) -> Optional[str]:
+        """Full text of a page, read from disk on each call"""
+        try:
+            with open(self.pages_dir / path, 'r', encoding='utf-8') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def pages(self, prefix: str = '') -> List[PageEntry]:
+        """Entries whose path starts with prefix, sorted by path"""
+        with self._lock:
+            return [self.entries[path] for path in sorted(self.entries) if path.startswith(prefix)]
+
+    def __contains__(self, path: str) -> bool:
+        return path in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Relevance ranking of documentation pages for placement decisions
+BM25 over each page's path, title, headings and symbol names (all from the
+page index), so the placement prompt shows the pages most related to a
+source file rather than the first few pages of its section.
+"""
+
+import re
+import math
+from pathlib import Path
+from collections import Counter
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+from page_index import PageEntry, parse_page
+
+K1 = 1.2
+B = 0.75
+# A match in the file name or title says more than one in a heading
+FIELD_WEIGHTS = {'path': 3, 'title': 3, 'headings': 1, 'symbols': 2}
+ENGLISH_STOPWORDS = frozenset(
+    'a an and are as at be by for from how in into is it of on or the this to with'.split()
+)
+# Words every page of a section shares say nothing about relevance
+STOPWORDS = ENGLISH_STOPWORDS | frozenset(
+    'md ts js py go api module modules feature features overview usage example examples'.split()
+)
+
+_WORD = re.compile(r'[A-Za-z0-9]+')
+_CAMEL_PART = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+')
+
+
+def _stem(token: str) -> str:
+    """Plural folding only: payments -> payment, entries -> entry"""
+    if len(token) > 4 and token.endswith('ies'):
+        return token[:-3] + 'y'
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str, stopwords: FrozenSet[str] = STOPWORDS) -> List[str]:
+    """Lowercase terms of a text; camelCase and snake_case identifiers also yield their parts"""
+    tokens = []
+    for word in _WORD.findall(text):
+        parts = _CAMEL_PART.findall(word)
+        if len(parts) > 1:
+            tokens.extend(part.lower() for part in parts)
+        tokens.append(word.lower())
+    return [_stem(token) for token in tokens if len(token) > 1 and token not in stopwords]
+
+
+def _page_terms(page: PageEntry) -> Counter:
+    fields = {
+        'path': Path(page.path).stem,
+        'title': page.title,
+        'headings': ' '.join(page.headings),
+        'symbols': ' '.join(page.symbols)
+    }
+    terms = Counter()
+    for name, text in fields.items():
+        for token in tokenize(text):
+            terms[token] += FIELD_WEIGHTS[name]
+    return terms
+
+
+def query_terms(source_file: str, doc_content: str) -> Counter:
+    """Terms describing a source file's documentation: file name, title, headings and symbols"""
+    return _page_terms(parse_page(Path(source_file).stem + '.md', doc_content))
+
+
+class PageRanker:
+    """BM25 index over page entries; cheap enough to rebuild whenever pages change"""
+
+    def __init__(self, pages: Iterable[PageEntry]):
+        self.pages: List[Tuple[PageEntry, Counter, int]] = []
+        document_frequency = Counter()
+        for page in pages:
+            if Path(page.path).name == 'index.md':
+                continue  # generated listings, never a placement target
+            terms = _page_terms(page)
+            self.pages.append((page, terms, sum(terms.values())))
+            document_frequency.update(terms.keys())
+
+        count = len(self.pages)
+        self.average_length = sum(length for _, _, length in self.pages) / count if count else 0.0
+        self.idf: Dict[str, float] = {
+            term: math.log(1 + (count - frequency + 0.5) / (frequency + 0.5))
+            for term, frequency in document_frequency.items()
+        }
+
+    def _score(self, query: Counter, terms: Counter, length: int) -> float:
+        score = 0.0
+        norm = K1 * (1 - B + B * length / self.average_length) if self.average_length else K1
+        for term, weight in query.items():
+            frequency = terms.get(term)
+            if frequency:
+                score += weight * self.idf[term] * frequency * (K1 + 1) / (frequency + norm)
+        return score
+
+    def top(self, query: Counter, prefix: str = '', k: int = 8) -> List[Tuple[PageEntry, float]]:
+        """
+        The k pages under prefix most relevant to the query
+
+        Returns:
+            (page, score) pairs, best first; pages without any matching term
+            fill the remaining slots in path order
+        """
+        ranked = [
+            (page, self._score(query, terms, length))
+            for page, terms, length in self.pages if page.path.startswith(prefix)
+        ]
+        ranked.sort(key=lambda item: (-item[1], item[0].path))
+        return ranked[:k]
@@ -4,7 +4,7 @@ Intelligent GitHub Pages Documentation Manager
 
 Features:
 - LLM-powered agentic decision making
-- Reads ALL existing pages to understand structure
+- Keeps an on-disk index of all existing pages to understand structure
 - Decides: create new page, append to existing, or modify existing
 - Professional documentation website generation
 - Maintains consistent structure and navigation
@@ -13,26 +13,123 @@ Features:
 import os
 import sys
 import json
+import threading
 import requests
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
 
 # Import LLM wrapper
 sys.path.insert(0, str(Path(__file__).parent))
 from llm import get_client
+from stage_cache import get_cache, hash_text
+from page_index import PageEntry, PageIndex, content_hash
+from page_ranker import PageRanker, query_terms
+from docs_router import DocsRouter
+from section_merge import merge_markdown, resolve_prompt, strip_fences
+from search_index import SearchIndex
+from page_dedup import DuplicateIndex, merge_duplicate
 
 GROQ_API_KEY = os.environ.get('GROQ_API_KEY')
 MODEL = 'openai/gpt-oss-120b'  # Use more powerful model for better decisions
 
 PAGES_DIR = Path('docs-site')
 MAPPING_FILE = '.github/pages-mapping.json'
+PAGE_CANDIDATES = int(os.environ.get('PAGE_CANDIDATES', '8'))  # existing pages shown per placement prompt
+PAGES_WORKERS = int(os.environ.get('PAGES_WORKERS', '0'))  # docs placed at once (0 = the LLM concurrency limit)
+# 'combined': one LLM call plans every perspective of a doc; 'multi': one call per perspective
+PLANNING_MODE = os.environ.get('PAGES_PLANNING', 'combined')
+# 'report': flag near-duplicate pages; 'consolidate': merge each group into one page; 'off'
+DEDUP_MODE = os.environ.get('PAGES_DEDUP', 'report')
+
+PERSPECTIVE_PREFIXES = {'api': 'api/', 'module': 'modules/', 'feature': 'features/'}
+PERSPECTIVE_GUIDANCE = {
+    'api': 'Focus on technical API details, function signatures, parameters, returns, examples.',
+    'module': 'Focus on architecture, design patterns, how components interact, module boundaries.',
+    'feature': 'Focus on user guides, how to use features, configuration, real-world examples.'
+}
+PAGE_ACTIONS = ('create', 'append', 'modify')
+
+# Section index pages: section dir -> title, intro, listing heading, per-page blurb,
+# total label, and the text shown while the section is empty (None: no index until then)
+SECTION_INDEXES = {
+    'api': {
+        'title': 'API Reference',
+        'intro': 'Low-level API documentation for all functions, classes, and interfaces.',
+        'heading': 'Available APIs',
+        'blurb': 'Technical API documentation',
+        'total': 'API pages',
+        'empty': None
+    },
+    'modules': {
+        'title': 'Modules',
+        'intro': 'Module architecture and design documentation.',
+        'heading': 'Available Modules',
+        'blurb': 'Module architecture and design',
+        'total': 'modules',
+        'empty': "*No module documentation yet. Module-level docs will be auto-generated as the codebase evolves.*\n\n"
+                 "Modules provide architectural overview, design decisions, and how different components interact.\n\n"
+    },
+    'features': {
+        'title': 'Features',
+        'intro': 'User-facing feature documentation and guides.',
+        'heading': 'Available Features',
+        'blurb': 'Feature guide and tutorial',
+        'total': 'features',
+        'empty': "*No feature documentation yet. Feature guides will be auto-generated as you develop.*\n\n"
+                 "Features provide user-facing documentation on how to use and configure the system.\n\n"
+    }
+}
+
+# (page_path, action, reasoning, section_title)
+Decision = Tuple[str, str, str, Optional[str]]
+
+
+def validate_plan(plan) -> Optional[List[Decision]]:
+    """
+    Decisions of a combined planning response, or None if it does not match the schema:
+        {"perspectives": [{"type": "api|module|feature", "action": "create|append|modify",
+                           "page_path": "<section>/<name>.md", "reasoning": str, "section_title": str}]}
+    """
+    if not isinstance(plan, dict) or not isinstance(plan.get('perspectives'), list):
+        return None
+    
+    decisions = []
+    seen = set()
+    for item in plan['perspectives']:
+        if not isinstance(item, dict):
+            return None
+        ptype, action, page_path = item.get('type'), item.get('action'), item.get('page_path')
+        section_title = item.get('section_title') or None
+        if ptype not in PERSPECTIVE_PREFIXES or action not in PAGE_ACTIONS:
+            return None
+        if not isinstance(page_path, str) or not page_path.endswith('.md') or '..' in Path(page_path).parts:
+            return None
+        if section_title is not None and not isinstance(section_title, str):
+            return None
+        if ptype in seen:
+            continue
+        seen.add(ptype)
+        
+        # Ensure page_path starts with correct prefix
+        prefix = PERSPECTIVE_PREFIXES[ptype]
+        if not page_path.startswith(prefix):
+            page_path = prefix + Path(page_path).name
+        decisions.append((page_path, action, str(item.get('reasoning') or 'Auto-generated'), section_title))
+    return decisions or None
 
 
 class PagesManager:
     def __init__(self):
         self.mapping = self.load_mapping()
+        self.page_index = PageIndex(PAGES_DIR)
+        self.router = DocsRouter()
         self.existing_pages = self.scan_existing_pages()
+        self._ranker = None
+        self._lock = threading.Lock()  # guards the ranker, the page locks and the fallback set
+        self._page_locks: Dict[str, threading.Lock] = {}
+        self._fallback_sources: Set[str] = set()  # sources whose last plan used a fallback decision
         
     def load_mapping(self) -> Dict:
         """Load persistent pages mapping"""
@@ -44,6 +141,7 @@ class PagesManager:
             'last_updated': datetime.now().isoformat(),
             'file_to_page': {},
             'page_metadata': {},
+            'merged_pages': {},
             'site_structure': {
                 'index.md': {'title': 'Home', 'category': 'root'},
                 'api/': {'title': 'API Reference', 'category': 'api'},
@@ -60,25 +158,22 @@ class PagesManager:
             json.dump(self.mapping, indent=2, fp=f)
         print(f"✓ Saved mapping to {MAPPING_FILE}")
     
-    def scan_existing_pages(self) -> Dict[str, str]:
-        """Scan all existing documentation pages"""
-        pages = {}
+    def scan_existing_pages(self) -> Dict[str, PageEntry]:
+        """
+        Bring the page index up to date with the pages on disk
         
+        Only pages whose mtime or size changed are re-read; bodies are not kept
+        and are loaded later, only when a merge needs them.
+        """
         if not PAGES_DIR.exists():
             print("ℹ️  Pages directory doesn't exist yet, will create")
             PAGES_DIR.mkdir(parents=True, exist_ok=True)
-            return pages
         
-        for md_file in PAGES_DIR.rglob('*.md'):
-            relative_path = md_file.relative_to(PAGES_DIR)
-            try:
-                with open(md_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    pages[str(relative_path)] = content
-            except Exception as e:
-                print(f"⚠️  Could not read {relative_path}: {e}")
+        counts = self.page_index.refresh()
+        pages = self.page_index.entries
         
-        print(f"✓ Found {len(pages)} existing documentation pages")
+        print(f"✓ Found {len(pages)} existing documentation pages "
+              f"({counts['changed']} re-indexed, {counts['removed']} removed)")
         for page in list(pages.keys())[:10]:
             print(f"  - {page}")
         if len(pages) > 10:
@@ -86,13 +181,159 @@ class PagesManager:
         
         return pages
     
-    def generate_multi_perspective_docs(self, source_file: str, doc_content: str) -> List[Tuple[str, str, str]]:
+    @property
+    def ranker(self) -> PageRanker:
+        """Relevance index over the indexed pages (rebuilt after pages change)"""
+        with self._lock:
+            if self._ranker is None:
+                self._ranker = PageRanker(self.page_index.pages())
+            return self._ranker
+    
+    def generate_multi_perspective_docs(self, source_file: str, doc_content: str) -> List[Decision]:
         """
         Generate multiple documentation perspectives: API, Modules, Features
         
+        Files matched by docs-routing.yml go straight to their routed page
+        without any LLM call. Otherwise decisions are reused from the stage
+        cache when the doc content and the page summaries shown to the LLM are
+        unchanged.
+        
         Returns:
-            List of (page_path, action, reasoning) tuples
+            List of (page_path, action, reasoning, section_title) tuples
+        """
+        if self.router.prefer_rules:
+            route = self.router.route(source_file, 'pages')
+            if route:
+                print(f"\n🧭 Routed {source_file} → {route.pages} (docs-routing.yml: {route.glob})")
+                return [self._routed_decision(source_file, route.pages, route.glob)]
+        if not self.router.llm_fallback:
+            return [self._fallback_decision(source_file, 'api')]
+        
+        cache = get_cache()
+        pages_listing = "\n".join(
+            f"{entry.path}:{entry.summary}" for entry in self.page_index.pages()
+        )
+        cache_key = cache.key('page-decisions', {
+            'doc': hash_text(doc_content),
+            'pages': hash_text(pages_listing)
+        }, config={'model': MODEL, 'source': source_file, 'planning': PLANNING_MODE}, script=__file__)
+        
+        cached = cache.get('page-decisions', cache_key)
+        if cached is not None:
+            print(f"\n🔮 Reusing cached page decisions for {source_file}")
+            return [tuple(decision) for decision in cached]
+        
+        with self._lock:
+            self._fallback_sources.discard(source_file)
+        perspectives = self._plan_perspectives(source_file, doc_content)
+        with self._lock:
+            used_fallback = source_file in self._fallback_sources
+        if not used_fallback:
+            cache.put('page-decisions', cache_key, [list(decision) for decision in perspectives])
+        return perspectives
+    
+    def _candidate_listing(self, source_file: str, doc_content: str, prefix: str) -> str:
+        """Prompt lines for the section's existing pages most relevant to this file"""
+        candidates = self.ranker.top(query_terms(source_file, doc_content), prefix, PAGE_CANDIDATES)
+        if not candidates:
+            return "  (No pages in this section yet)"
+        print(f"  🔎 Candidates: " + ", ".join(f"{page.path} ({score:.1f})" for page, score in candidates[:3]))
+        return "\n".join([
+            f"  {page.path}: {page.title}" + (f" (sections: {', '.join(page.headings[:8])})" if page.headings else "")
+            for page, score in candidates
+        ])
+    
+    def _plan_combined(self, source_file: str, doc_content: str) -> Optional[List[Decision]]:
         """
+        Choose perspectives and place each of them in a single LLM call
+        
+        Returns:
+            Decisions, or None when the call fails or the response does not
+            match the schema (the caller falls back to one call per perspective)
+        """
+        print(f"\n🗺️  Planning all perspectives for {source_file} in one call...")
+        
+        sections = "\n\n".join(
+            f"**{ptype.upper()}** (pages under {prefix}): {PERSPECTIVE_GUIDANCE[ptype]}\n"
+            f"Existing pages (most relevant first):\n{self._candidate_listing(source_file, doc_content, prefix)}"
+            for ptype, prefix in PERSPECTIVE_PREFIXES.items()
+        )
+        
+        prompt = f"""You are a professional documentation architect planning where new documentation goes.
+
+**Source File:** {source_file}
+
+**Generated Documentation:**
+```markdown
+{doc_content[:3000]}
+```
+
+**Documentation Perspectives:**
+
+{sections}
+
+**Your Task:**
+1. Decide which perspectives add value for this code (most code needs API docs, fewer need module/feature docs)
+2. For each chosen perspective, decide the BEST action:
+   - **CREATE** - New page for a completely new topic
+   - **APPEND** - Add to existing related page
+   - **MODIFY** - Update existing content
+
+**Output Format (JSON only):**
+{{
+  "perspectives": [
+    {{
+      "type": "api|module|feature",
+      "action": "create|append|modify",
+      "page_path": "<section>/page-name.md",
+      "reasoning": "Brief explanation",
+      "section_title": "Section name (if append/modify)"
+    }}
+  ]
+}}
+"""
+        
+        llm = get_client()
+        result_text = llm.call_chat(
+            model=MODEL,
+            messages=[
+                {'role': 'system', 'content': 'You are a documentation architect. Return ONLY valid JSON.'},
+                {'role': 'user', 'content': prompt}
+            ],
+            temperature=0.2,
+            max_tokens=16000,  # High limit - never truncate JSON
+            response_format='json',
+            timeout=45,
+            use_cache=True
+        )
+        if not result_text:
+            print(f"  ⚠️  Planning call failed")
+            return None
+        
+        try:
+            decisions = validate_plan(json.loads(result_text))
+        except ValueError:
+            decisions = None
+        if decisions is None:
+            print(f"  ⚠️  Plan does not match the expected schema")
+            return None
+        
+        for page_path, action, reasoning, _ in decisions:
+            print(f"  ✓ Decision: {action.upper()} → {page_path}")
+            print(f"  📝 Reasoning: {reasoning}")
+        return decisions
+    
+    def _plan_perspectives(self, source_file: str, doc_content: str) -> List[Decision]:
+        """
+        Plan the doc's perspectives: one combined call, or (as the fallback)
+        a perspective analysis call followed by concurrent placement calls
+        """
+        if PLANNING_MODE == 'combined':
+            plan = self._plan_combined(source_file, doc_content)
+            if plan:
+                return plan
+            print(f"  ↩️  Falling back to one call per perspective")
+        
         print(f"\n🔮 Generating multi-perspective docs for {source_file}...")
         
         perspectives = []
@@ -146,10 +387,11 @@ Be selective - only generate perspectives that add value. Most code needs API do
                 perspective_types = analysis.get('perspectives', [{'type': 'api'}])
                 print(f"  ✓ Generating {len(perspective_types)} perspectives")
                 
-                for perspective in perspective_types:
-                    ptype = perspective.get('type', 'api')
-                    decision = self.make_intelligent_decision(source_file, doc_content, ptype)
-                    perspectives.append(decision)
+                # Placement decisions are independent; the LLM client bounds how many run at once
+                ptypes = [perspective.get('type', 'api') for perspective in perspective_types]
+                with ThreadPoolExecutor(max_workers=max(1, len(ptypes))) as pool:
+                    perspectives.extend(pool.map(
+                        lambda ptype: self.make_intelligent_decision(source_file, doc_content, ptype), ptypes))
                 
                 return perspectives
             except Exception as e:
@@ -159,7 +401,7 @@ Be selective - only generate perspectives that add value. Most code needs API do
             # Fallback to API only
             return [self.make_intelligent_decision(source_file, doc_content, 'api')]
     
-    def make_intelligent_decision(self, source_file: str, doc_content: str, perspective: str = 'api') -> Tuple[str, str, str]:
+    def make_intelligent_decision(self, source_file: str, doc_content: str, perspective: str = 'api') -> Decision:
         """
         LLM makes agentic decision about documentation placement
         
@@ -167,25 +409,14 @@ Be selective - only generate perspectives that add value. Most code needs API do
             perspective: 'api', 'module', or 'feature'
         
         Returns:
-            (page_path, action, reasoning)
+            (page_path, action, reasoning, section_title)
             action: 'create', 'append', 'modify'
         """
         print(f"\n🤔 Making decision for {source_file} ({perspective} perspective)...")
         
-        # Build context for LLM
-        prefix = {'api': 'api/', 'module': 'modules/', 'feature': 'features/'}[perspective]
-        relevant_pages = {k: v for k, v in self.existing_pages.items() if k.startswith(prefix)}
-        
-        existing_pages_summary = "\n".join([
-            f"  {path}: {content[:200]}..." 
-            for path, content in list(relevant_pages.items())[:10]
-        ]) if relevant_pages else "  (No pages in this section yet)"
-        
-        perspective_guidance = {
-            'api': 'Focus on technical API details, function signatures, parameters, returns, examples.',
-            'module': 'Focus on architecture, design patterns, how components interact, module boundaries.',
-            'feature': 'Focus on user guides, how to use features, configuration, real-world examples.'
-        }
+        # Build context for LLM: the section's pages most relevant to this file
+        prefix = PERSPECTIVE_PREFIXES[perspective]
+        existing_pages_summary = self._candidate_listing(source_file, doc_content, prefix)
         
         prompt = f"""You are a professional documentation architect creating **{perspective.upper()}** documentation.
 
@@ -196,11 +427,11 @@ Be selective - only generate perspectives that add value. Most code needs API do
 {doc_content[:2000]}
 ```
 
-**Existing {perspective.upper()} Pages:**
+**Existing {perspective.upper()} Pages (most relevant first):**
 {existing_pages_summary}
 
 **Perspective Guidance:**
-{perspective_guidance[perspective]}
+{PERSPECTIVE_GUIDANCE[perspective]}
 
 **Your Task:**
 Decide the BEST action for integrating this into {prefix} documentation:
@@ -240,6 +471,7 @@ Decide the BEST action for integrating this into {prefix} documentation:
                 action = decision.get('action', 'create')
                 page_path = decision.get('page_path', f"{prefix}{Path(source_file).stem}.md")
                 reasoning = decision.get('reasoning', 'Auto-generated')
+                section_title = decision.get('section_title') or None
                 
                 # Ensure page_path starts with correct prefix
                 if not page_path.startswith(prefix):
@@ -248,7 +480,7 @@ Decide the BEST action for integrating this into {prefix} documentation:
                 print(f"  ✓ Decision: {action.upper()} → {page_path}")
                 print(f"  📝 Reasoning: {reasoning}")
                 
-                return (page_path, action, reasoning)
+                return (page_path, action, reasoning, section_title)
             except Exception as e:
                 print(f"  ⚠️  JSON parse error: {e}, using fallback")
                 return self._fallback_decision(source_file, perspective)
@@ -256,41 +488,170 @@ Decide the BEST action for integrating this into {prefix} documentation:
             print(f"  ⚠️  LLM failed, using fallback")
             return self._fallback_decision(source_file, perspective)
     
-    def _fallback_decision(self, source_file: str, perspective: str = 'api') -> Tuple[str, str, str]:
-        """Fallback decision if LLM fails"""
+    def _routed_decision(self, source_file: str, page_path: str, glob: str) -> Decision:
+        """Place a routed file: merge into its page if it is already there, else append (creating the page if needed)"""
+        pages = self.mapping['file_to_page'].get(source_file) or []
+        if isinstance(pages, str):
+            pages = [pages]
+        action = 'modify' if page_path in pages and page_path in self.page_index else 'append'
+        return (page_path, action, f'Routed by docs-routing.yml ({glob})', None)
+    
+    def _fallback_decision(self, source_file: str, perspective: str = 'api') -> Decision:
+        """Fallback decision if LLM fails: the file's routed page, else a page named after it"""
+        with self._lock:
+            self._fallback_sources.add(source_file)
         stem = Path(source_file).stem
-        prefix = {'api': 'api/', 'module': 'modules/', 'feature': 'features/'}[perspective]
-        
-        if 'auth' in source_file.lower():
-            name = 'authentication' if perspective == 'api' else 'auth-system'
-            return (f'{prefix}{name}.md', 'create', f'Authentication {perspective}')
-        elif 'database' in source_file.lower():
-            name = 'database' if perspective == 'api' else 'data-layer'
-            return (f'{prefix}{name}.md', 'create', f'Database {perspective}')
-        elif 'payment' in source_file.lower():
-            name = 'payments' if perspective == 'api' else 'payment-system'
-            return (f'{prefix}{name}.md', 'create', f'Payment {perspective}')
-        elif 'email' in source_file.lower():
-            name = 'notifications' if perspective == 'api' else 'notification-system'
-            return (f'{prefix}{name}.md', 'create', f'Email/notifications {perspective}')
-        else:
-            return (f'{prefix}{stem}.md', 'create', f'{stem} {perspective}')
+        prefix = PERSPECTIVE_PREFIXES[perspective]
+        
+        route = self.router.match(source_file)
+        if route and route.pages and (perspective == 'api' or route.pages.startswith(prefix)):
+            return (route.pages, 'create', f'{Path(route.pages).stem} {perspective} ({route.glob})', None)
+        return (f'{prefix}{stem}.md', 'create', f'{stem} {perspective}', None)
+    
+    def _page_lock(self, page_path: str) -> threading.Lock:
+        """Lock serializing every read-modify-write of one page"""
+        with self._lock:
+            return self._page_locks.setdefault(os.path.normpath(page_path), threading.Lock())
     
     def apply_documentation_change(self, page_path: str, action: str, 
                                   doc_content: str, section_title: str = None) -> bool:
-        """Apply documentation change based on action"""
+        """Apply documentation change based on action (safe to call concurrently, also for one page)"""
         full_path = PAGES_DIR / page_path
         full_path.parent.mkdir(parents=True, exist_ok=True)
         
-        if action == 'create':
-            return self._create_page(full_path, doc_content)
-        elif action == 'append':
-            return self._append_to_page(full_path, doc_content, section_title)
-        elif action == 'modify':
-            return self._modify_page(full_path, doc_content, section_title)
-        else:
-            print(f"⚠️  Unknown action: {action}")
-            return False
+        with self._page_lock(page_path):
+            if action == 'create':
+                success = self._create_page(full_path, doc_content)
+            elif action == 'append':
+                success = self._append_to_page(full_path, doc_content, section_title)
+            elif action == 'modify':
+                success = self._modify_page(full_path, doc_content, section_title)
+            else:
+                print(f"⚠️  Unknown action: {action}")
+                return False
+            
+            if success:
+                self.page_index.update(page_path)
+        
+        if success:
+            with self._lock:
+                self._ranker = None
+        return success
+    
+    def record_mapping(self, source_file: str, page_path: str, action: str):
+        """Record that a source file's docs went to a page (several pages per file are supported)"""
+        file_to_page = self.mapping['file_to_page']
+        if source_file not in file_to_page:
+            file_to_page[source_file] = [page_path]
+        elif isinstance(file_to_page[source_file], str):
+            # Migrate old string format to list
+            old_page = file_to_page[source_file]
+            file_to_page[source_file] = [old_page, page_path]
+        elif page_path not in file_to_page[source_file]:
+            file_to_page[source_file].append(page_path)
+        
+        page_metadata = self.mapping['page_metadata']
+        if page_path not in page_metadata:
+            page_metadata[page_path] = {
+                'created': datetime.now().isoformat(),
+                'sources': []
+            }
+        if source_file not in page_metadata[page_path]['sources']:
+            page_metadata[page_path]['sources'].append(source_file)
+        page_metadata[page_path]['last_updated'] = datetime.now().isoformat()
+        page_metadata[page_path]['last_action'] = action
+    
+    def canonical_page(self, page_path: str) -> str:
+        """The page a consolidated duplicate was merged into (the page itself otherwise)"""
+        merged_pages = self.mapping.get('merged_pages', {})
+        seen = set()
+        while page_path in merged_pages and page_path not in seen:
+            seen.add(page_path)
+            page_path = merged_pages[page_path]
+        return page_path
+    
+    def consolidate_duplicates(self, clusters: List[List[str]]) -> List[Dict]:
+        """
+        Merge each group of near-duplicate pages into one page and point the mapping at it
+        
+        The page with the most sources (then the longest one) is kept; the others
+        are folded into it section by section and deleted.
+        
+        Returns:
+            {'page': kept page, 'merged': deleted pages} per group
+        """
+        page_metadata = self.mapping['page_metadata']
+        
+        def rank(page_path: str) -> Tuple[int, int, str]:
+            entry = self.page_index.entries.get(page_path)
+            sources = page_metadata.get(page_path, {}).get('sources', [])
+            return len(sources), entry.size if entry else 0, page_path
+        
+        consolidated = []
+        for cluster in clusters:
+            canonical = max(cluster, key=rank)
+            duplicates = [page_path for page_path in cluster if page_path != canonical]
+            content = self.page_index.body(canonical)
+            if content is None:
+                continue
+            
+            merged = []
+            for duplicate in duplicates:
+                duplicate_content = self.page_index.body(duplicate)
+                entry = self.page_index.entries.get(duplicate)
+                if duplicate_content is None or entry is None:
+                    continue
+                content, stats = merge_duplicate(content, duplicate_content)
+                print(f"  🔗 Merged {duplicate} into {canonical}: {stats['added']} sections added, "
+                      f"{stats['kept']} kept")
+                merged.append(duplicate)
+            if not merged:
+                continue
+            
+            with open(PAGES_DIR / canonical, 'w', encoding='utf-8') as f:
+                f.write(content)
+            self.page_index.update(canonical)
+            for duplicate in merged:
+                (PAGES_DIR / duplicate).unlink()
+                self.page_index.update(duplicate)
+            self._redirect_pages(merged, canonical)
+            consolidated.append({'page': canonical, 'merged': merged})
+        
+        if consolidated:
+            self._ranker = None
+        return consolidated
+    
+    def _redirect_pages(self, duplicates: List[str], canonical: str):
+        """Rewrite the mapping so sources of the merged pages point at the kept page"""
+        file_to_page = self.mapping['file_to_page']
+        for source_file, pages in file_to_page.items():
+            listed = [pages] if isinstance(pages, str) else pages
+            if not any(page_path in duplicates for page_path in listed):
+                continue
+            redirected = []
+            for page_path in listed:
+                page_path = canonical if page_path in duplicates else page_path
+                if page_path not in redirected:
+                    redirected.append(page_path)
+            file_to_page[source_file] = redirected
+        
+        page_metadata = self.mapping['page_metadata']
+        kept = page_metadata.setdefault(canonical, {'created': datetime.now().isoformat(), 'sources': []})
+        for duplicate in duplicates:
+            for source_file in page_metadata.pop(duplicate, {}).get('sources', []):
+                if source_file not in kept['sources']:
+                    kept['sources'].append(source_file)
+            kept.setdefault('merged_from', []).append(duplicate)
+        kept['last_updated'] = datetime.now().isoformat()
+        kept['last_action'] = 'consolidate'
+        
+        # Later placements on a merged page land on the kept one
+        merged_pages = self.mapping.setdefault('merged_pages', {})
+        for page_path, target in merged_pages.items():
+            if target in duplicates:
+                merged_pages[page_path] = canonical
+        for duplicate in duplicates:
+            merged_pages[duplicate] = canonical
     
     def _create_page(self, path: Path, content: str) -> bool:
         """Create a new documentation page"""
@@ -365,170 +726,119 @@ layout: default
     
     def _intelligent_merge(self, existing: str, new_content: str, 
                           section_title: str, page_name: str) -> str:
-        """Use LLM to intelligently merge new content into existing page"""
-        print(f"    🧠 Using LLM to merge content...")
+        """
+        Merge new content into the page section by section
+        
+        Only the subtree the doc belongs to is touched, and the LLM only sees
+        sections whose old and new text differ, so long pages are never truncated.
+        """
+        merged, stats = merge_markdown(
+            existing, new_content, section_title,
+            lambda old, new, heading: self._resolve_section(old, new, page_name)
+        )
+        where = f"'{stats['target']}' (by {stats['found_by']})" if stats['target'] else 'a new section'
+        print(f"    🧩 Merged into {where}: {stats['unchanged']} unchanged, {stats['added']} added, "
+              f"{stats['replaced']} replaced, {stats['resolved']} merged by LLM")
+        return merged
+    
+    def _resolve_section(self, old_section: str, new_section: str, page_name: str) -> Optional[str]:
+        """LLM merge of one conflicting section; None keeps the new version"""
+        print(f"    🧠 Using LLM to merge a section of {page_name}...")
         
-        prompt = f"""You are a documentation editor. Intelligently merge new documentation into an existing page.
-
-**Existing Page ({page_name}):**
-```markdown
-{existing[:3000]}
-```
-
-**New Content to Integrate:**
-```markdown
-{new_content[:2000]}
-```
-
-**Section Focus:** {section_title or 'General update'}
-
-**Your Task:**
-1. If content is about NEW functions/features → ADD new section
-2. If content UPDATES existing functions → REPLACE old section with new
-3. If content is SIMILAR to existing → MERGE intelligently
-4. Maintain existing frontmatter (---)
-5. Keep consistent formatting and structure
-6. Update "Last updated" timestamps
-
-**CRITICAL:** Return ONLY the raw markdown content. Do NOT wrap it in code fences or ```markdown blocks.
-Return the COMPLETE merged page content as plain markdown.
-"""
-
-        # Use LLM wrapper
         llm = get_client()
         merged = llm.call_chat(
             model=MODEL,
             messages=[
                 {'role': 'system', 'content': 'You are a documentation editor. Return clean markdown.'},
-                {'role': 'user', 'content': prompt}
+                {'role': 'user', 'content': resolve_prompt(old_section, new_section, page_name)}
             ],
             temperature=0.3,
             max_tokens=4000,
             response_format='text',
             timeout=45,
-            use_cache=False  # Don't cache merges (content changes)
+            use_cache=True  # the prompt holds both versions of the section
         )
         
         if merged:
-            print(f"    ✓ LLM merged content successfully")
-            # Remove any code fences the LLM might have added
-            merged = merged.strip()
-            if merged.startswith('```markdown'):
-                merged = merged[11:]  # Remove ```markdown
-            if merged.startswith('```'):
-                merged = merged[3:]
-            if merged.endswith('```'):
-                merged = merged[:-3]
-            return merged.strip()
-        else:
-            print(f"    ⚠️  LLM merge failed, appending instead")
-            return existing + f"\n\n## {section_title or 'Update'}\n\n" + new_content
+            return strip_fences(merged)
+        print(f"    ⚠️  LLM merge failed, keeping the updated section")
+        return None
     
-    def generate_index_page(self):
-        """Generate/update main index.md and section index pages"""
+    def generate_index_page(self, force: bool = False):
+        """
+        Update main index.md and the section index pages from the page index
+        
+        Only sections that gained or lost pages since the last run are
+        re-rendered (all of them with force), and an index file is only
+        written when its content actually changes, so unchanged index pages
+        keep their mtime and the site build does not redo them.
+        """
         print("\n📑 Generating index pages...")
         
-        # Collect all pages
-        all_pages = {}
-        for md_file in PAGES_DIR.rglob('*.md'):
-            if md_file.name == 'index.md':
+        self.page_index.refresh()
+        dirty = {
+            path.split('/')[0] for path in self.page_index.take_added_removed()
+            if '/' in path and Path(path).name != 'index.md'
+        }
+        written, kept = [], 0
+        
+        for section, spec in SECTION_INDEXES.items():
+            relative = f'{section}/index.md'
+            if not force and section not in dirty and relative in self.page_index:
+                kept += 1
                 continue
-            relative = md_file.relative_to(PAGES_DIR)
-            # Normalize path to forward slashes for cross-platform consistency
-            relative_str = str(relative).replace('\\', '/')
-            all_pages[relative_str] = md_file
-        
-        # Generate API index
-        api_pages = [p for p in all_pages.keys() if p.startswith('api/')]
-        if api_pages:
-            api_index = f"""---
-title: API Reference
-layout: default
-category: API Reference
----
-
-# API Reference
-
-Low-level API documentation for all functions, classes, and interfaces.
-
-## Available APIs
-
-"""
-            for page in sorted(api_pages):
-                title = Path(page).stem.replace('-', ' ').title()
-                api_index += f"- **[{title}]({Path(page).name})** - Technical API documentation\n"
-            
-            api_index += f"\n**Total:** {len(api_pages)} API pages\n\n"
-            api_index += "---\n\n*Auto-generated by CI/CD Documentation System*\n"
-            
-            with open(PAGES_DIR / 'api' / 'index.md', 'w') as f:
-                f.write(api_index)
-            print(f"  ✓ Updated api/index.md with {len(api_pages)} pages")
-        
-        # Generate Modules index
-        module_pages = [p for p in all_pages.keys() if p.startswith('modules/')]
-        modules_index = f"""---
-title: Modules
-layout: default
-category: Modules
----
-
-# Modules
-
-Module architecture and design documentation.
-
-## Available Modules
-
-"""
-        if module_pages:
-            for page in sorted(module_pages):
-                title = Path(page).stem.replace('-', ' ').title()
-                modules_index += f"- **[{title}]({Path(page).name})** - Module architecture and design\n"
-            modules_index += f"\n**Total:** {len(module_pages)} modules\n\n"
-        else:
-            modules_index += "*No module documentation yet. Module-level docs will be auto-generated as the codebase evolves.*\n\n"
-            modules_index += "Modules provide architectural overview, design decisions, and how different components interact.\n\n"
+            pages = [entry.path for entry in self.page_index.pages(f'{section}/') if Path(entry.path).name != 'index.md']
+            content = self._render_section_index(spec, pages)
+            if content is None:
+                continue
+            if self._write_index(relative, content):
+                written.append(relative)
+                print(f"  ✓ Updated {relative} with {len(pages)} pages")
+            else:
+                kept += 1
         
-        modules_index += "---\n\n*Auto-generated by CI/CD Documentation System*\n"
+        # Main index: its timestamp records the last change to the set of pages
+        if force or dirty or 'index.md' not in self.page_index:
+            if self._write_index('index.md', self._render_main_index()):
+                written.append('index.md')
+                print(f"  ✓ Generated main index.md")
+        else:
+            kept += 1
         
-        (PAGES_DIR / 'modules').mkdir(exist_ok=True)
-        with open(PAGES_DIR / 'modules' / 'index.md', 'w') as f:
-            f.write(modules_index)
-        print(f"  ✓ Updated modules/index.md")
+        print(f"  ✓ {len(written)} index pages written, {kept} unchanged")
+        return written
+    
+    def _render_section_index(self, spec: Dict, pages: List[str]) -> Optional[str]:
+        """Markdown of a section's index page (None for an empty section without placeholder text)"""
+        if not pages and spec['empty'] is None:
+            return None
         
-        # Generate Features index
-        feature_pages = [p for p in all_pages.keys() if p.startswith('features/')]
-        features_index = f"""---
-title: Features
+        content = f"""---
+title: {spec['title']}
 layout: default
-category: Features
+category: {spec['title']}
 ---
 
-# Features
+# {spec['title']}
 
-User-facing feature documentation and guides.
+{spec['intro']}
 
-## Available Features
+## {spec['heading']}
 
 """
-        if feature_pages:
-            for page in sorted(feature_pages):
+        if pages:
+            for page in sorted(pages):
                 title = Path(page).stem.replace('-', ' ').title()
-                features_index += f"- **[{title}]({Path(page).name})** - Feature guide and tutorial\n"
-            features_index += f"\n**Total:** {len(feature_pages)} features\n\n"
+                content += f"- **[{title}]({Path(page).name})** - {spec['blurb']}\n"
+            content += f"\n**Total:** {len(pages)} {spec['total']}\n\n"
         else:
-            features_index += "*No feature documentation yet. Feature guides will be auto-generated as you develop.*\n\n"
-            features_index += "Features provide user-facing documentation on how to use and configure the system.\n\n"
-        
-        features_index += "---\n\n*Auto-generated by CI/CD Documentation System*\n"
+            content += spec['empty']
         
-        (PAGES_DIR / 'features').mkdir(exist_ok=True)
-        with open(PAGES_DIR / 'features' / 'index.md', 'w') as f:
-            f.write(features_index)
-        print(f"  ✓ Updated features/index.md")
-        
-        # Generate main index  
-        index_content = f"""---
+        content += "---\n\n*Auto-generated by CI/CD Documentation System*\n"
+        return content
+    
+    def _render_main_index(self) -> str:
+        return f"""---
 title: Home
 layout: default
 ---
@@ -540,8 +850,8 @@ This is the auto-generated documentation website for the CI/CD Monitor Test proj
 ## Quick Links
 
 - [API Reference](api/) - Complete API documentation for all modules
-- [Guides](guides/) - Step-by-step tutorials and how-to guides
-- [Changelog](changelog/) - Version history and notable changes
+- [Modules](modules/) - Architecture and design documentation
+- [Features](features/) - User-facing feature guides and tutorials
 
 ## Features
 
@@ -557,15 +867,22 @@ This documentation is automatically generated and maintained by our intelligent
 
 *Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*
 """
+    
+    def _write_index(self, relative: str, content: str) -> bool:
+        """Write an index page unless the page index shows it already has this content"""
+        entry = self.page_index.entries.get(relative)
+        if entry and entry.hash == content_hash(content.encode('utf-8')):
+            return False
         
-        index_path = PAGES_DIR / 'index.md'
-        with open(index_path, 'w') as f:
-            f.write(index_content)
-        
-        print(f"  ✓ Generated main index.md")
+        path = PAGES_DIR / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        self.page_index.update(relative)
+        return True
 
 
-def process_docs_to_pages(doc_files: List[str]):
+def process_docs_to_pages(doc_files: List[str]) -> List[Dict]:
     """Process documentation files to GitHub Pages with multi-perspective generation"""
     print("="*80)
     print("INTELLIGENT GITHUB PAGES MANAGER")
@@ -574,10 +891,8 @@ def process_docs_to_pages(doc_files: List[str]):
     manager = PagesManager()
     changes_made = []
     
-    for doc_file in doc_files:
-        if not os.path.exists(doc_file):
-            continue
-        
+    def process(doc_file: str) -> List[Dict]:
+        """Place one doc file's perspectives; returns the changes applied"""
         print(f"\n📄 Processing: {doc_file}")
         
         # Read doc content
@@ -592,50 +907,74 @@ def process_docs_to_pages(doc_files: List[str]):
         perspectives = manager.generate_multi_perspective_docs(source_file, content)
         
         # Apply each perspective
-        for page_path, action, reasoning in perspectives:
-            success = manager.apply_documentation_change(page_path, action, content)
-            
-            if success:
-                changes_made.append({
+        applied = []
+        for page_path, action, reasoning, section_title in perspectives:
+            canonical = manager.canonical_page(page_path)
+            if canonical != page_path:
+                # The page was consolidated into another one: update that page instead
+                page_path, action = canonical, 'modify' if action == 'create' else action
+            if manager.apply_documentation_change(page_path, action, content, section_title):
+                applied.append({
                     'source': source_file,
                     'page': page_path,
                     'action': action,
                     'reasoning': reasoning
                 })
-                
-                # Record mapping (support multiple pages per file)
-                if source_file not in manager.mapping['file_to_page']:
-                    manager.mapping['file_to_page'][source_file] = [page_path]
-                elif isinstance(manager.mapping['file_to_page'][source_file], str):
-                    # Migrate old string format to list
-                    old_page = manager.mapping['file_to_page'][source_file]
-                    manager.mapping['file_to_page'][source_file] = [old_page, page_path]
-                elif page_path not in manager.mapping['file_to_page'][source_file]:
-                    manager.mapping['file_to_page'][source_file].append(page_path)
-                
-                if page_path not in manager.mapping['page_metadata']:
-                    manager.mapping['page_metadata'][page_path] = {
-                        'created': datetime.now().isoformat(),
-                        'sources': []
-                    }
-                if source_file not in manager.mapping['page_metadata'][page_path]['sources']:
-                    manager.mapping['page_metadata'][page_path]['sources'].append(source_file)
-                manager.mapping['page_metadata'][page_path]['last_updated'] = datetime.now().isoformat()
-                manager.mapping['page_metadata'][page_path]['last_action'] = action
+        return applied
+    
+    # Docs are placed concurrently: LLM calls share the client's concurrency limit
+    # and writes to one page are serialized; the mapping is updated in doc order
+    doc_files = [doc_file for doc_file in doc_files if os.path.exists(doc_file)]
+    workers = PAGES_WORKERS or get_client().max_concurrency
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(doc_files)))) as pool:
+        for applied in pool.map(process, doc_files):
+            for change in applied:
+                changes_made.append(change)
+                manager.record_mapping(change['source'], change['page'], change['action'])
+    
+    # Near-duplicate pages: only pages changed since the last run are fingerprinted
+    duplicates = DuplicateIndex()
+    consolidated = []
+    if DEDUP_MODE != 'off':
+        manager.page_index.refresh()
+        dedup_stats = duplicates.update(manager.page_index)
+        print(f"\n🔍 Near-duplicates: {dedup_stats['changed']} pages fingerprinted, "
+              f"{dedup_stats['compared']} compared, {dedup_stats['pairs']} duplicate pairs")
+        if DEDUP_MODE == 'consolidate' and duplicates.pairs():
+            consolidated = manager.consolidate_duplicates(duplicates.clusters())
+            duplicates.update(manager.page_index)
+        duplicates.save()
     
     # Generate index page
     manager.generate_index_page()
     
-    # Save mapping
+    # Search index: only pages whose content changed are re-indexed
+    search_stats = SearchIndex(PAGES_DIR).update(manager.page_index)
+    
+    # Save mapping and the page index (generate_index_page brought it up to date)
     manager.save_mapping()
+    manager.page_index.save()
     
     # Generate summary
     summary = f"""# GitHub Pages Update Summary
 
 **Changes Made:** {len(changes_made)}
 
+{manager.router.report_line()}
+
 """
     
+    if consolidated:
+        summary += "## Consolidated Pages\n\n"
+        for group in consolidated:
+            summary += f"- `{group['page']}` now includes {', '.join(f'`{page}`' for page in group['merged'])}\n"
+        summary += "\n"
+    if duplicates.pairs():
+        summary += "## Near-Duplicate Pages\n\n"
+        for first, second, similarity in duplicates.pairs():
+            summary += f"- `{first}` and `{second}` ({similarity:.0%} similar)\n"
+        summary += "\n"
+    
     for change in changes_made:
         summary += f"### {change['source']} -> {change['page']}\n"
         summary += f"- **Action:** {change['action'].upper()}\n"
@@ -648,8 +987,17 @@ def process_docs_to_pages(doc_files: List[str]):
     print("GITHUB PAGES MANAGER COMPLETE")
     print("="*80)
     print(f"✓ {len(changes_made)} pages updated")
+    print(f"✓ {manager.router.hits}/{manager.router.hits + manager.router.misses} docs routed without the LLM")
     print(f"✓ Mapping saved to {MAPPING_FILE}")
     print(f"✓ Site generated in {PAGES_DIR}")
+    print(f"✓ Search index: {search_stats['pages']} pages, {search_stats['changed']} re-indexed, "
+          f"{search_stats['removed']} removed, {search_stats['shards']} shards rewritten")
+    if consolidated:
+        print(f"✓ {sum(len(group['merged']) for group in consolidated)} duplicate pages merged")
+    elif duplicates.pairs():
+        print(f"⚠️  {len(duplicates.pairs())} near-duplicate page pairs (set PAGES_DEDUP=consolidate to merge them)")
+    
+    return changes_made
 
 
 if __name__ == '__main__':
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Documentation Pipeline Runner
+
+Runs every auto-docs stage in a single interpreter:
+1. Stages form a DAG and hand typed results to each other in memory
+2. Independent stages (doc generation, code analysis) run concurrently
+3. Per-stage timings are reported at the end
+
+Artifact files (doc_output.md, breaking_changes.txt, analysis_report.md, ...)
+are still written for the workflow steps that post PR comments and commit,
+but no stage re-parses another stage's files.
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+import importlib.util
+from pathlib import Path
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+SCRIPTS_DIR = Path(__file__).parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+from stage_cache import get_cache
+
+CHANGED_FILES = 'changed_files.txt'
+
+_load_lock = threading.Lock()
+
+
+def load_script(name: str):
+    """Import a hyphenated script (e.g. code-analyzer.py) as a module"""
+    module_name = name.replace('-', '_')
+    with _load_lock:
+        if module_name not in sys.modules:
+            spec = importlib.util.spec_from_file_location(module_name, SCRIPTS_DIR / f"{name}.py")
+            module = importlib.util.module_from_spec(spec)
+            sys.modules[module_name] = module
+            try:
+                spec.loader.exec_module(module)
+            except Exception:
+                del sys.modules[module_name]
+                raise
+        return sys.modules[module_name]
+
+
+# ---------------------------------------------------------------------------
+# Stage results
+# ---------------------------------------------------------------------------
+
+@dataclass
+class ChangeSet:
+    changed_files: List[str] = field(default_factory=list)
+    code_files: List[str] = field(default_factory=list)
+
+
+@dataclass
+class DocsResult:
+    doc_files: List[str] = field(default_factory=list)
+    breaking_changes: List[Dict] = field(default_factory=list)
+    changelog_entries: List[Dict] = field(default_factory=list)
+    impacts: List[Dict] = field(default_factory=list)
+
+
+@dataclass
+class AnalysisResult:
+    summary: Optional[Dict] = None
+    analysis_dir: Optional[str] = None
+
+
+@dataclass
+class WikiResult:
+    updates: List[Dict] = field(default_factory=list)
+
+    @property
+    def pages(self) -> List[str]:
+        return [update['page'] for update in self.updates]
+
+
+@dataclass
+class PagesResult:
+    changes: List[Dict] = field(default_factory=list)
+
+
+@dataclass
+class NotifyResult:
+    sent: List[Tuple[str, bool]] = field(default_factory=list)
+
+
+# ---------------------------------------------------------------------------
+# Stages
+# ---------------------------------------------------------------------------
+
+def run_changes(results: Dict[str, Any]) -> ChangeSet:
+    """Read the changed file list produced by the workflow"""
+    if not os.path.exists(CHANGED_FILES):
+        print("No changed files detected")
+        return ChangeSet()
+
+    with open(CHANGED_FILES, 'r') as f:
+        changed_files = [line.strip() for line in f if line.strip()]
+
+    code_files = load_script('generate-docs').filter_code_files(changed_files)
+    print(f"✓ {len(changed_files)} changed files, {len(code_files)} code files")
+    return ChangeSet(changed_files=changed_files, code_files=code_files)
+
+
+def run_docs(results: Dict[str, Any]) -> DocsResult:
+    """Generate documentation, changelog and PR comment"""
+    changes = results['changes']
+    if not changes.code_files:
+        return DocsResult()
+
+    output = load_script('generate-docs').generate_docs(changes.code_files)
+    if output is None:
+        return DocsResult()
+
+    return DocsResult(
+        doc_files=output['doc_files'],
+        breaking_changes=output['breaking_changes'],
+        changelog_entries=output['changelog_entries'],
+        impacts=output['impacts']
+    )
+
+
+def run_analysis(results: Dict[str, Any]) -> AnalysisResult:
+    """Run quality, security and performance analysis"""
+    changes = results['changes']
+    if not changes.code_files:
+        return AnalysisResult()
+
+    analyzer = load_script('code-analyzer')
+    analysis_dir, summary = analyzer.write_analysis(analyzer.iter_analysis(changes.code_files))
+    return AnalysisResult(summary=summary, analysis_dir=str(analysis_dir))
+
+
+def run_wiki(results: Dict[str, Any]) -> WikiResult:
+    """Route generated docs to wiki pages"""
+    docs = results['docs']
+    if not docs or not docs.doc_files:
+        return WikiResult()
+
+    updates = load_script('wiki-manager').process_documentation_to_wiki(docs.doc_files)
+    return WikiResult(updates=updates)
+
+
+def run_pages(results: Dict[str, Any]) -> PagesResult:
+    """Route generated docs to GitHub Pages"""
+    docs = results['docs']
+    if not docs or not docs.doc_files:
+        return PagesResult()
+
+    changes = load_script('pages-manager').process_docs_to_pages(docs.doc_files)
+    return PagesResult(changes=changes)
+
+
+def run_notify(results: Dict[str, Any]) -> NotifyResult:
+    """Send notifications built from the in-memory stage results"""
+    notifier = load_script('send-notifications')
+    changes = results['changes']
+    docs = results.get('docs')
+    analysis = results.get('analysis')
+    wiki = results.get('wiki')
+
+    data = {
+        'changed_files': changes.changed_files,
+        'breaking_changes': docs.breaking_changes if docs else [],
+        'changelog_entries': docs.changelog_entries if docs else [],
+        'wiki_pages': wiki.pages if wiki else [],
+        'analysis_summary': notifier.summarize_totals(analysis.summary) if analysis else None
+    }
+    return NotifyResult(sent=notifier.send_notifications(data))
+
+
+@dataclass
+class Stage:
+    name: str
+    run: Callable[[Dict[str, Any]], Any]
+    deps: Tuple[str, ...] = ()
+
+
+STAGES = [
+    Stage('changes', run_changes),
+    Stage('docs', run_docs, ('changes',)),
+    Stage('analysis', run_analysis, ('changes',)),
+    Stage('wiki', run_wiki, ('changes', 'docs')),
+    Stage('pages', run_pages, ('changes', 'docs')),
+    Stage('notify', run_notify, ('changes', 'docs', 'analysis', 'wiki')),
+]
+
+
+# ---------------------------------------------------------------------------
+# Scheduler
+# ---------------------------------------------------------------------------
+
+class Pipeline:
+    def __init__(self, stages: List[Stage]):
+        self.stages = {stage.name: stage for stage in stages}
+        self.order = [stage.name for stage in stages]
+
+    def run(self, selected: List[str], max_workers: int = 4) -> Tuple[Dict[str, Any], Dict[str, Dict]]:
+        """
+        Run the selected stages as soon as their dependencies are resolved
+
+        Deselected stages resolve to None so their dependants still run.
+        Stages whose dependencies failed are skipped.
+
+        Returns:
+            (results by stage name, timing/status report by stage name)
+        """
+        results: Dict[str, Any] = {name: None for name in self.order if name not in selected}
+        report: Dict[str, Dict] = {}
+        failed = set()
+        pending = [name for name in self.order if name in selected]
+        running = {}
+        pipeline_start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            while pending or running:
+                for name in list(pending):
+                    stage = self.stages[name]
+                    if any(dep in failed for dep in stage.deps):
+                        pending.remove(name)
+                        failed.add(name)
+                        report[name] = {'status': 'skipped', 'seconds': 0.0}
+                        print(f"\n⏭️  Skipping stage '{name}' (dependency failed)")
+                    elif all(dep in results for dep in stage.deps):
+                        pending.remove(name)
+                        snapshot = dict(results)
+                        running[pool.submit(self._run_stage, stage, snapshot)] = name
+
+                if not running:
+                    if pending:
+                        raise RuntimeError(f"Unresolvable stage dependencies: {pending}")
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    result, seconds, error = future.result()
+                    if error:
+                        failed.add(name)
+                        report[name] = {'status': 'failed', 'seconds': seconds, 'error': error}
+                    else:
+                        results[name] = result
+                        report[name] = {'status': 'ok', 'seconds': seconds}
+
+        report = {name: report[name] for name in self.order if name in report}
+        report['total'] = {'status': 'failed' if failed else 'ok',
+                           'seconds': time.perf_counter() - pipeline_start}
+        return results, report
+
+    def _run_stage(self, stage: Stage, results: Dict[str, Any]):
+        print(f"\n▶️  Stage '{stage.name}' started")
+        start = time.perf_counter()
+        try:
+            result = stage.run(results)
+            error = None
+        except (Exception, SystemExit) as e:
+            result = None
+            error = f"{type(e).__name__}: {e}"
+            print(f"❌ Stage '{stage.name}' failed: {error}")
+        seconds = time.perf_counter() - start
+        print(f"⏱️  Stage '{stage.name}' finished in {seconds:.2f}s")
+        return result, seconds, error
+
+
+def print_timings(report: Dict[str, Dict]):
+    """Print per-stage timings (and append them to the GitHub step summary)"""
+    lines = ["| Stage | Status | Time |", "|-------|--------|------|"]
+    for name, info in report.items():
+        lines.append(f"| {name} | {info['status']} | {info['seconds']:.2f}s |")
+
+    print("\n" + "="*80)
+    print("PIPELINE TIMINGS")
+    print("="*80)
+    for name, info in report.items():
+        status = {'ok': '✓', 'failed': '❌', 'skipped': '⏭️'}[info['status']]
+        print(f"{status} {name:<10} {info['seconds']:8.2f}s")
+        if info.get('error'):
+            print(f"     {info['error']}")
+
+    cache_stats = get_cache().stats
+    if cache_stats:
+        print("\nStage cache:")
+        for stage, counts in sorted(cache_stats.items()):
+            print(f"  {stage:<15} {counts['hits']} hit(s), {counts['misses']} miss(es)")
+            lines.append(f"| cache: {stage} | {counts['hits']} hit(s) | {counts['misses']} miss(es) |")
+    
+    summary_file = os.environ.get('GITHUB_STEP_SUMMARY')
+    if summary_file:
+        with open(summary_file, 'a') as f:
+            f.write("## ⏱️ Documentation Pipeline\n\n" + "\n".join(lines) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the documentation pipeline in one process')
+    parser.add_argument('--stages', help='Comma-separated stages to run (default: all)')
+    parser.add_argument('--skip', default='', help='Comma-separated stages to skip')
+    parser.add_argument('--workers', type=int, default=4, help='Max concurrently running stages')
+    args = parser.parse_args()
+
+    pipeline = Pipeline(STAGES)
+    selected = args.stages.split(',') if args.stages else list(pipeline.order)
+    skipped = {s for s in args.skip.split(',') if s}
+    unknown = (set(selected) | skipped) - set(pipeline.order)
+    if unknown:
+        parser.error(f"Unknown stage(s): {', '.join(sorted(unknown))}")
+
+    # 'changes' feeds every other stage
+    selected = ['changes'] + [s for s in selected if s != 'changes' and s not in skipped]
+
+    print("="*80)
+    print("DOCUMENTATION PIPELINE")
+    print("="*80)
+    print(f"Stages: {', '.join(selected)}")
+
+    _, report = pipeline.run(selected, max_workers=args.workers)
+    print_timings(report)
+
+    pruned = get_cache().prune()
+    if pruned:
+        print(f"🧹 Removed {pruned} stale stage cache entries")
+
+    if report['total']['status'] != 'ok':
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Content-addressed store for code analysis results
+Results are keyed by git blob hash, file type and analyzer version, so an
+unchanged file is never analyzed twice; each run records a manifest and the
+delta against the previously known state instead of a full results copy.
+Only the current analyzer version's objects are kept: results of another
+version are never read again.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Optional
+
+STORE_DIR = Path(os.environ.get('ANALYSIS_STORE_DIR', 'code-analysis'))
+
+
+def blob_hash(path) -> Optional[str]:
+    """Git blob hash of a file (same as `git hash-object`), None if unreadable"""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+
+
+def _write_json(path: Path, data):
+    """Write JSON atomically so an interrupted run never leaves a torn file"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+class ResultStore:
+    """
+    Layout under the store root:
+        objects/<version>/<blob[:2]>/<blob><ext>.json   per-file results
+        objects/<version>/functions.json                per-function results by body hash
+        index.json                                      latest blob per path
+        <timestamp>_<sha>/manifest.json                 one per run
+    """
+
+    def __init__(self, root: Path = STORE_DIR):
+        self.root = Path(root)
+        self.objects_dir = self.root / 'objects'
+        self.index_file = self.root / 'index.json'
+
+    def _object_path(self, version: str, blob: str, file_path: str) -> Path:
+        # The extension picks the language, so identical bytes in a .js and a .ts file differ
+        suffix = Path(file_path).suffix.lower()
+        return self.objects_dir / version / blob[:2] / f"{blob}{suffix}.json"
+
+    def get(self, version: str, blob: str, file_path: str) -> Optional[Dict]:
+        """Stored result for this content, re-attached to file_path (None on miss)"""
+        path = self._object_path(version, blob, file_path)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return {'file': file_path, **result}
+
+    def has(self, version: str, blob: str, file_path: str) -> bool:
+        """Whether a result for this content is stored"""
+        return self._object_path(version, blob, file_path).exists()
+
+    def put(self, version: str, blob: str, result: Dict):
+        """Store a result without its path (failures are non-fatal)"""
+        stored = {key: value for key, value in result.items() if key != 'file'}
+        try:
+            _write_json(self._object_path(version, blob, result['file']), stored)
+        except OSError as e:
+            print(f"  ⚠️  Could not store analysis result for {result['file']}: {e}")
+
+    def load_functions(self, version: str) -> Dict[str, List]:
+        """Per-function results (function body hash -> findings) for an analyzer version"""
+        try:
+            with open(self.objects_dir / version / 'functions.json', 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_functions(self, version: str, functions: Dict[str, List]):
+        """Replace the per-function results of an analyzer version (failures are non-fatal)"""
+        path = self.objects_dir / version / 'functions.json'
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(functions, f, separators=(',', ':'), sort_keys=True)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"  ⚠️  Could not store function results: {e}")
+
+    def load_index(self) -> Dict[str, Dict]:
+        """Latest known {'blob', 'run'} per path"""
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def record_run(self, run_name: str, version: str, files: Dict[str, str], summary: Dict) -> Path:
+        """
+        Write a run manifest with its delta against the index, then advance the index
+
+        Args:
+            files: analyzed path -> blob hash
+            summary: small run-level figures kept next to the manifest
+
+        Returns:
+            Run directory
+        """
+        index = self.load_index()
+        delta = {'added': [], 'changed': [], 'unchanged': 0}
+        for path, blob in sorted(files.items()):
+            known = index.get(path)
+            if known is None:
+                delta['added'].append(path)
+            elif known['blob'] != blob:
+                delta['changed'].append(path)
+            else:
+                delta['unchanged'] += 1
+            index[path] = {'blob': blob, 'run': run_name}
+
+        run_dir = self.root / run_name
+        _write_json(run_dir / 'manifest.json', {
+            'run': run_name,
+            'analyzer_version': version,
+            'files': files,
+            'delta': delta,
+            'summary': summary
+        })
+        _write_json(self.index_file, dict(sorted(index.items())))
+        return run_dir
+
+    def prune_versions(self, keep: str) -> int:
+        """
+        Remove the objects of every analyzer version but keep (failures are non-fatal)
+
+        Returns:
+            Number of version directories removed
+        """
+        removed = 0
+        for version_dir in self.objects_dir.glob('*'):
+            if not version_dir.is_dir() or version_dir.name == keep:
+                continue
+            try:
+                shutil.rmtree(version_dir)
+                removed += 1
+            except OSError as e:
+                print(f"  ⚠️  Could not remove old analysis results {version_dir}: {e}")
+        return removed
+
+
+# Singleton instance
+_store = None
+
+def get_store() -> ResultStore:
+    """Get or create result store singleton"""
+    global _store
+    if _store is None:
+        _store = ResultStore()
+    return _store
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Client-side full-text search index for the documentation site
+An inverted index over page titles, headings, symbol names and body text,
+sharded by the first two characters of each term so the browser only loads
+the shards a query needs:
+
+    search/manifest.json   page id -> [url, title], and the shard list
+    search/<prefix>.json   term -> [page id, weight, page id, weight, ...]
+    search/_state.json     per-page content hash and shards (build state, not published)
+
+Updated incrementally from the page index: only pages whose content hash
+changed are re-tokenized, and only the shards their old or new terms fall in
+are rewritten. Size stays bounded: a page contributes at most MAX_BODY_TERMS
+body terms, and a term keeps its MAX_POSTINGS best pages.
+"""
+
+import os
+import re
+import json
+from pathlib import Path
+from collections import Counter
+from typing import Dict, List, Set
+
+from page_index import PageEntry, PageIndex, page_url
+from page_ranker import ENGLISH_STOPWORDS, tokenize
+
+SEARCH_DIR = 'search'  # under the pages dir, served with the site
+INDEX_VERSION = 1
+PREFIX_CHARS = 2
+MAX_BODY_TERMS = 300
+MAX_POSTINGS = 500
+MAX_TERM_CHARS = 32
+# A term in the title outweighs one in a heading, a symbol name or the text
+FIELD_WEIGHTS = {'title': 8, 'headings': 4, 'symbols': 4, 'body': 1}
+
+_FENCED = re.compile(r'^\s*(```|~~~).*?^\s*\1', re.DOTALL | re.MULTILINE)
+_FRONTMATTER = re.compile(r'\A---\n.*?\n---\n', re.DOTALL)
+
+
+def shard_of(term: str) -> str:
+    """Shard name of a term: its first PREFIX_CHARS characters, padded with '_'"""
+    return term[:PREFIX_CHARS].ljust(PREFIX_CHARS, '_')
+
+
+def page_terms(entry: PageEntry, body: str) -> Dict[str, int]:
+    """Weighted terms of one page (code blocks are left out; symbols cover the code)"""
+    text = _FENCED.sub(' ', _FRONTMATTER.sub('', body))
+    body_counts = Counter(term for term in tokenize(text, ENGLISH_STOPWORDS) if len(term) <= MAX_TERM_CHARS)
+
+    terms = Counter()
+    for term, count in body_counts.most_common(MAX_BODY_TERMS):
+        terms[term] += min(count, 10) * FIELD_WEIGHTS['body']
+    for field, values in (('title', [entry.title]), ('headings', entry.headings), ('symbols', entry.symbols)):
+        for term in tokenize(' '.join(values), ENGLISH_STOPWORDS):
+            if len(term) <= MAX_TERM_CHARS:
+                terms[term] += FIELD_WEIGHTS[field]
+    return dict(terms)
+
+
+class SearchIndex:
+    """Sharded inverted index in <pages dir>/search, kept in step with a PageIndex"""
+
+    def __init__(self, pages_dir: Path):
+        self.dir = Path(pages_dir) / SEARCH_DIR
+        self.state = self._load(self.dir / '_state.json')
+        if self.state.get('version') != INDEX_VERSION:
+            self.state = {'version': INDEX_VERSION, 'next_id': 0, 'pages': {}}
+
+    @staticmethod
+    def _load(path: Path) -> Dict:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, path: Path, data: Dict):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+        os.replace(tmp, path)
+
+    def update(self, page_index: PageIndex) -> Dict[str, int]:
+        """
+        Bring the index in line with the page index
+
+        Returns:
+            Counts of 'pages' indexed, pages 'changed' and 'removed', and 'shards' rewritten
+        """
+        pages: Dict[str, Dict] = self.state['pages']
+        current = {entry.path: entry for entry in page_index.pages() if Path(entry.path).name != 'index.md'}
+        changed = [path for path, entry in current.items()
+                   if path not in pages or pages[path]['hash'] != entry.hash]
+        removed = [path for path in pages if path not in current]
+        if not changed and not removed:
+            return {'pages': len(pages), 'changed': 0, 'removed': 0, 'shards': 0}
+
+        # Shards holding the old postings of every changed or removed page
+        stale_ids = {pages[path]['id'] for path in changed + removed if path in pages}
+        touched: Set[str] = set()
+        for path in changed + removed:
+            if path in pages:
+                touched.update(pages[path]['shards'])
+        for path in removed:
+            del pages[path]
+
+        fresh: Dict[int, Dict[str, int]] = {}
+        for path in changed:
+            entry = current[path]
+            body = page_index.body(path)
+            if body is None:
+                pages.pop(path, None)
+                continue
+            page_id = pages[path]['id'] if path in pages else self._next_id()
+            terms = page_terms(entry, body)
+            fresh[page_id] = terms
+            shards = sorted({shard_of(term) for term in terms})
+            touched.update(shards)
+            pages[path] = {
+                'id': page_id, 'url': page_url(path), 'title': entry.title,
+                'hash': entry.hash, 'shards': shards
+            }
+
+        for shard in sorted(touched):
+            self._rewrite_shard(shard, stale_ids, fresh)
+
+        self._write(self.dir / 'manifest.json', {
+            'version': INDEX_VERSION,
+            'pages': {str(page['id']): [page['url'], page['title']] for page in pages.values()},
+            'shards': sorted(path.stem for path in self.dir.glob('*.json')
+                             if path.name not in ('manifest.json', '_state.json'))
+        })
+        self._write(self.dir / '_state.json', self.state)
+        return {'pages': len(pages), 'changed': len(changed), 'removed': len(removed), 'shards': len(touched)}
+
+    def _next_id(self) -> int:
+        page_id = self.state['next_id']
+        self.state['next_id'] = page_id + 1
+        return page_id
+
+    def _rewrite_shard(self, shard: str, stale_ids: Set[int], fresh: Dict[int, Dict[str, int]]):
+        """Drop the stale pages' postings from one shard and add the fresh pages' ones"""
+        path = self.dir / f'{shard}.json'
+        postings: Dict[str, List[List[int]]] = {}
+        for term, flat in self._load(path).items():
+            kept = [[flat[i], flat[i + 1]] for i in range(0, len(flat), 2) if flat[i] not in stale_ids]
+            if kept:
+                postings[term] = kept
+        for page_id, terms in fresh.items():
+            for term, weight in terms.items():
+                if shard_of(term) == shard:
+                    postings.setdefault(term, []).append([page_id, weight])
+
+        if not postings:
+            if path.exists():
+                path.unlink()
+            return
+        data = {}
+        for term, pairs in postings.items():
+            pairs = sorted(pairs, key=lambda pair: -pair[1])[:MAX_POSTINGS]
+            data[term] = [value for pair in sorted(pairs) for value in pair]
+        self._write(path, data)
@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+Section-level merging of markdown pages
+Parses a page into a heading tree, locates where a new doc belongs (by
+section title, by the doc's own title, or by the symbols its headings
+document) and merges only that subtree: unchanged sections are kept as they
+are, new sections are inserted, and only sections whose text really differs
+on both sides are handed to a resolver (the LLM). Merge cost is bounded by the
+size of the conflicting sections instead of the page, and nothing outside the
+target subtree is touched, so long pages are never truncated.
+"""
+
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+_HEADING = re.compile(r'^(#{1,6})\s+(.+?)\s*#*\s*$')
+_FENCE = re.compile(r'^\s*(```|~~~)')
+_FRONTMATTER_END = '---'
+# Symbol headings: the first inline-code identifier ("3. `AuthService`", "`login(email)`"),
+# else a leading call signature ("AuthService.login(email)", "def connect()")
+_CODE_SYMBOL = re.compile(r'`\s*(?:class\s+|function\s+|def\s+)?([A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)*)')
+_CALL_SYMBOL = re.compile(r'^(?:class\s+|function\s+|def\s+)?([A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)*)\s*[(<]')
+
+# resolve(old_section, new_section, heading) -> merged section, or None to keep the new one
+Resolver = Callable[[str, str, str], Optional[str]]
+
+
+@dataclass
+class Section:
+    level: int                  # 0 for the page root (frontmatter and text before the first heading)
+    heading: str                # heading text without the hashes ('' for the root)
+    lines: List[str]            # the heading line followed by the body up to the first child
+    children: List['Section'] = field(default_factory=list)
+
+    @property
+    def body(self) -> List[str]:
+        return self.lines[1:] if self.level else self.lines
+
+    def render(self) -> List[str]:
+        out = list(self.lines)
+        for child in self.children:
+            out.extend(child.render())
+        return out
+
+    def text(self) -> str:
+        return '\n'.join(self.render())
+
+    def walk(self):
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+
+def slugify(title: str) -> str:
+    """GitHub-style heading anchor: 'Hash `password()` Helper' -> 'hash-password-helper'"""
+    title = re.sub(r'[^\w\- ]', '', title.strip().lower())
+    return re.sub(r'\s+', '-', title).strip('-')
+
+
+def section_key(heading: str) -> str:
+    """
+    Identity of a heading for matching across versions of a page
+
+    Symbol headings match on the symbol name alone, so a changed signature is
+    still the same section; other headings match on their anchor.
+    """
+    symbol = _CODE_SYMBOL.search(heading) or _CALL_SYMBOL.match(heading.strip())
+    if symbol:
+        return 'symbol:' + symbol.group(1).lower()
+    return slugify(heading)
+
+
+def parse_sections(text: str) -> Section:
+    """
+    Heading tree of a markdown page (fence- and frontmatter-aware)
+
+    Rendering the tree gives back exactly the input text.
+    """
+    lines = text.split('\n')
+    root = Section(0, '', [])
+    stack = [root]
+    in_fence = False
+    in_frontmatter = bool(lines) and lines[0] == _FRONTMATTER_END
+
+    for number, line in enumerate(lines):
+        if in_frontmatter:
+            stack[-1].lines.append(line)
+            if number > 0 and line == _FRONTMATTER_END:
+                in_frontmatter = False
+            continue
+        if _FENCE.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else _HEADING.match(line)
+        if not match:
+            stack[-1].lines.append(line)
+            continue
+        section = Section(len(match.group(1)), match.group(2), [line])
+        while stack[-1].level >= section.level:
+            stack.pop()
+        stack[-1].children.append(section)
+        stack.append(section)
+    return root
+
+
+def shift_headings(text: str, delta: int) -> str:
+    """Move every heading outside code fences by delta levels (kept within 1..6)"""
+    if not delta:
+        return text
+    out = []
+    in_fence = False
+    for line in text.split('\n'):
+        if _FENCE.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else _HEADING.match(line)
+        if match:
+            level = min(6, max(1, len(match.group(1)) + delta))
+            line = '#' * level + line[len(match.group(1)):]
+        out.append(line)
+    return '\n'.join(out)
+
+
+def _symbols(section: Section) -> set:
+    return {key for node in section.walk() if node.level
+            for key in [section_key(node.heading)] if key.startswith('symbol:')}
+
+
+def _same(a: List[str], b: List[str]) -> bool:
+    return '\n'.join(a).strip() == '\n'.join(b).strip()
+
+
+def _content_unit(new_root: Section) -> Section:
+    """The part of a new doc that gets merged: its single top-level section if it has one"""
+    top = new_root.children
+    if len(top) == 1 and not '\n'.join(new_root.lines).strip():
+        return top[0]
+    return new_root
+
+
+def locate_target(page: Section, unit: Section, section_title: Optional[str] = None) -> Tuple[Optional[Section], str]:
+    """
+    Where a new doc belongs in a page
+
+    Tries the doc's own title (where an earlier version of it lives), then the
+    requested section title, then the section documenting most of the doc's
+    symbols (at least half of them; the smallest such section on ties). A doc
+    with several top-level headings is merged into the section holding the
+    first of them that the page already has.
+
+    Returns:
+        (section, how it was found) or (None, '') when the doc has no place yet
+    """
+    parents = {}
+    for node in page.walk():
+        for child in node.children:
+            parents[id(child)] = node
+    sections = [node for node in page.walk() if node.level]
+
+    def find(title: str) -> Optional[Section]:
+        key = section_key(title)
+        return next((node for node in sections if section_key(node.heading) == key), None)
+
+    if unit.level:
+        found = find(unit.heading)
+        if found:
+            return found, 'title'
+    else:
+        for child in unit.children:
+            found = find(child.heading)
+            if found:
+                return parents[id(found)], 'title'
+    if section_title:
+        found = find(section_title)
+        if found:
+            return found, 'heading'
+
+    symbols = _symbols(unit)
+    if symbols:
+        best, best_overlap, best_size = None, 0, 0
+        for node in sections:
+            overlap = len(symbols & _symbols(node))
+            size = len(node.render())
+            if overlap > best_overlap or (overlap == best_overlap and overlap and size < best_size):
+                best, best_overlap, best_size = node, overlap, size
+        if best is not None and best_overlap * 2 >= len(symbols):
+            return best, 'symbols'
+    return None, ''
+
+
+class _Merger:
+    def __init__(self, resolve: Optional[Resolver]):
+        self.resolve = resolve
+        self.stats = {'unchanged': 0, 'added': 0, 'replaced': 0, 'resolved': 0}
+
+    def merge(self, old: Section, new: Section):
+        """Merge new into the page section old (or the page root), in place"""
+        if _same(old.render()[1:] if old.level else old.render(), new.render()[1:] if new.level else new.render()):
+            if old.level and new.level and old.heading != new.heading:
+                old.lines[0] = '#' * old.level + ' ' + new.heading  # e.g. a changed signature
+                self.stats['replaced'] += 1
+            else:
+                self.stats['unchanged'] += 1
+            return
+
+        if not old.children and not new.children:
+            # A differing leaf: the whole section is the conflict
+            self._merge_text(old, new.body, new.lines[0] if new.level else None)
+            return
+
+        # Intro text before the first subsection (a page's frontmatter and preamble are left alone)
+        if old.level and not _same(old.body, new.body) and '\n'.join(new.body).strip():
+            self._merge_text(old, new.body, None)
+
+        # Subsections: merge matching ones, insert new ones after their predecessor
+        by_key = {}
+        for child in old.children:
+            by_key.setdefault(section_key(child.heading), child)
+        insert_at = 0
+        for child in new.children:
+            match = by_key.get(section_key(child.heading))
+            if match is not None:
+                self.merge(match, child)
+                insert_at = old.children.index(match) + 1
+                continue
+            level = old.children[0].level if old.children else min(6, old.level + 1)
+            adopted = parse_sections(shift_headings(child.text(), level - child.level)).children[0]
+            _separate(_last(old.children[insert_at - 1]) if insert_at else old)
+            _separate(_last(adopted))
+            old.children.insert(insert_at, adopted)
+            insert_at += 1
+            self.stats['added'] += 1
+
+    def _merge_text(self, old: Section, new_body: List[str], new_heading: Optional[str]):
+        """Merge a section's own text (its heading and the body up to the first subsection)"""
+        heading = old.lines[0]
+        if new_heading:
+            heading = '#' * old.level + new_heading[len(_HEADING.match(new_heading).group(1)):]
+        new_text = '\n'.join([heading] + new_body).strip()
+
+        if not '\n'.join(old.body).strip():
+            merged = new_text
+            self.stats['added'] += 1
+        else:
+            merged = self.resolve('\n'.join(old.lines).strip(), new_text, old.heading) if self.resolve else None
+            if merged:
+                self.stats['resolved'] += 1
+            else:
+                merged = new_text
+                self.stats['replaced'] += 1
+
+        lines = merged.split('\n')
+        if not _HEADING.match(lines[0]):
+            lines.insert(0, heading)  # the resolver dropped the heading
+        old.lines = lines
+        _separate(old)
+
+
+def _last(section: Section) -> Section:
+    while section.children:
+        section = section.children[-1]
+    return section
+
+
+def _separate(section: Section):
+    """Blank line at the end of a section's own text, so a following heading stays a heading"""
+    if section.lines and section.lines[-1].strip():
+        section.lines.append('')
+
+
+def merge_markdown(existing: str, new: str, section_title: Optional[str] = None,
+                   resolve: Optional[Resolver] = None) -> Tuple[str, Dict]:
+    """
+    Merge a new doc into an existing page section by section
+
+    Args:
+        section_title: heading the doc belongs under, if the caller knows it
+        resolve: called only for sections whose old and new text both have
+                 content and differ; returns the merged section, or None to
+                 take the new one
+
+    Returns:
+        (merged page, stats) where stats counts 'unchanged', 'added',
+        'replaced' and 'resolved' sections and names the 'target' section
+        (None when the doc was added as a new section at the end)
+    """
+    page = parse_sections(existing)
+    unit = _content_unit(parse_sections(new))
+    target, how = locate_target(page, unit, section_title)
+    merger = _Merger(resolve)
+
+    if target is None:
+        text = new.strip()
+        if section_title:
+            # The doc's own headings go below the new section's
+            levels = [node.level for node in parse_sections(text).walk() if node.level]
+            text = f"## {section_title}\n\n" + shift_headings(text, 3 - min(levels) if levels else 0)
+        merger.stats['added'] += 1
+        return existing.rstrip('\n') + '\n\n' + text + '\n', dict(merger.stats, target=None, found_by='')
+
+    merger.merge(target, unit)
+    merged = page.text().rstrip('\n')
+    return merged + ('\n' if existing.endswith('\n') else ''), dict(merger.stats, target=target.heading or '(page)', found_by=how)
+
+
+def fold_markdown(existing: str, duplicate: str) -> Tuple[str, Dict]:
+    """
+    Fold a page documenting the same code into an existing page
+
+    Every section of the duplicate is matched by heading key (anchor or
+    symbol), first among the sections under the same parent, then anywhere
+    in the page. A matched section keeps the existing text and only its
+    unmatched subsections are folded in. An unmatched section whose
+    subsections have counterparts (a differently titled copy of the doc, an
+    "Interfaces" heading over types the page lists as "Data Contracts") is
+    dissolved into the section holding most of those counterparts. Only
+    sections without any counterpart are added.
+
+    Returns:
+        (merged page, stats) where stats counts 'kept' and 'added' sections
+    """
+    page = parse_sections(existing)
+    index: Dict[str, Section] = {}
+    parents: Dict[int, Section] = {}
+    for node in page.walk():
+        if node.level:
+            index.setdefault(section_key(node.heading), node)
+        for child in node.children:
+            parents[id(child)] = node
+    stats = {'kept': 0, 'added': 0}
+
+    def counterpart(section: Section, siblings: List[Section]) -> Optional[Section]:
+        key = section_key(section.heading)
+        return next((node for node in siblings if section_key(node.heading) == key), None) or index.get(key)
+
+    def fold(target: Section, children: List[Section]):
+        insert_at = len(target.children)
+        for child in children:
+            match = counterpart(child, target.children)
+            if match is not None:
+                stats['kept'] += 1
+                fold(match, child.children)
+                position = next((i for i, node in enumerate(target.children) if node is match), None)
+                if position is not None:
+                    insert_at = position + 1
+                continue
+
+            holders = [parents[id(found)] for found in (index.get(section_key(grandchild.heading))
+                                                        for grandchild in child.children) if found is not None]
+            if holders:
+                votes = Counter(id(holder) for holder in holders)
+                fold(max(holders, key=lambda holder: votes[id(holder)]), child.children)
+                continue
+
+            level = target.children[0].level if target.children else min(6, target.level + 1)
+            adopted = parse_sections(shift_headings(child.text(), level - child.level)).children[0]
+            _separate(_last(target.children[insert_at - 1]) if insert_at else target)
+            _separate(_last(adopted))
+            target.children.insert(insert_at, adopted)
+            insert_at += 1
+            stats['added'] += 1
+
+    fold(page, parse_sections(duplicate).children)
+    merged = page.text().rstrip('\n')
+    return merged + ('\n' if existing.endswith('\n') else ''), stats
+
+
+def resolve_prompt(old_section: str, new_section: str, page_name: str) -> str:
+    """Prompt for merging one conflicting section"""
+    return f"""You are a documentation editor. Merge two versions of ONE section of the page {page_name}.
+
+**Current Section:**
+```markdown
+{old_section}
+```
+
+**Updated Section (generated from the latest code):**
+```markdown
+{new_section}
+```
+
+**Your Task:**
+1. Keep the section heading line as it is
+2. Prefer the updated section where the two disagree about the code (signatures, parameters, behavior)
+3. Keep hand-written notes and examples from the current section that are still accurate
+4. Do not add content about anything outside this section
+
+**CRITICAL:** Return ONLY the merged section as raw markdown, without code fences around it.
+"""
+
+
+def strip_fences(text: str) -> str:
+    """Remove a code fence an LLM wrapped around a markdown answer"""
+    text = text.strip()
+    if text.startswith('```markdown'):
+        text = text[11:]
+    if text.startswith('```'):
+        text = text[3:]
+    if text.endswith('```'):
+        text = text[:-3]
+    return text.strip()
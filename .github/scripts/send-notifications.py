@@ -7,11 +7,13 @@ Handles character limits and formats messages beautifully
 import os
 import sys
 import re
-import json
 import requests
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Iterable, List, Dict, Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+from analysis_output import iter_json_lines
 
 DISCORD_WEBHOOK = os.environ.get('DISCORD_WEBHOOK_URL')
 SLACK_WEBHOOK = os.environ.get('SLACK_WEBHOOK_URL')
@@ -140,7 +142,7 @@ class NotificationService:
             analysis_text += f"⚠️ **{analysis_summary['total_vulnerabilities']} security issue(s)**\n"
         
         if analysis_summary['total_performance_issues'] > 0:
-            analysis_text += f"🐌 **{analysis_summary['total_performance_issues']} performance issue(s)**\n"
+            analysis_text += f"🐌 **{analysis_summary['total_performance_issues']} performance issue(s)**{new_issues_suffix(analysis_summary)}\n"
         
         embed["fields"].append({
             "name": "📊 Code Analysis",
@@ -281,7 +283,7 @@ class NotificationService:
                 if analysis_summary['total_vulnerabilities'] > 0:
                     analysis_text += f" | ⚠️ {analysis_summary['total_vulnerabilities']} security"
                 if analysis_summary['total_performance_issues'] > 0:
-                    analysis_text += f" | 🐌 {analysis_summary['total_performance_issues']} performance"
+                    analysis_text += f" | 🐌 {analysis_summary['total_performance_issues']} performance{new_issues_suffix(analysis_summary)}"
                 fields.append({"type": "mrkdwn", "text": analysis_text})
             
             blocks.append({"type": "section", "fields": fields})
@@ -347,7 +349,7 @@ class NotificationService:
             if analysis_summary['total_vulnerabilities'] > 0:
                 body_parts.append(f"⚠️ {analysis_summary['total_vulnerabilities']} security issues")
             if analysis_summary['total_performance_issues'] > 0:
-                body_parts.append(f"🐌 {analysis_summary['total_performance_issues']} performance issues")
+                body_parts.append(f"🐌 {analysis_summary['total_performance_issues']} performance issues{new_issues_suffix(analysis_summary)}")
         
         body = '\n'.join(body_parts)
         
@@ -452,34 +454,70 @@ def load_workflow_data():
     
     # Load code analysis results
     try:
-        if os.path.exists('analysis_results.json'):
-            with open('analysis_results.json', 'r') as f:
-                analysis_data = json.load(f)
-                
-                if analysis_data:
-                    # Calculate summary
-                    avg_score = sum(r['quality_score']['total'] for r in analysis_data) / len(analysis_data)
-                    total_vulns = sum(len(r['security_vulnerabilities']) for r in analysis_data)
-                    total_perf = sum(len(r['performance_issues']) for r in analysis_data)
-                    
-                    data['analysis_summary'] = {
-                        'files_analyzed': len(analysis_data),
-                        'avg_quality_score': round(avg_score, 1),
-                        'total_vulnerabilities': total_vulns,
-                        'total_performance_issues': total_perf,
-                        'details': analysis_data
-                    }
+        if os.path.exists('analysis_results.jsonl'):
+            data['analysis_summary'] = summarize_analysis(iter_json_lines('analysis_results.jsonl'))
     except Exception as e:
         print(f"Warning: Could not load analysis results: {e}")
     
     return data
 
 
+def summarize_analysis(analysis_data: Iterable[Dict]) -> Optional[Dict]:
+    """Build the notification summary from code analyzer results, in one pass"""
+    totals = {'files': 0, 'score_sum': 0, 'security_vulnerabilities': 0, 'performance_issues': 0}
+    new_issues = None
+    for result in analysis_data:
+        totals['files'] += 1
+        totals['score_sum'] += result['quality_score']['total']
+        totals['security_vulnerabilities'] += len(result['security_vulnerabilities'])
+        totals['performance_issues'] += len(result['performance_issues'])
+        if 'performance_regressions' in result:
+            new_issues = (new_issues or 0) + len(result['performance_regressions']['introduced'])
+    
+    if not totals['files']:
+        return None
+    
+    totals['average_score'] = totals['score_sum'] / totals['files']
+    totals['new_performance_issues'] = new_issues
+    return summarize_totals(totals)
+
+
+def summarize_totals(totals: Optional[Dict]) -> Optional[Dict]:
+    """Build the notification summary from the run totals code-analyzer records"""
+    if not totals or not totals['files']:
+        return None
+    
+    return {
+        'files_analyzed': totals['files'],
+        'avg_quality_score': round(totals['average_score'], 1),
+        'total_vulnerabilities': totals['security_vulnerabilities'],
+        'total_performance_issues': totals['performance_issues'],
+        'new_performance_issues': totals.get('new_performance_issues')
+    }
+
+
+def new_issues_suffix(analysis_summary: Dict) -> str:
+    """' (N new)' when regression data against the base commit is available"""
+    new_issues = analysis_summary.get('new_performance_issues')
+    return f" ({new_issues} new)" if new_issues is not None else ""
+
+
 def main():
     print("="*80)
     print("NOTIFICATION SERVICE")
     print("="*80)
     
+    # Load workflow data
+    send_notifications(load_workflow_data())
+
+
+def send_notifications(data: Dict) -> List:
+    """
+    Send notifications for workflow data to every configured platform
+    
+    Returns:
+        List of (platform, success) tuples
+    """
     # Get commit message from git
     try:
         import subprocess
@@ -493,9 +531,6 @@ def main():
     except:
         pass
     
-    # Load workflow data
-    data = load_workflow_data()
-    
     print(f"Changed files: {len(data['changed_files'])}")
     print(f"Breaking changes: {len(data['breaking_changes'])}")
     print(f"Wiki pages: {len(data['wiki_pages'])}")
@@ -510,7 +545,7 @@ def main():
         print(f"   Files: {summary['files_analyzed']}")
         print(f"   Avg Quality: {summary['avg_quality_score']}/100")
         print(f"   Security Issues: {summary['total_vulnerabilities']}")
-        print(f"   Performance Issues: {summary['total_performance_issues']}")
+        print(f"   Performance Issues: {summary['total_performance_issues']}{new_issues_suffix(summary)}")
     
     # Send notifications
     results = []
@@ -558,6 +593,8 @@ def main():
     
     if not results:
         print("ℹ️  No webhooks configured")
+    
+    return results
 
 
 if __name__ == '__main__':
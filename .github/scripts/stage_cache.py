@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Stage result cache keyed by input hashes, config and script version
+Lets workflow reruns skip work whose inputs did not change. Entries are
+never looked up again once an input changes, so entries not read or
+written for MAX_AGE_DAYS are pruned at the end of a run.
+"""
+
+import os
+import json
+import time
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+CACHE_DIR = Path(os.environ.get('PIPELINE_CACHE_DIR', '.pipeline-cache'))
+CACHE_ENABLED = os.environ.get('PIPELINE_CACHE', '1') != '0'
+MAX_AGE_DAYS = float(os.environ.get('PIPELINE_CACHE_MAX_AGE_DAYS', '14'))
+
+
+def hash_text(text: Optional[str]) -> str:
+    """Hash a string (None hashes to a fixed marker)"""
+    if text is None:
+        return 'none'
+    return hashlib.sha256(text.encode('utf-8', errors='replace')).hexdigest()
+
+
+def hash_file(path) -> str:
+    """Hash a file's bytes (missing files hash to a fixed marker)"""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return 'missing'
+
+
+@lru_cache(maxsize=None)
+def script_version(path) -> str:
+    """Version of a script = hash of its source, so any edit invalidates its entries"""
+    return hash_file(path)[:16]
+
+
+class StageCache:
+    def __init__(self, cache_dir: Path = CACHE_DIR, enabled: bool = CACHE_ENABLED):
+        self.cache_dir = Path(cache_dir)
+        self.enabled = enabled
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def key(self, stage: str, inputs: Dict[str, str], config: Dict = None, script: str = None) -> str:
+        """
+        Build a cache key for a stage
+
+        Args:
+            inputs: input name -> content hash
+            config: settings that change the output (model, limits, ...)
+            script: path of the script producing the output
+        """
+        material = json.dumps({
+            'stage': stage,
+            'inputs': inputs,
+            'config': config or {},
+            'script': script_version(str(script)) if script else None
+        }, sort_keys=True)
+        return hashlib.sha256(material.encode()).hexdigest()[:24]
+
+    def get(self, stage: str, key: str) -> Optional[Any]:
+        """Return the cached value or None"""
+        if not self.enabled:
+            return None
+
+        path = self.cache_dir / stage / f"{key}.json"
+        value = None
+        if path.exists():
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    value = json.load(f)['value']
+            except (OSError, ValueError, KeyError):
+                value = None
+            if value is not None:
+                self._touch(path)
+
+        self._count(stage, 'hits' if value is not None else 'misses')
+        return value
+
+    def put(self, stage: str, key: str, value: Any):
+        """Store a JSON-serializable value (failures are non-fatal)"""
+        if not self.enabled:
+            return
+
+        path = self.cache_dir / stage / f"{key}.json"
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f'.{threading.get_ident()}.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'stage': stage, 'value': value}, f)
+            os.replace(tmp, path)
+        except (OSError, TypeError) as e:
+            print(f"  ⚠️  Could not write {stage} cache entry: {e}")
+
+    def prune(self, max_age_days: float = MAX_AGE_DAYS) -> int:
+        """
+        Remove entries not read or written for max_age_days (hits refresh an
+        entry's mtime). Only <stage>/*.json entries are considered, so other
+        state kept in the cache dir is left alone.
+
+        Returns:
+            Number of entries removed
+        """
+        if not self.enabled or not self.cache_dir.is_dir():
+            return 0
+
+        cutoff = time.time() - max_age_days * 86400
+        removed = 0
+        for path in self.cache_dir.glob('*/*.json'):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+    @staticmethod
+    def _touch(path: Path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _count(self, stage: str, outcome: str):
+        with self._lock:
+            counts = self.stats.setdefault(stage, {'hits': 0, 'misses': 0})
+            counts[outcome] += 1
+
+
+# Singleton instance
+_cache = None
+
+def get_cache() -> StageCache:
+    """Get or create stage cache singleton"""
+    global _cache
+    if _cache is None:
+        _cache = StageCache()
+    return _cache
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Maintain the pipeline stage cache')
+    parser.add_argument('command', choices=['prune'])
+    parser.add_argument('--max-age-days', type=float, default=MAX_AGE_DAYS,
+                        help=f'Remove entries unused for this many days (default: {MAX_AGE_DAYS:g})')
+    args = parser.parse_args()
+
+    removed = get_cache().prune(args.max_age_days)
+    print(f"🧹 Removed {removed} stage cache entries unused for {args.max_age_days:g} days")
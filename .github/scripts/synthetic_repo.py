@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Synthetic repository generator for the analyzer benchmarks
+
+Writes deterministic (seeded) source trees of a given size and language mix,
+including the shapes that stress the analyzers: huge single files, thousands
+of tiny files and deeply nested code. Generated functions contain the loop,
+query and cross-file call patterns the checks look for, so every phase does
+real work.
+"""
+
+import random
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+SHAPES = ('mixed', 'huge', 'tiny', 'nested')
+
+
+class Syntax(NamedTuple):
+    extension: str
+    function: str       # header, formatted with name
+    loop: str           # formatted with var and iterable
+    condition: str      # formatted with var and limit
+    declare: str        # formatted with var
+    add: str            # formatted with var and value
+    query: str          # formatted with param
+    concat: str         # formatted with var
+    call: str           # formatted with name
+    returns: str        # formatted with var
+    block_end: Optional[str] = '}'  # None for indentation blocks
+    header: str = ''
+    footer: str = ''
+    indent: int = 0     # extra indentation of functions (class bodies)
+
+
+SYNTAX = {
+    'python': Syntax(
+        '.py', 'def {name}(items, user_id):', 'for {var} in {iterable}:', 'if {var} > {limit}:',
+        '{var} = 0', '{var} += {value}', 'cursor.execute("SELECT * FROM items WHERE owner = " + {param})',
+        'label = label + str({var})', '{name}(items, user_id)', 'return {var}',
+        block_end=None, header='import re\n\ncursor = None\nlabel = ""\n'
+    ),
+    'javascript': Syntax(
+        '.js', 'function {name}(items, userId) {{', 'for (const {var} of {iterable}) {{', 'if ({var} > {limit}) {{',
+        'let {var} = 0;', '{var} += {value};', 'db.query("SELECT * FROM items WHERE owner = " + {param});',
+        'label += String({var});', '{name}(items, userId);', 'return {var};',
+        header="const db = require('./db');\nlet label = '';\n"
+    ),
+    'typescript': Syntax(
+        '.ts', 'export function {name}(items: number[], userId: string): number {{',
+        'for (const {var} of {iterable}) {{', 'if ({var} > {limit}) {{',
+        'let {var} = 0;', '{var} += {value};', 'db.query(`SELECT * FROM items WHERE owner = ${{{param}}}`);',
+        'label += String({var});', '{name}(items, userId);', 'return {var};',
+        header="import { db } from './db';\n\nexport interface Item {\n  id: number;\n}\n\nlet label = '';\n"
+    ),
+    'go': Syntax(
+        '.go', 'func {name}(items []int, userID string) int {{', 'for _, {var} := range {iterable} {{',
+        'if {var} > {limit} {{', '{var} := 0', '{var} += {value}',
+        'db.Query("SELECT * FROM items WHERE owner = " + {param})', 'label += fmt.Sprint({var})',
+        '{name}(items, userID)', 'return {var}',
+        header='package synthetic\n\nimport "fmt"\n\nvar label string\n'
+    ),
+    'java': Syntax(
+        '.java', 'public static int {name}(int[] items, String userId) {{', 'for (int {var} : {iterable}) {{',
+        'if ({var} > {limit}) {{', 'int {var} = 0;', '{var} += {value};',
+        'db.executeQuery("SELECT * FROM items WHERE owner = " + {param});', 'label += String.valueOf({var});',
+        '{name}(items, userId);', 'return {var};',
+        header='public class {cls} {\n    static String label = "";\n', footer='}\n', indent=1
+    ),
+}
+
+PARAMS = {'python': 'user_id', 'go': 'userID'}
+
+
+class _Emitter:
+    """Source lines of one file, with blocks closed by brace or dedent"""
+
+    def __init__(self, syntax: Syntax):
+        self.syntax = syntax
+        self.lines: List[str] = []
+        self.depth = syntax.indent
+
+    def emit(self, line: str):
+        self.lines.append('    ' * self.depth + line)
+
+    def open(self, line: str):
+        self.emit(line)
+        self.depth += 1
+
+    def close(self):
+        self.depth -= 1
+        if self.syntax.block_end:
+            self.emit(self.syntax.block_end)
+
+
+class SyntheticRepo:
+    """
+    Deterministic source tree generator
+
+    Args:
+        root: directory to write into (created if missing)
+        languages: language name -> weight in the mix
+        seed: random seed; the same arguments always produce the same tree
+    """
+
+    def __init__(self, root, languages: Dict[str, int], seed: int = 0):
+        unknown = set(languages) - set(SYNTAX)
+        if unknown:
+            raise ValueError(f"No generator for: {', '.join(sorted(unknown))} (have {', '.join(SYNTAX)})")
+        self.root = Path(root)
+        self.languages = languages
+        self.rng = random.Random(seed)
+        self.names: List[str] = []  # generated function names, for cross-file calls
+        self.files: List[str] = []
+
+    def _pick_language(self) -> str:
+        names = list(self.languages)
+        return self.rng.choices(names, weights=[self.languages[name] for name in names])[0]
+
+    def _function(self, out: _Emitter, language: str, name: str, nesting: int):
+        syntax = SYNTAX[language]
+        param = PARAMS.get(language, 'userId')
+        rng = self.rng
+        out.open(syntax.function.format(name=name))
+        out.emit(syntax.declare.format(var='total'))
+        for level in range(nesting):
+            var = f'v{level}'
+            if rng.random() < 0.6:
+                out.open(syntax.loop.format(var=var, iterable='items'))
+            else:
+                out.open(syntax.condition.format(var='total', limit=rng.randint(1, 1000)))
+                out.emit(syntax.add.format(var='total', value=level))
+                continue
+            out.emit(syntax.add.format(var='total', value=var))
+            if rng.random() < 0.3:
+                out.emit(syntax.concat.format(var=var))
+        for _ in range(out.depth - syntax.indent - 1):
+            out.close()
+        if rng.random() < 0.4:
+            out.emit(syntax.query.format(param=param))
+        if self.names and rng.random() < 0.5:
+            out.emit(syntax.call.format(name=rng.choice(self.names)))
+        out.emit(syntax.returns.format(var='total'))
+        out.close()
+        out.lines.append('')
+        self.names.append(name)
+
+    def write_file(self, language: str, functions: int, nesting: int) -> str:
+        """Write one source file and return its path"""
+        syntax = SYNTAX[language]
+        index = len(self.files)
+        path = self.root / f'pkg{index // 100}' / f'module_{index}{syntax.extension}'
+        out = _Emitter(syntax)
+        out.lines.extend(syntax.header.replace('{cls}', f'Module{index}').split('\n'))
+        for _ in range(functions):
+            self._function(out, language, f'handle_{index}_{len(self.names)}', nesting)
+        out.lines.extend(syntax.footer.split('\n'))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text('\n'.join(out.lines), encoding='utf-8')
+        self.files.append(str(path))
+        return str(path)
+
+    def generate(self, shape: str, files: int, functions: int = 8, nesting: int = 3,
+                 huge_lines: int = 20000) -> List[str]:
+        """
+        Generate one tree shape
+
+        Args:
+            shape: 'mixed' (files of ordinary size), 'huge' (one file of about
+                huge_lines lines per language), 'tiny' (files with a single small
+                function) or 'nested' (functions nested `nesting` levels deep)
+            files: number of files (ignored by 'huge')
+
+        Returns:
+            Paths of the written files
+        """
+        if shape == 'huge':
+            for language in self.languages:
+                # about 2 lines per nesting level plus 6 per function
+                self.write_file(language, max(1, huge_lines // (nesting * 2 + 6)), nesting)
+        elif shape == 'tiny':
+            for _ in range(files):
+                self.write_file(self._pick_language(), 1, 1)
+        elif shape == 'nested':
+            for _ in range(files):
+                self.write_file(self._pick_language(), max(1, functions // 4), nesting)
+        elif shape == 'mixed':
+            for _ in range(files):
+                self.write_file(self._pick_language(), self.rng.randint(1, functions * 2), nesting)
+        else:
+            raise ValueError(f"Unknown shape '{shape}' (choose from {', '.join(SHAPES)})")
+        return self.files
+
+
+def parse_mix(spec: str) -> Dict[str, int]:
+    """'python=3,typescript=2,go' -> {'python': 3, 'typescript': 2, 'go': 1}"""
+    mix = {}
+    for part in spec.split(','):
+        name, _, weight = part.strip().partition('=')
+        if name:
+            mix[name] = int(weight or 1)
+    return mix
@@ -17,6 +17,11 @@ from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional
 
+sys.path.insert(0, str(Path(__file__).parent))
+from stage_cache import get_cache, hash_text
+from docs_router import DocsRouter
+from section_merge import merge_markdown, resolve_prompt, strip_fences
+
 GROQ_API_KEY = os.environ.get('GROQ_API_KEY')
 GITHUB_TOKEN = os.environ.get('GITHUB_TOKEN')
 GITHUB_REPO = os.environ.get('GITHUB_REPOSITORY')  # owner/repo
@@ -29,6 +34,7 @@ MAPPING_FILE = '.github/wiki-mapping.json'
 class WikiManager:
     def __init__(self):
         self.mapping = self.load_mapping()
+        self.router = DocsRouter()
         self.existing_pages = self.fetch_wiki_pages()
         
     def load_mapping(self) -> Dict:
@@ -91,7 +97,8 @@ class WikiManager:
     def determine_wiki_page(self, file_path: str, file_content: str) -> str:
         """
         Intelligently determine which wiki page this file should go to.
-        Uses LLM with context of existing pages and previous mappings.
+        Uses the existing mapping, then docs-routing.yml, then the LLM with
+        context of existing pages and previous mappings.
         """
         # Check if we already have a mapping
         if file_path in self.mapping['file_to_page']:
@@ -99,6 +106,15 @@ class WikiManager:
             print(f"  📌 Using existing mapping: {file_path} → {existing}")
             return existing
         
+        # Deterministic routing rules
+        if self.router.prefer_rules:
+            route = self.router.route(file_path, 'wiki')
+            if route:
+                print(f"  🧭 Routed: {file_path} → {route.wiki} (docs-routing.yml: {route.glob})")
+                return route.wiki
+        if not self.router.llm_fallback:
+            return self._fallback_page_name(file_path)
+        
         # Use LLM to make intelligent decision
         print(f"  🤔 Determining wiki page for {file_path}...")
         
@@ -180,22 +196,15 @@ Return ONLY the wiki page name, nothing else."""
             return self._fallback_page_name(file_path)
     
     def _fallback_page_name(self, file_path: str) -> str:
-        """Fallback logic if LLM fails"""
+        """Fallback logic if LLM fails: the routed page, else a name from the path"""
         path = Path(file_path)
         
-        # Check directory-based patterns
-        parts = path.parts
-        if 'auth' in file_path.lower():
-            return 'Authentication-API'
-        elif 'database' in file_path.lower() or 'db' in file_path.lower():
-            return 'Database-Layer'
-        elif 'api' in parts:
+        route = self.router.match(file_path)
+        if route and route.wiki:
+            return route.wiki
+        elif 'api' in path.parts:
             # api/users.ts → API-Users
             return f"API-{path.stem.title()}"
-        elif 'test' in file_path.lower():
-            return 'Testing-Guide'
-        elif 'util' in file_path.lower() or 'helper' in file_path.lower():
-            return 'Utilities'
         else:
             # Default: use file name
             return path.stem.replace('_', '-').replace('.', '-').title()
@@ -240,38 +249,45 @@ Return ONLY the wiki page name, nothing else."""
             return False
     
     def _merge_wiki_content(self, existing: str, new: str, page_name: str) -> str:
-        """Intelligently merge new content into existing wiki page using LLM"""
+        """Merge new content into an existing wiki page section by section (LLM only on conflicting sections)"""
         if not existing:
             # New page
             header = f"# {page_name.replace('-', ' ')}\n\n"
             header += f"*Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n\n"
             return header + new
         
-        # Use LLM to intelligently merge
-        print(f"    🧠 Using LLM to intelligently merge content...")
+        # Reuse a previous merge of the exact same page and doc content
+        cache = get_cache()
+        cache_key = cache.key('wiki-merge', {
+            'existing': hash_text(existing),
+            'new': hash_text(new)
+        }, config={'model': MODEL, 'page': page_name, 'merge': 'sections'}, script=__file__)
+        cached = cache.get('wiki-merge', cache_key)
+        if cached is not None:
+            print(f"    ✓ Reusing cached merge")
+            return self._touch_timestamp(cached)
+        
+        # Sections whose LLM merge failed (the new version was taken instead)
+        failed = []
+        
+        def resolve(old: str, new_section: str, heading: str) -> Optional[str]:
+            resolved = self._resolve_section(old, new_section, page_name)
+            if resolved is None:
+                failed.append(heading)
+            return resolved
+        
+        merged, stats = merge_markdown(existing, new, None, resolve)
+        print(f"    🧩 Merged: {stats['unchanged']} unchanged, {stats['added']} added, "
+              f"{stats['replaced']} replaced, {stats['resolved']} merged by LLM")
+        # A fallback merge is not cached, so the next run asks the LLM again
+        if not failed:
+            cache.put('wiki-merge', cache_key, merged)
+        return self._touch_timestamp(merged)
+    
+    def _resolve_section(self, old_section: str, new_section: str, page_name: str) -> Optional[str]:
+        """LLM merge of one conflicting section; None keeps the new version"""
+        print(f"    🧠 Using LLM to merge a section of {page_name}...")
         
-        prompt = f"""You are a wiki editor. Intelligently merge new documentation into existing wiki page.
-
-**Existing Wiki Page:**
-```markdown
-{existing[:3000]}
-```
-
-**New Documentation:**
-```markdown
-{new[:2000]}
-```
-
-**Task:**
-1. If documenting NEW functions/classes → ADD as new section
-2. If UPDATING existing functions → REPLACE that section
-3. If similar content exists → MERGE and deduplicate
-4. Update "Last updated" timestamp to: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-5. Maintain wiki structure and formatting
-
-Return the COMPLETE merged wiki page.
-"""
-
         try:
             response = requests.post(
                 GROQ_API_URL,
@@ -283,7 +299,7 @@ Return the COMPLETE merged wiki page.
                     'model': MODEL,
                     'messages': [
                         {'role': 'system', 'content': 'You are a wiki editor. Return clean markdown.'},
-                        {'role': 'user', 'content': prompt}
+                        {'role': 'user', 'content': resolve_prompt(old_section, new_section, page_name)}
                     ],
                     'temperature': 0.3,
                     'max_tokens': 4000
@@ -292,36 +308,22 @@ Return the COMPLETE merged wiki page.
             )
             
             if response.status_code == 200:
-                merged = response.json()['choices'][0]['message']['content'].strip()
-                
-                # Clean up if LLM wrapped in code fences
-                if merged.startswith('```markdown'):
-                    merged = merged[11:]
-                if merged.startswith('```'):
-                    merged = merged[3:]
-                if merged.endswith('```'):
-                    merged = merged[:-3]
-                
-                print(f"    ✓ LLM merged content intelligently")
-                return merged.strip()
-            else:
-                print(f"    ⚠️  LLM merge failed, using simple append")
-                return self._simple_merge(existing, new)
+                return strip_fences(response.json()['choices'][0]['message']['content'])
+            print(f"    ⚠️  LLM merge failed ({response.status_code}), keeping the updated section")
         except Exception as e:
-            print(f"    ⚠️  Error in LLM merge: {e}, using simple append")
-            return self._simple_merge(existing, new)
+            print(f"    ⚠️  Error in LLM merge: {e}, keeping the updated section")
+        return None
     
-    def _simple_merge(self, existing: str, new: str) -> str:
-        """Simple merge fallback"""
-        lines = existing.split('\n')
+    def _touch_timestamp(self, content: str) -> str:
+        """Set the page's "Last updated" line to now"""
+        lines = content.split('\n')
         
-        # Update timestamp
         for i, line in enumerate(lines):
             if line.startswith('*Last updated:'):
                 lines[i] = f"*Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*"
                 break
         
-        return '\n'.join(lines) + '\n\n---\n\n' + new
+        return '\n'.join(lines)
     
     def record_mapping(self, file_path: str, page_name: str):
         """Record the file-to-page mapping"""
@@ -472,6 +474,7 @@ def process_documentation_to_wiki(doc_files: List[str]):
     # Save summary to output
     with open('wiki_summary.md', 'w') as f:
         f.write(summary)
+        f.write(f"\n{manager.router.report_line()}\n")
         f.write("\n## Updates Made\n\n")
         for update in updates_made:
             f.write(f"- `{update['file']}` → [{update['page']}]\n")
@@ -480,6 +483,7 @@ def process_documentation_to_wiki(doc_files: List[str]):
     print("WIKI MANAGER COMPLETE")
     print("="*80)
     print(f"✓ {len(updates_made)} wiki pages updated")
+    print(f"✓ {manager.router.hits}/{manager.router.hits + manager.router.misses} files routed without the LLM")
     print(f"✓ Mapping saved to {MAPPING_FILE}")
     print(f"✓ Summary saved to wiki_summary.md")
     
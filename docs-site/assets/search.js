@@ -0,0 +1,93 @@
+// Client-side search over the prebuilt index in search/ (written by pages-manager.py).
+// Terms are tokenized like .github/scripts/page_ranker.py tokenize(); only the
+// shards (first two characters of a term) that a query needs are fetched.
+(function () {
+  var script = document.currentScript;
+  var base = (script && script.dataset.base) || '/';
+  var STOPWORDS = new Set('a an and are as at be by for from how in into is it of on or the this to with'.split(' '));
+  var manifest = null;
+  var shards = new Map();
+
+  function stem(token) {
+    if (token.length > 4 && token.endsWith('ies')) return token.slice(0, -3) + 'y';
+    if (token.length > 3 && token.endsWith('s') && !token.endsWith('ss')) return token.slice(0, -1);
+    return token;
+  }
+
+  function tokenize(text) {
+    var tokens = [];
+    (text.match(/[A-Za-z0-9]+/g) || []).forEach(function (word) {
+      var parts = word.match(/[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+/g) || [];
+      if (parts.length > 1) parts.forEach(function (part) { tokens.push(part.toLowerCase()); });
+      tokens.push(word.toLowerCase());
+    });
+    return tokens.filter(function (t) { return t.length > 1 && !STOPWORDS.has(t); }).map(stem);
+  }
+
+  function fetchJson(path) {
+    return fetch(base + 'search/' + path).then(function (r) { return r.ok ? r.json() : {}; });
+  }
+
+  function shard(term) {
+    var name = (term + '__').slice(0, 2);
+    if (!manifest.shards.includes(name)) return Promise.resolve({});
+    if (!shards.has(name)) shards.set(name, fetchJson(name + '.json'));
+    return shards.get(name);
+  }
+
+  // Pages matching the most query terms first, then by summed weight; the last
+  // term also matches as a prefix so results update while typing
+  function search(query) {
+    var terms = Array.from(new Set(tokenize(query)));
+    if (!terms.length) return Promise.resolve([]);
+    return Promise.all(terms.map(shard)).then(function (loaded) {
+      var scores = new Map();
+      terms.forEach(function (term, i) {
+        var postings = loaded[i];
+        var keys = i === terms.length - 1
+          ? Object.keys(postings).filter(function (key) { return key.startsWith(term); })
+          : (postings[term] ? [term] : []);
+        var seen = new Set();
+        keys.forEach(function (key) {
+          var flat = postings[key];
+          for (var j = 0; j < flat.length; j += 2) {
+            var score = scores.get(flat[j]) || { terms: 0, weight: 0 };
+            if (!seen.has(flat[j])) { score.terms += 1; seen.add(flat[j]); }
+            score.weight += key === term ? flat[j + 1] : flat[j + 1] / 2;
+            scores.set(flat[j], score);
+          }
+        });
+      });
+      return Array.from(scores.entries())
+        .sort(function (a, b) { return (b[1].terms - a[1].terms) || (b[1].weight - a[1].weight); })
+        .slice(0, 10)
+        .map(function (entry) { return manifest.pages[entry[0]]; })
+        .filter(Boolean);
+    });
+  }
+
+  function render(results, box) {
+    box.innerHTML = '';
+    results.forEach(function (page) {
+      var link = document.createElement('a');
+      link.href = base + page[0].replace(/^\//, '');
+      link.textContent = page[1];
+      box.appendChild(link);
+    });
+    box.hidden = !results.length;
+  }
+
+  document.addEventListener('DOMContentLoaded', function () {
+    var input = document.getElementById('search-input');
+    var box = document.getElementById('search-results');
+    if (!input || !box) return;
+    var loading = null;
+    input.addEventListener('input', function () {
+      var query = input.value;
+      loading = loading || fetchJson('manifest.json').then(function (m) { manifest = m; });
+      loading.then(function () { return search(query); }).then(function (results) {
+        if (input.value === query) render(results, box);
+      });
+    });
+  });
+})();